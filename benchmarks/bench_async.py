@@ -0,0 +1,107 @@
+"""
+Cliques rápidos na tela de detalhes: uma thread por clique (antes) vs event loop
+compartilhado com cancelamento dos pedidos substituídos (services/async_coingecko.py).
+
+Simula o usuário passando por `--clicks` moedas em sequência contra o servidor
+local de benchmarks/stub_server.py (com `--delay` de latência por resposta) e
+mede quantas requisições chegaram ao servidor, o pico de threads e o tempo até
+a última moeda aparecer. Depois, `--burst` detalhes pedidos de uma vez (sem
+cancelamento) mostram o semáforo limitando a concorrência.
+
+Uso:
+    python -m benchmarks.bench_async [--clicks 20] [--delay 0.2] [--burst 40]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from benchmarks.stub_server import start_stub_server
+from src.services import async_coingecko
+from src.services.coingecko import CoinGeckoClient
+from src.services.rate_limit import RateLimiter
+
+
+def _client(base_url: str) -> CoinGeckoClient:
+    # limite folgado: aqui só interessa a concorrência, não o token bucket
+    return CoinGeckoClient(base_url=base_url, limiter=RateLimiter(per_minute=60_000, burst=1000))
+
+
+def _threads(server, base_url: str, coins) -> None:
+    client = _client(base_url)
+    hits, peak = server.hits, threading.active_count()
+    done = threading.Event()
+    start = time.perf_counter()
+
+    def fetch(coin):
+        client.get_coin_details(coin)
+        if coin == coins[-1]:
+            done.set()
+
+    for coin in coins:
+        threading.Thread(target=fetch, args=(coin,), daemon=True).start()
+        peak = max(peak, threading.active_count())
+        time.sleep(0.01)
+    done.wait()
+    elapsed = (time.perf_counter() - start) * 1000
+    time.sleep(0.5)  # deixa as threads restantes terminarem antes de contar
+    print(f"{'thread por clique':<26} requisições {server.hits - hits:3d}   pico de threads {peak:3d}   "
+          f"última moeda em {elapsed:7.1f} ms")
+    client.close()
+
+
+def _async(server, base_url: str, coins) -> None:
+    client = async_coingecko.AsyncCoinGeckoClient(_client(base_url))
+    loop = async_coingecko.AsyncLoop()
+    hits, peak = server.hits, threading.active_count()
+    start = time.perf_counter()
+    future = None
+    for coin in coins:
+        future = loop.submit(client.get_coin_details(coin), key="details")
+        peak = max(peak, threading.active_count())
+        time.sleep(0.01)
+    future.result()
+    elapsed = (time.perf_counter() - start) * 1000
+    time.sleep(0.5)
+    stats = loop.stats()
+    print(f"{'event loop + cancelamento':<26} requisições {server.hits - hits:3d}   pico de threads {peak:3d}   "
+          f"última moeda em {elapsed:7.1f} ms   (substituídos: {stats['superseded']})")
+    loop.submit(client.close()).result()
+    loop.stop()
+
+
+def _burst(server, base_url: str, n: int) -> None:
+    client = async_coingecko.AsyncCoinGeckoClient(_client(base_url))
+    loop = async_coingecko.AsyncLoop()
+
+    async def all_details():
+        return await asyncio.gather(*(client.get_coin_details(f"coin-{i}") for i in range(n)))
+
+    start = time.perf_counter()
+    loop.submit(all_details()).result()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{n} detalhes de uma vez: {elapsed:7.1f} ms com no máximo {client.max_concurrency} em paralelo "
+          f"(aiohttp: {'sim' if client.use_aiohttp else 'não'})")
+    loop.submit(client.close()).result()
+    loop.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--burst", type=int, default=40)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(delay=args.delay)
+    coins = [f"coin-{i}" for i in range(args.clicks)]
+    _threads(server, base_url, coins)
+    # moedas diferentes: o cache de respostas de um client não vale para o outro
+    _async(server, base_url, [f"{coin}-b" for coin in coins])
+    _burst(server, base_url, args.burst)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Tempo de quadro do gráfico ao vivo: redesenho completo (mplfinance) vs blitting
+do candle em formação (LiveCandleChart), em um canvas Agg fora da tela.
+
+Uso:
+    python -m benchmarks.bench_chart [--candles 300 1000] [--ticks 200]
+"""
+
+import argparse
+import random
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from src.services.candles import CandleSeries, TIMEFRAME_MS  # noqa: E402
+from src.ui.live_chart import LiveCandleChart  # noqa: E402
+
+
+def _series(n: int, tf: str = "5m") -> CandleSeries:
+    tf_ms = TIMEFRAME_MS[tf]
+    series = CandleSeries(tf_ms)
+    price = 30_000.0
+    start = 1_700_000_000_000
+    for i in range(n * 5):
+        price += random.uniform(-20, 20)
+        series.update(start + i * tf_ms // 5, price)
+    return series
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candles", type=int, nargs="+", default=[300, 1000])
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'candles':>8}  {'completo (ms)':>14}  {'blit (ms)':>10}  {'blits':>6}")
+    for n in args.candles:
+        fig = Figure(figsize=(9, 5), dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        chart = LiveCandleChart(fig, fig.add_subplot(111), canvas)
+        series = _series(n)
+        chart.render(series, "bench")
+        ts = series.start[-1]
+        _, _, high, low, close = series.last()
+        for i in range(args.ticks):
+            # ticks dentro do candle atual e da faixa visível: caminho rápido
+            series.update(ts + i, close + random.uniform(low - close, high - close))
+            chart.update(series)
+        # alguns redesenhos completos para a média
+        for _ in range(5):
+            chart.render(series, "bench")
+        stats = chart.frame_stats()
+        blit = stats.get("blit", {"avg_ms": float("nan"), "frames": 0})
+        print(f"{n:>8}  {stats['full']['avg_ms']:14.1f}  {blit['avg_ms']:10.2f}  {blit['frames']:>6}")
+
+
+if __name__ == "__main__":
+    main()
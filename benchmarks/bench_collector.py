@@ -0,0 +1,88 @@
+"""
+Coletor sem interface (src/collector.py): precisão do agendador e memória em regime.
+
+Roda `--ticks` coletas a cada `--interval` segundos com uma API simulada (sem
+rede) e banco/snapshot temporários, e compara com um laço ingênuo
+`sleep(intervalo)` depois de cada coleta: o atraso do ingênuo cresce a cada
+coleta (soma o tempo da própria coleta), o de taxa fixa não. A memória é medida
+com tracemalloc depois do aquecimento e no fim — deve ficar estável.
+
+Uso:
+    python -m benchmarks.bench_collector [--ticks 500] [--interval 0.02] [--coins 50]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from src import collector
+from src.services import coingecko, persistence
+
+
+def _fake_prices(coins, fiats, include_24hr_change=True, allow_stale=True):
+    time.sleep(0.001)  # "latência" da API
+    now = time.time()
+    return {coin: {fiat: now % 1000 + i for fiat in fiats} for i, coin in enumerate(coins)}
+
+
+def _naive(ticks: int, interval: float, coins, fiats) -> float:
+    """Atraso final (ms) de um laço `coleta; sleep(intervalo)`."""
+    start = time.monotonic()
+    for _ in range(ticks):
+        _fake_prices(coins, fiats)
+        time.sleep(interval)
+    return ((time.monotonic() - start) - ticks * interval) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--coins", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_collector_")
+    persistence.DB_PATH = os.path.join(tmp, "bench.db")
+    coins = [f"coin-{i}" for i in range(args.coins)]
+    fiats = ["usd", "brl"]
+    coingecko.get_prices = _fake_prices
+
+    naive_drift = _naive(args.ticks, args.interval, coins, fiats)
+    print(f"laço ingênuo ({args.ticks} coletas): atraso acumulado {naive_drift:8.1f} ms")
+
+    c = collector.Collector(
+        coins=coins, fiats=fiats, interval=args.interval, snapshot_path=os.path.join(tmp, "prices.snap"),
+        rotate_interval=None, stats_interval=None, health_path=None, maintenance=False, align=False, out=None,
+    )
+    warmup = max(args.ticks // 2, 1)  # janelas de métricas (WINDOW coletas) já cheias
+    memory = {}
+
+    tracemalloc.start()
+    original_tick = c.tick
+
+    def tick(slot_ms, due):
+        done = original_tick(slot_ms, due)
+        n = c._stats["ticks"]
+        if n == warmup:
+            memory["warm"] = tracemalloc.get_traced_memory()[0]
+        if n == args.ticks:
+            memory["end"] = tracemalloc.get_traced_memory()[0]
+        return done
+
+    c.tick = tick
+    stats = c.run(max_ticks=args.ticks)
+    tracemalloc.stop()
+
+    lags = list(c._lag_ms)
+    print(f"taxa fixa     ({args.ticks} coletas): atraso da última {lags[-1]:8.1f} ms   "
+          f"por coleta p50 {statistics.median(lags):.2f} ms, máx {max(lags):.2f} ms, puladas {stats['missed']}")
+    print(f"ticks gravados: {stats['writer']['written']} em {stats['writer']['batches']} lotes")
+    print(f"memória Python após aquecimento {memory['warm'] / 1024:8.1f} KiB   no fim {memory['end'] / 1024:8.1f} KiB")
+    persistence.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Linha com 1M de pontos: plot direto vs reduzida à largura do canvas (minmax / LTTB),
+em um canvas Agg fora da tela. O tempo inclui a redução, a conversão para datetime
+e o draw completo; "pixels diferentes" compara a imagem com a do plot direto.
+
+Uso:
+    python -m benchmarks.bench_downsample [--points 1000000] [--width 900]
+"""
+
+import argparse
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from src.services.downsample import downsample  # noqa: E402
+
+
+def _render(ts, prices, width: int, method=None):
+    fig = Figure(figsize=(width / 100, 5), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    start = time.perf_counter()
+    if method is not None:
+        ts, prices = downsample(ts, prices, int(ax.bbox.width), method)
+    reduce_ms = (time.perf_counter() - start) * 1000
+    # mesmo caminho do GraphFrame._plot_line: eixo x em datetime
+    ax.plot(pd.to_datetime(ts, unit="ms"), prices, linewidth=1)
+    canvas.draw()
+    return len(ts), reduce_ms, (time.perf_counter() - start) * 1000, np.asarray(canvas.buffer_rgba())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--width", type=int, default=900)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    ts = 1_700_000_000_000 + np.arange(args.points, dtype=np.int64) * 10_000
+    prices = 30_000 + np.cumsum(rng.normal(0, 5, args.points))
+
+    print(f"{'método':>8}  {'pontos':>9}  {'redução (ms)':>13}  {'total (ms)':>11}  {'pixels diferentes':>18}")
+    _, _, full_ms, full_img = _render(ts, prices, args.width)
+    print(f"{'nenhum':>8}  {args.points:>9}  {0.0:13.1f}  {full_ms:11.1f}  {'-':>18}")
+    for method in ("minmax", "lttb"):
+        n, reduce_ms, total_ms, img = _render(ts, prices, args.width, method)
+        diff = np.count_nonzero(np.any(img != full_img, axis=-1)) / img[..., 0].size
+        print(f"{method:>8}  {n:>9}  {reduce_ms:13.1f}  {total_ms:11.1f}  {diff:17.2%}")
+
+
+if __name__ == "__main__":
+    main()
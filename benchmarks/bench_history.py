@@ -0,0 +1,68 @@
+"""
+Carga do histórico para o gráfico: loop linha a linha (antes) vs load_price_frame.
+
+O caminho antigo (get_price_history + pd.to_datetime por linha) só roda até
+--legacy-max linhas, pois em 1M de linhas leva minutos.
+
+Uso:
+    python -m benchmarks.bench_history [--sizes 5000 100000 1000000] [--legacy-max 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.services import persistence
+
+COIN = "bitcoin"
+
+
+def _legacy_load(limit: int) -> pd.DataFrame:
+    # reproduz o GraphFrame._load_history_df anterior
+    records = []
+    for r in persistence.get_price_history(COIN, limit=limit):
+        dt = pd.to_datetime(r.get("timestamp"))
+        price = (r.get("data") or {}).get("usd")
+        if price is None:
+            continue
+        records.append({"dt": dt, "price": float(price)})
+    return pd.DataFrame(records).drop_duplicates(subset="dt").set_index("dt").sort_index()
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "history.db")
+        start_ts = 1_700_000_000_000
+        persistence.save_ticks(
+            (COIN, start_ts + i * 10_000, {"usd": 30_000.0 + i % 500, "brl": 150_000.0})
+            for i in range(max(args.sizes))
+        )
+        print(f"{'linhas':>9}  {'antes (ms)':>12}  {'vetorizado (ms)':>16}")
+        for size in args.sizes:
+            df, new_ms = _timed(lambda: persistence.load_price_frame(COIN, limit=size))
+            assert len(df) == size
+            if size <= args.legacy_max:
+                _, old_ms = _timed(lambda: _legacy_load(size))
+                old = f"{old_ms:12.1f}"
+            else:
+                old = f"{'(pulado)':>12}"
+            print(f"{size:>9}  {old}  {new_ms:16.1f}")
+        persistence.close_db()
+
+
+if __name__ == "__main__":
+    main()
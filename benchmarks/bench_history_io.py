@@ -0,0 +1,59 @@
+"""
+Export/import em streaming do histórico de ticks (services/history_io.py).
+
+Para cada formato: tempo de export, tempo de import em um banco vazio, tamanho
+do arquivo e pico de memória Python do import (tracemalloc, em uma rodada à
+parte) — que deve ficar constante com o tamanho do arquivo.
+
+Uso:
+    python -m benchmarks.bench_history_io [--ticks 200000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.services import history_io, persistence
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence.DB_PATH = os.path.join(tmp, "source.db")
+        start_ts = 1_700_000_000_000
+        persistence.save_ticks(
+            ("bitcoin", start_ts + i * 10_000, {"usd": 30_000.0 + i % 500, "brl": 150_000.0, "usd_24h_change": 0.5})
+            for i in range(args.ticks)
+        )
+        print(f"{'arquivo':>14}  {'export (s)':>10}  {'import (s)':>10}  {'tamanho (MB)':>12}  {'pico import (MB)':>16}")
+        for name in ("ticks.ndjson", "ticks.ndjson.gz", "ticks.json.gz"):
+            path = os.path.join(tmp, name)
+            persistence.DB_PATH = os.path.join(tmp, "source.db")
+            start = time.perf_counter()
+            history_io.export_ticks(path)
+            export_s = time.perf_counter() - start
+
+            persistence.DB_PATH = os.path.join(tmp, f"target-{name}.db")
+            start = time.perf_counter()
+            stats = history_io.import_ticks(path)
+            import_s = time.perf_counter() - start
+            assert stats["imported"] == args.ticks, stats
+
+            # pico medido em outra rodada: o tracemalloc deixa o import várias vezes mais lento
+            persistence.DB_PATH = os.path.join(tmp, f"traced-{name}.db")
+            tracemalloc.start()
+            history_io.import_ticks(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{name:>14}  {export_s:10.2f}  {import_s:10.2f}  {size_mb:12.1f}  {peak / 1e6:16.1f}")
+        persistence.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Latência por requisição: requests.get avulso vs CoinGeckoClient (sessão com pool).
+
+Roda contra o servidor local de benchmarks/stub_server.py. Em HTTPS real a
+economia por requisição é maior, pois o handshake TLS também é evitado.
+
+Uso:
+    python -m benchmarks.bench_http [--requests 500]
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from benchmarks.stub_server import start_stub_server
+from src.services.coingecko import CoinGeckoClient
+
+COINS = ["bitcoin", "ethereum", "dogecoin", "litecoin", "ripple"]
+
+
+def _measure(label: str, n: int, fn) -> float:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(samples)
+    p95 = sorted(samples)[int(n * 0.95) - 1]
+    print(f"{label:<26} mediana {median:7.3f} ms   p95 {p95:7.3f} ms")
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    params = {"ids": ",".join(COINS), "vs_currencies": "usd,brl", "include_24hr_change": "true"}
+
+    def legacy():
+        resp = requests.get(f"{base_url}/simple/price", params=params, timeout=10)
+        resp.raise_for_status()
+        resp.json()
+
+    client = CoinGeckoClient(base_url=base_url)
+    before = _measure("requests.get (antes)", args.requests, legacy)
+    after = _measure("CoinGeckoClient (sessão)", args.requests, lambda: client.get_prices(COINS, ["usd", "brl"]))
+    client.close()
+    server.shutdown()
+
+    print(f"economia por requisição: {before - after:.3f} ms ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark de importação: arquivo JSON exportado com N entradas.
+
+Compara a gravação linha a linha (save_price por entrada, um commit cada)
+com import_prices_from_json, que usa save_ticks/executemany em uma transação.
+
+Uso:
+    python -m benchmarks.bench_import [--entries 100000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src.services import persistence
+
+
+def _write_export(path: str, entries: int) -> None:
+    prices = {
+        f"coin-{i:06d}": {
+            "data": {"usd": 1.0 + i, "brl": 5.0 + i, "usd_24h_change": 0.5},
+            "fetched_at": "2025-08-06T19:35:17",
+        }
+        for i in range(entries)
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"exported_at": "2025-08-06T19:35:17", "prices": prices}, fh)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_path = os.path.join(tmp, "export.json")
+        _write_export(export_path, args.entries)
+        with open(export_path, "r", encoding="utf-8") as fh:
+            prices = json.load(fh)["prices"]
+
+        persistence.DB_PATH = os.path.join(tmp, "row_by_row.db")
+        start = time.perf_counter()
+        for coin, obj in prices.items():
+            persistence.save_price(coin, obj["data"], ts=persistence.parse_ts(obj["fetched_at"]))
+        before = time.perf_counter() - start
+        print(f"save_price por linha      {args.entries:>8} entradas  {before:8.2f}s")
+
+        persistence.DB_PATH = os.path.join(tmp, "bulk.db")
+        start = time.perf_counter()
+        persistence.import_prices_from_json(export_path)
+        after = time.perf_counter() - start
+        print(f"import_prices_from_json   {args.entries:>8} entradas  {after:8.2f}s")
+        persistence.close_db()
+
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
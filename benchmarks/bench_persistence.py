@@ -0,0 +1,70 @@
+"""
+Micro-benchmark da camada de persistência.
+
+Compara o padrão antigo (init_db + sqlite3.connect por chamada) com o engine
+de conexões em pool. Usa um banco temporário, sem tocar em src/data.
+
+Uso:
+    python -m benchmarks.bench_persistence [--ops 2000]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from src.services import persistence
+
+PAYLOAD = {"usd": 113472, "usd_24h_change": -1.13, "brl": 624801, "brl_24h_change": -1.12}
+
+
+def _legacy_save(db_path: str, coin: str, payload: dict) -> None:
+    # reproduz o comportamento anterior: DDL + conexão nova a cada gravação
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS prices (id INTEGER PRIMARY KEY AUTOINCREMENT, coin TEXT NOT NULL, "
+        "data TEXT NOT NULL, timestamp TEXT NOT NULL)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO prices (coin, data, timestamp) VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%S', 'now'))",
+        (coin, json.dumps(payload)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _rate(label: str, ops: int, fn) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    rate = ops / elapsed
+    print(f"{label:<28} {ops:>7} ops  {elapsed:8.3f}s  {rate:10.0f} ops/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        before = _rate("save_price (antes)", args.ops, lambda i: _legacy_save(legacy_db, "bitcoin", PAYLOAD))
+
+        persistence.DB_PATH = os.path.join(tmp, "engine.db")
+        after = _rate("save_price (engine)", args.ops, lambda i: persistence.save_price("bitcoin", PAYLOAD))
+        _rate("load_price (engine)", args.ops, lambda i: persistence.load_price("bitcoin"))
+        persistence.close_db()
+
+    print(f"speedup save_price: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
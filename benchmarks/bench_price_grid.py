@@ -0,0 +1,73 @@
+"""
+Atualização da tabela de preços com watchlists grandes (ui/price_grid.py), sem Tk:
+mede o trabalho por refresh do GridModel (diff + formatação das linhas visíveis
+que mudaram) e conta quantos `configure` de widget cada refresh exige, contra a
+tabela antiga (uma linha de widgets por moeda, 3 `configure` por moeda a cada refresh).
+
+Uso:
+    python -m benchmarks.bench_price_grid [--coins 500] [--visible 15] [--changed 20]
+"""
+
+import argparse
+import random
+import time
+
+from src.ui.price_grid import GridModel, format_row
+
+
+def _prices(coins, rng, base=None):
+    base = base or {}
+    return {
+        coin: dict(base.get(coin) or {"usd": rng.uniform(1, 50_000), "brl": rng.uniform(5, 250_000),
+                                      "usd_24h_change": rng.uniform(-5, 5)})
+        for coin in coins
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--coins", type=int, default=500)
+    parser.add_argument("--visible", type=int, default=15)
+    parser.add_argument("--changed", type=int, default=20, help="moedas que mudam a cada refresh")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    coins = [f"coin-{i}" for i in range(args.coins)]
+    model = GridModel(coins)
+    model.resize(args.visible)
+    data = _prices(coins, rng)
+    model.update(data)
+    model.take_dirty()
+
+    old_s = new_s = 0.0
+    configures = 0
+    shown = {}
+    for _ in range(args.rounds):
+        data = _prices(coins, rng, data)
+        for coin in rng.sample(coins, args.changed):
+            data[coin]["usd"] *= 1.001
+
+        # antigo: formata e reconfigura todas as linhas
+        start = time.perf_counter()
+        for coin in coins:
+            format_row(coin, data.get(coin))
+        old_s += time.perf_counter() - start
+
+        # novo: diff no modelo e só as linhas visíveis que mudaram
+        start = time.perf_counter()
+        model.update(data)
+        for _pos, coin in model.take_dirty():
+            cells = format_row(coin, data.get(coin))
+            previous = shown.get(coin, (None,) * len(cells))
+            configures += sum(1 for a, b in zip(cells, previous) if a != b)
+            shown[coin] = cells
+        new_s += time.perf_counter() - start
+
+    print(f"{'tabela':>8}  {'ms / refresh':>12}  {'configure / refresh':>20}")
+    print(f"{'antiga':>8}  {old_s / args.rounds * 1000:12.3f}  {3 * args.coins:20}")
+    print(f"{'nova':>8}  {new_s / args.rounds * 1000:12.3f}  {configures / args.rounds:20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Comportamento do client sob HTTP 429, contra o servidor local (stub).
+
+O servidor responde 429 (com Retry-After) a partir da N-ésima requisição.
+O script mostra que o client para de chamar a API enquanto o circuito está
+aberto, serve o último valor em cache e volta ao normal depois do Retry-After.
+
+Uso:
+    python -m benchmarks.bench_rate_limit [--throttle-after 3] [--retry-after 2]
+"""
+
+import argparse
+import time
+
+from benchmarks.stub_server import StubHandler, start_stub_server
+from src.services import coingecko
+from src.services.coingecko import CoinGeckoClient
+from src.services.rate_limit import RateLimiter, RateLimitError
+
+
+class ThrottlingHandler(StubHandler):
+    def do_GET(self):
+        server = self.server
+        if server.throttle_from <= server.hits < server.throttle_until:
+            server.hits += 1
+            self._send_json(429, {"error": "rate limited"}, {"Retry-After": str(server.retry_after)})
+            return
+        super().do_GET()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--throttle-after", type=int, default=3)
+    parser.add_argument("--retry-after", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=6.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(ThrottlingHandler)
+    server.throttle_from = args.throttle_after
+    server.throttle_until = args.throttle_after + 1
+    server.retry_after = args.retry_after
+
+    coingecko.CACHE_TTL_PRICES = 0  # força ida ao servidor a cada chamada
+    client = CoinGeckoClient(base_url=base_url, limiter=RateLimiter(per_minute=600, burst=5))
+    end = time.monotonic() + args.seconds
+    calls = served = errors = 0
+    while time.monotonic() < end:
+        calls += 1
+        try:
+            client.get_prices(["bitcoin"], ["usd"])
+            served += 1
+        except RateLimitError:
+            errors += 1
+        time.sleep(0.2)
+    server.shutdown()
+
+    stats = client.rate_limit_stats()
+    print(f"chamadas do app: {calls}  respondidas: {served}  erros: {errors}")
+    print(f"requisições que chegaram ao servidor: {server.hits}")
+    print(f"429 recebidos: {stats['throttled']}  barradas pelo circuito: {stats['rejected']}")
+    print(f"breaker: {stats['breaker']}  tokens: {stats['tokens']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cache de partida da tela principal: snapshot binário (services/snapshot.py) vs
+snapshot JSON (persistence.save_json_snapshot), com as moedas padrão e com um
+snapshot grande. Mede gravação, leitura (mediana de várias rodadas) e tamanho.
+
+Uso:
+    python -m benchmarks.bench_snapshot [--coins 1000] [--rounds 200]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.services import persistence, snapshot
+
+
+def _prices(n: int) -> dict:
+    return {
+        f"coin-{i}": {"usd": 30_000.0 + i, "brl": 150_000.0 + i, "usd_24h_change": 0.5, "brl_24h_change": 0.4}
+        for i in range(n)
+    }
+
+
+def _median_us(fn, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--coins", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'moedas':>7}  {'formato':>8}  {'gravação (µs)':>14}  {'leitura (µs)':>13}  {'tamanho (B)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (5, args.coins):
+            data = _prices(n)
+            snap_path = os.path.join(tmp, f"prices-{n}.snap")
+            json_path = os.path.join(tmp, f"prices-{n}.json")
+            # a gravação binária de preços iguais é pulada; alterna um valor para medir a escrita real
+            toggle = iter(range(10 ** 9))
+
+            def save_snap():
+                data["coin-0"]["usd"] = float(next(toggle))
+                snapshot.save_snapshot(snap_path, data)
+
+            rows = [
+                ("binário", save_snap, lambda: snapshot.load_snapshot(snap_path), snap_path),
+                ("json", lambda: persistence.save_json_snapshot(json_path, data),
+                 lambda: persistence.load_json_snapshot(json_path), json_path),
+            ]
+            for name, save, load, path in rows:
+                save_us = _median_us(save, args.rounds)
+                load_us = _median_us(load, args.rounds)
+                print(f"{n:>7}  {name:>8}  {save_us:14.1f}  {load_us:13.1f}  {os.path.getsize(path):12}")
+            unchanged_us = _median_us(lambda: snapshot.save_snapshot(snap_path, data), args.rounds)
+            print(f"{n:>7}  {'sem mud.':>8}  {unchanged_us:14.1f}  {'-':>13}  {'-':>12}")
+
+
+if __name__ == "__main__":
+    main()
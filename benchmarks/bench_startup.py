@@ -0,0 +1,68 @@
+"""
+Custo de inicialização: importar o main com as telas registradas sob demanda vs
+o caminho antigo (importar as três telas antes da janela), cada um em um
+interpretador novo. Com um display disponível também constrói o App e mostra
+as fases medidas por services/startup.py até a primeira pintura.
+
+Uso:
+    python -m benchmarks.bench_startup [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_IMPORT = """
+import time
+t0 = time.perf_counter()
+{code}
+print((time.perf_counter() - t0) * 1000)
+"""
+
+_APP = """
+import os, tempfile
+from src.services import startup
+from src import main
+main.persistence.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")  # não mexe no banco real
+app = main.App()
+app.after_idle(lambda: app.after_idle(app.destroy))
+app.mainloop()
+print(startup.timer.report())
+"""
+
+CASES = (
+    ("main (telas sob demanda)", "import src.main"),
+    ("main + 3 telas (antigo)", "import src.main, src.ui.dashboard, src.ui.details, src.ui.graph"),
+    ("persistence", "import src.services.persistence"),
+)
+
+
+def _run(code: str) -> str:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'import':<28} {'mediana (ms)':>12}")
+    for name, code in CASES:
+        samples = [float(_run(_IMPORT.format(code=code))) for _ in range(args.rounds)]
+        print(f"{name:<28} {statistics.median(samples):12.1f}")
+
+    print()
+    try:
+        print(_run(_APP))
+    except RuntimeError as e:
+        print(f"App não construído (sem display?): {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Servidor HTTP local que imita os endpoints da CoinGecko usados pelo app.
+
+Usado pelos benchmarks de rede para medir o client sem depender da API real.
+Fala HTTP/1.1 (keep-alive) e comprime com gzip quando o client pede.
+"""
+
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # silencia o log padrão
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        if server.delay:
+            time.sleep(server.delay)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("/simple/price"):
+            ids = query.get("ids", [""])[0].split(",")
+            fiats = query.get("vs_currencies", ["usd"])[0].split(",")
+            body = {coin: {f: 1.0 for f in fiats} for coin in ids if coin}
+        elif url.path.endswith("/market_chart"):
+            now = int(time.time() * 1000)
+            body = {"prices": [[now - i * 60_000, 100.0 + i] for i in range(100)]}
+        else:
+            body = {"id": url.path.rsplit("/", 1)[-1], "description": {"en": "x" * 2000}}
+        self._send_json(200, body)
+
+    def _send_json(self, status: int, body, headers: Optional[dict] = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        encoding = None
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            raw = gzip.compress(raw)
+            encoding = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def start_stub_server(handler=StubHandler, delay: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Sobe o servidor em uma porta livre; retorna (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.hits = 0
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/api/v3"
@@ -0,0 +1,368 @@
+# src/collector.py
+"""
+Coletor de preços sem interface: grava ticks 24/7 sem abrir o Tk.
+
+    python -m src.collector [--coins bitcoin,ethereum] [--fiats usd,brl] [--interval 30]
+
+A cada `interval` segundos (alinhado ao relógio: com 30 s, coleta em :00 e :30)
+faz uma chamada /simple/price para a watchlist e entrega os ticks ao writer, que
+grava em lote. O agendador é de taxa fixa: cada prazo é calculado a partir do
+início (início + n × intervalo), então atrasos não se acumulam; uma coleta que
+estoura o intervalo pula os horários perdidos em vez de disparar várias seguidas.
+
+O timestamp gravado é o do horário agendado, não o da resposta — a série fica
+regular e uma coleta repetida no mesmo horário só substitui o tick.
+
+Também mantém o snapshot de partida da tela principal (services/snapshot.py),
+guardando uma cópia rotacionada a cada `COLLECTOR_ROTATE_INTERVAL`, roda a
+manutenção do banco (services/retention.py) e, a cada `COLLECTOR_STATS_INTERVAL`,
+imprime uma linha de status no stderr e grava um JSON de saúde (`--health`).
+
+Nada cresce com o tempo: latências ficam em janelas de tamanho fixo, o cache de
+respostas e a fila do writer são limitados, e os contadores são só números.
+SIGINT/SIGTERM encerram gravando os ticks pendentes.
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, TextIO
+
+from src.config import (
+    COLLECTOR_BATCH_SIZE, COLLECTOR_COINS, COLLECTOR_FIATS, COLLECTOR_FLUSH_INTERVAL, COLLECTOR_INTERVAL,
+    COLLECTOR_ROTATE_INTERVAL, COLLECTOR_SNAPSHOT_KEEP, COLLECTOR_STATS_INTERVAL,
+)
+from src.services import coingecko, persistence, snapshot
+from src.services.retention import convert_to_incremental, start_maintenance, stop_maintenance
+from src.services.writer import PriceWriter
+
+HEALTH_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "data", "collector.health.json"))
+WINDOW = 256  # coletas recentes usadas nas métricas de latência/atraso
+
+
+class FixedRateScheduler:
+    """
+    Horários de coleta em taxa fixa: prazo n = início + n × intervalo (relógio
+    monotônico), com o timestamp de cada horário alinhado a múltiplos do intervalo
+    no relógio de parede.
+    """
+
+    def __init__(self, interval: float, align: bool = True,
+                 clock: Callable[[], float] = time.monotonic, wall: Callable[[], float] = time.time):
+        if interval <= 0:
+            raise ValueError("intervalo deve ser positivo")
+        self.interval = interval
+        self.clock = clock
+        now_wall, now = wall(), clock()
+        # primeiro horário: o próximo múltiplo do intervalo (ou agora, sem alinhamento)
+        first_wall = (now_wall // interval + 1) * interval if align else now_wall
+        self._t0 = now + (first_wall - now_wall)
+        self._wall0 = first_wall
+        self._n = 0
+        self.missed = 0
+
+    def next_slot(self) -> float:
+        """Prazo (relógio monotônico) do próximo horário."""
+        return self._t0 + self._n * self.interval
+
+    def slot_ms(self) -> int:
+        """Timestamp (epoch ms) do próximo horário."""
+        return int(round((self._wall0 + self._n * self.interval) * 1000))
+
+    def advance(self) -> int:
+        """
+        Passa para o horário seguinte ao atual; se a coleta estourou, pula os que já
+        passaram. Retorna quantos horários foram pulados.
+        """
+        self._n += 1
+        # um horário atrasado ainda é coletado (na hora); só os que já têm um sucessor vencido são pulados
+        skipped = max(0, int((self.clock() - self.next_slot()) // self.interval))
+        self._n += skipped
+        self.missed += skipped
+        return skipped
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Dorme até o próximo horário; False se `stop` foi sinalizado antes."""
+        while True:
+            remaining = self.next_slot() - self.clock()
+            if remaining <= 0:
+                return not stop.is_set()
+            if stop.wait(remaining):
+                return False
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _rss_bytes() -> Optional[int]:
+    """Memória residente atual do processo (Linux: /proc; demais: pico via resource)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+class Collector:
+    """Laço de coleta: agenda, busca, entrega ao writer e cuida de snapshot, manutenção e métricas."""
+
+    def __init__(
+        self,
+        coins: Iterable[str] = COLLECTOR_COINS,
+        fiats: Iterable[str] = COLLECTOR_FIATS,
+        interval: float = COLLECTOR_INTERVAL,
+        snapshot_path: Optional[str] = snapshot.DEFAULT_SNAPSHOT,
+        snapshot_keep: int = COLLECTOR_SNAPSHOT_KEEP,
+        rotate_interval: Optional[float] = COLLECTOR_ROTATE_INTERVAL,
+        stats_interval: Optional[float] = COLLECTOR_STATS_INTERVAL,
+        health_path: Optional[str] = HEALTH_FILE,
+        maintenance: bool = True,
+        writer: Optional[PriceWriter] = None,
+        align: bool = True,
+        out: Optional[TextIO] = sys.stderr,
+    ):
+        self.coins = list(dict.fromkeys(coins))
+        self.fiats = list(dict.fromkeys(fiats))
+        if not self.coins or not self.fiats:
+            raise ValueError("watchlist vazia: informe ao menos uma moeda e um fiat")
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.snapshot_keep = snapshot_keep
+        self.rotate_interval = rotate_interval
+        self.stats_interval = stats_interval
+        self.health_path = health_path
+        self.maintenance = maintenance
+        self.align = align
+        self.out = out
+        self.writer = writer or PriceWriter(batch_size=COLLECTOR_BATCH_SIZE, flush_interval=COLLECTOR_FLUSH_INTERVAL)
+        self.scheduler: Optional[FixedRateScheduler] = None
+        self._stop = threading.Event()
+        self._started = time.monotonic()
+        self._latency_ms: Deque[float] = deque(maxlen=WINDOW)
+        self._lag_ms: Deque[float] = deque(maxlen=WINDOW)
+        self._ok_times: Deque[float] = deque(maxlen=WINDOW)
+        self._last_success: Optional[int] = None
+        self._last_error: Optional[str] = None
+        self._consecutive_errors = 0
+        self._stats = {"ticks": 0, "ok": 0, "errors": 0, "missed": 0, "ticks_written": 0, "coins_missing": 0,
+                       "rotations": 0}
+
+    # ---------- ciclo de vida ----------
+    def run(self, max_ticks: Optional[int] = None, duration: Optional[float] = None) -> Dict[str, Any]:
+        """Coleta até `stop()`, `max_ticks` coletas ou `duration` segundos. Retorna as métricas finais."""
+        if self.maintenance:
+            # VACUUM completo de bancos antigos: antes do writer, que não pode esbarrar no lock
+            try:
+                if convert_to_incremental():
+                    self._log("banco convertido para auto_vacuum incremental")
+            except Exception as e:
+                self._log(f"conversão para auto_vacuum incremental falhou: {e}")
+            start_maintenance()
+        self._started = time.monotonic()
+        self.scheduler = FixedRateScheduler(self.interval, align=self.align)
+        deadline = None if duration is None else self._started + duration
+        next_rotate = None if not self.rotate_interval else self._started + self.rotate_interval
+        next_stats = None if not self.stats_interval else self._started + self.stats_interval
+        self.writer.start()
+        self._log(f"coletando {len(self.coins)} moedas ({','.join(self.fiats)}) a cada {self.interval:g}s")
+        try:
+            while not self._stop.is_set():
+                if deadline is not None and self.scheduler.next_slot() > deadline:
+                    break
+                if not self.scheduler.wait(self._stop):
+                    break
+                self.tick(self.scheduler.slot_ms(), self.scheduler.next_slot())
+                self._stats["missed"] += self.scheduler.advance()
+                now = time.monotonic()
+                if next_rotate is not None and now >= next_rotate:
+                    self.rotate()
+                    next_rotate = now + self.rotate_interval
+                if next_stats is not None and now >= next_stats:
+                    self.report()
+                    next_stats = now + self.stats_interval
+                if max_ticks is not None and self._stats["ticks"] >= max_ticks:
+                    break
+        finally:
+            self.close()
+        return self.stats()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        """Grava o que está pendente, para a manutenção e fecha o banco."""
+        self.writer.stop()
+        if self.maintenance:
+            stop_maintenance()
+        self.report(status="stopped")
+        persistence.close_db()
+
+    # ---------- coleta ----------
+    def tick(self, slot_ms: int, due: float) -> bool:
+        """Uma coleta do horário `slot_ms` (prazo monotônico `due`). Retorna True se obteve preços."""
+        start = time.monotonic()
+        self._lag_ms.append((start - due) * 1000)
+        self._stats["ticks"] += 1
+        try:
+            # só preços novos: o valor vencido do cache (limite de taxa, resposta ilegível) gravado
+            # como tick deste horário seria um preço falso; conta como coleta com erro
+            data = coingecko.get_prices(self.coins, self.fiats, allow_stale=False)
+        except Exception as e:
+            self._stats["errors"] += 1
+            self._consecutive_errors += 1
+            self._last_error = str(e)
+            if self._consecutive_errors in (1, 10) or self._consecutive_errors % 100 == 0:
+                self._log(f"erro na coleta ({self._consecutive_errors} seguidos): {e}")
+            return False
+        self._latency_ms.append((time.monotonic() - start) * 1000)
+        prices = {coin: data[coin] for coin in self.coins if coin in data}
+        self._stats["coins_missing"] += len(self.coins) - len(prices)
+        if prices:
+            if self.writer.submit_prices(prices, ts=slot_ms):
+                self._stats["ticks_written"] += len(prices)
+            if self.snapshot_path:
+                self.writer.submit_snapshot(self.snapshot_path, prices)
+        self._stats["ok"] += 1
+        self._ok_times.append(start)
+        self._last_success = slot_ms
+        if self._consecutive_errors:
+            self._log(f"coleta restabelecida após {self._consecutive_errors} erros")
+        self._consecutive_errors = 0
+        self._last_error = None
+        return True
+
+    def rotate(self) -> bool:
+        """Grava o snapshot pendente e guarda uma cópia rotacionada."""
+        if not self.snapshot_path:
+            return False
+        self.writer.flush(timeout=10)
+        try:
+            rotated = snapshot.rotate_snapshots(self.snapshot_path, self.snapshot_keep)
+        except OSError as e:
+            self._log(f"erro ao rotacionar o snapshot: {e}")
+            return False
+        if rotated:
+            self._stats["rotations"] += 1
+        return rotated
+
+    # ---------- métricas ----------
+    def status(self) -> str:
+        """"ok", "degraded" (falhas seguidas) ou "stale" (sem sucesso há 5 intervalos)."""
+        if self._last_success is None or persistence.now_ms() - self._last_success > 5 * self.interval * 1000:
+            return "stale" if self._stats["ticks"] else "starting"
+        return "degraded" if self._consecutive_errors else "ok"
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores, vazão, latência/atraso (janela recente), writer, limite da API e memória."""
+        uptime = time.monotonic() - self._started
+        latency = list(self._latency_ms)
+        lag = list(self._lag_ms)
+        recent = [t for t in self._ok_times if time.monotonic() - t <= 3600]
+        stats: Dict[str, Any] = dict(self._stats)
+        writer = self.writer.stats()
+        stats.update({
+            "status": self.status(),
+            "uptime_s": round(uptime, 1),
+            "coins": len(self.coins),
+            "interval_s": self.interval,
+            "ticks_per_min": round(len(recent) / max(min(uptime, 3600), 1) * 60, 2),
+            "latency_ms_p50": round(statistics.median(latency), 1) if latency else 0.0,
+            "latency_ms_p95": round(_percentile(latency, 0.95), 1),
+            "lag_ms_max": round(max(lag), 1) if lag else 0.0,
+            "last_success": persistence.ms_to_str(self._last_success) if self._last_success else None,
+            "last_error": self._last_error,
+            "consecutive_errors": self._consecutive_errors,
+            "writer": {key: writer[key] for key in ("written", "batches", "dropped", "errors", "lost", "failing_since",
+                                                    "queue_depth", "snapshots", "snapshots_unchanged",
+                                                    "last_flush_ms")},
+            "rate_limit": coingecko.rate_limit_stats()["breaker"],
+            "rss_bytes": _rss_bytes(),
+        })
+        return stats
+
+    def report(self, status: Optional[str] = None) -> Dict[str, Any]:
+        """Linha de status no stderr + JSON de saúde (gravação atômica)."""
+        stats = self.stats()
+        if status is not None:
+            stats["status"] = status
+        rss = stats["rss_bytes"]
+        self._log(
+            f"{stats['status']}: {stats['ok']}/{stats['ticks']} coletas, {stats['errors']} erros, "
+            f"{stats['missed']} puladas, {stats['writer']['written']} ticks gravados, "
+            f"p95 {stats['latency_ms_p95']:.0f} ms"
+            + (f", {rss / 1_048_576:.1f} MB" if rss else "")
+        )
+        if self.health_path:
+            try:
+                os.makedirs(os.path.dirname(self.health_path), exist_ok=True)
+                tmp = self.health_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    json.dump(dict(stats, updated_at=persistence.ms_to_str(persistence.now_ms())), fh,
+                              ensure_ascii=False, indent=2)
+                os.replace(tmp, self.health_path)
+            except OSError as e:
+                self._log(f"erro ao gravar {self.health_path}: {e}")
+        return stats
+
+    def _log(self, message: str) -> None:
+        if self.out is not None:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", file=self.out, flush=True)
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.collector", description="Coletor de preços sem interface.")
+    parser.add_argument("--coins", type=_csv, default=COLLECTOR_COINS, help="ids separados por vírgula")
+    parser.add_argument("--fiats", type=_csv, default=COLLECTOR_FIATS, help="vs_currencies separadas por vírgula")
+    parser.add_argument("--interval", type=float, default=COLLECTOR_INTERVAL, help="segundos entre coletas")
+    parser.add_argument("--snapshot", default=snapshot.DEFAULT_SNAPSHOT, help="snapshot de partida ('' desliga)")
+    parser.add_argument("--keep", type=int, default=COLLECTOR_SNAPSHOT_KEEP, help="cópias rotacionadas do snapshot")
+    parser.add_argument("--health", default=HEALTH_FILE, help="arquivo JSON de saúde ('' desliga)")
+    parser.add_argument("--stats-interval", type=float, default=COLLECTOR_STATS_INTERVAL)
+    parser.add_argument("--ticks", type=int, default=None, help="encerra após N coletas")
+    parser.add_argument("--duration", type=float, default=None, help="encerra após N segundos")
+    parser.add_argument("--no-align", action="store_true", help="começa já, sem alinhar ao relógio")
+    parser.add_argument("--no-maintenance", action="store_true", help="não roda a retenção/VACUUM do banco")
+    args = parser.parse_args(argv)
+
+    try:
+        collector = Collector(
+            coins=args.coins, fiats=args.fiats, interval=args.interval,
+            snapshot_path=args.snapshot or None, snapshot_keep=args.keep,
+            stats_interval=args.stats_interval or None, health_path=args.health or None,
+            maintenance=not args.no_maintenance, align=not args.no_align,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    def _on_signal(signum, _frame):
+        collector._log(f"sinal {signum}: encerrando")
+        collector.stop()
+
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+    collector.run(max_ticks=args.ticks, duration=args.duration)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
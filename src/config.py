@@ -14,6 +14,43 @@ import os
 # --- API ---
 API_BASE_URL = "https://api.coingecko.com/api/v3"
 REQUEST_TIMEOUT = 10  # segundos para requests.get
+HTTP_POOL_SIZE = 10  # conexões keep-alive mantidas por host no requests.Session
+HTTP_RETRIES = 2  # novas tentativas em erros de conexão / 5xx
+HTTP_BACKOFF = 0.5  # fator de backoff (s) entre as tentativas
+MAX_URL_LENGTH = 2000  # tamanho máximo de URL; listas grandes de moedas são divididas em lotes
+PRICE_FETCH_WORKERS = 4  # threads que buscam lotes de /simple/price em paralelo
+
+# --- Cache de respostas da API (TTL em segundos) ---
+CACHE_TTL_PRICES = 5  # /simple/price
+CACHE_TTL_DETAILS = 600  # /coins/{id}
+# /coins/{id}/market_chart: TTL por faixa de `days` (até N dias -> TTL)
+CACHE_TTL_HISTORY = {1: 60, 7: 300, 30: 900, 90: 1800}
+CACHE_TTL_HISTORY_MAX = 3600  # para faixas acima da maior chave
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 16 * 1024 * 1024  # ~16 MB de respostas em memória
+
+# --- Cache em disco de detalhes/logos (data/assets) ---
+ASSET_TTL_DETAILS = 600  # segundos até o JSON de /coins/{id} ser revalidado (mesmo TTL do cache em memória)
+ASSET_TTL_IMAGE = 7 * 86400  # logos mudam raramente
+ASSET_CACHE_MAX_BYTES = 64 * 1024 * 1024  # teto do cache em disco
+IMAGE_LRU_SIZE = 32  # logos já redimensionados (PhotoImage) mantidos em memória
+
+# --- Prefetch da watchlist (detalhes, logos e candles recentes em segundo plano) ---
+PREFETCH_DELAY = 3000  # ms após a tela principal carregar; None desliga
+PREFETCH_IDLE = 2.0  # segundos sem requisições do usuário antes de cada passo do prefetch
+PREFETCH_TOKEN_RESERVE = 5  # tokens do limite da API que o prefetch nunca consome
+PREFETCH_MAX_BYTES = 8 * 1024 * 1024  # logos decodificados mantidos em memória pelo prefetch
+PREFETCH_TIMEFRAME = "5m"  # timeframe aquecido para o gráfico (o padrão da tela)
+
+# --- Camada assíncrona (services/async_coingecko.py) ---
+ASYNC_MAX_CONCURRENCY = 4  # requisições simultâneas no event loop (também o tamanho do pool sem aiohttp)
+
+# --- Limite de requisições à API ---
+RATE_LIMIT_PER_MIN = 30  # plano gratuito da CoinGecko: ~30 chamadas/minuto
+RATE_LIMIT_BURST = 10  # tokens acumuláveis no balde (rajada máxima)
+BREAKER_FAILURE_THRESHOLD = 3  # falhas seguidas (5xx/rede) que abrem o circuito
+BACKOFF_BASE = 2.0  # segundos; dobra a cada abertura seguida do circuito
+BACKOFF_MAX = 300.0  # teto do backoff (s)
 
 # --- Moedas padrão ---
 # DEFAULT_COINS: lista de coin_ids que aparecem no dashboard por padrão
@@ -28,6 +65,11 @@ DEFAULT_FIATS = ["usd", "brl"]
 # --- Auto refresh (em segundos) ---
 AUTO_REFRESH_INTERVAL = 10  # segundos padrão de refresh automático
 
+# --- Inicialização ---
+# ms após a primeira pintura para importar em segundo plano os módulos das telas
+# ainda não abertas (gráfico: pandas/matplotlib); None desliga
+SCREEN_PREWARM_DELAY = 2000
+
 # --- Paths ---
 # Caminho absoluto para o banco e logs dentro da pasta data/ do projeto
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -40,4 +82,36 @@ LOG_FILE = os.path.abspath(os.path.join(PROJECT_ROOT, "app.log"))
 # --- Outros ---
 # Quantidade máxima de registros a ler para gráficos/histórico (pode ajustar se necessário)
 MAX_HISTORY_ROWS = 5000
+# Quantidade máxima de candles lidos da tabela de rollup para o gráfico
+MAX_CHART_CANDLES = 1000
+# Visão geral (histórico completo em linha): buckets agregados no SQL por coluna de pixel do canvas
+OVERVIEW_BUCKETS_PER_PIXEL = 2
+# Redução visual das linhas: "minmax" (mín./máx. por coluna de pixel) ou "lttb"
+DOWNSAMPLE_METHOD = "minmax"
+# --- Retenção / manutenção do banco (sobrescrevíveis pela tabela settings, chaves "retention.*") ---
+# Ticks com resolução completa ficam por RETENTION_RAW_DAYS; os mais antigos são compactados
+# para um tick por RETENTION_COMPACT_MINUTES (os candles já guardam o OHLC exato)
+RETENTION_RAW_DAYS = 7
+RETENTION_COMPACT_MINUTES = 5
+# Dias de candles mantidos por timeframe (timeframes ausentes ficam para sempre)
+RETENTION_CANDLE_DAYS = {"1m": 30, "5m": 180, "15m": 365}
+# Páginas liberadas por rodada de incremental_vacuum (0 = todas)
+VACUUM_PAGES = 2000
+# Intervalo (s) entre rodadas de manutenção em segundo plano e atraso da primeira
+MAINTENANCE_INTERVAL = 3600
+MAINTENANCE_DELAY = 60
+# A conversão para auto_vacuum incremental (VACUUM completo) só roda na partida do app
+# em bancos até este tamanho; acima dele fica pendente para `python -m src.services.retention --convert`
+CONVERT_MAX_STARTUP_BYTES = 64 * 1024 * 1024
+# Dias de histórico garantidos pelo backfill (/market_chart/range) ao abrir o gráfico, por timeframe
+BACKFILL_LOOKBACK_DAYS = {"1m": 1, "5m": 1, "15m": 1, "1h": 30, "4h": 90, "1d": 365}
 
+# --- Coletor sem interface (python -m src.collector) ---
+COLLECTOR_COINS = DEFAULT_COINS  # watchlist gravada pelo coletor (--coins sobrescreve)
+COLLECTOR_FIATS = DEFAULT_FIATS
+COLLECTOR_INTERVAL = 30  # segundos entre coletas, alinhadas ao relógio (ex.: :00 e :30)
+COLLECTOR_BATCH_SIZE = 500  # ticks por transação do writer do coletor
+COLLECTOR_FLUSH_INTERVAL = 5.0  # segundos máximos que um tick espera na memória antes de ir ao banco
+COLLECTOR_ROTATE_INTERVAL = 3600  # segundos entre cópias rotacionadas do snapshot (prices.snap.1, .2, ...)
+COLLECTOR_SNAPSHOT_KEEP = 24  # cópias rotacionadas mantidas
+COLLECTOR_STATS_INTERVAL = 60  # segundos entre linhas de status/arquivo de saúde
@@ -1,35 +1,88 @@
 # src/main.py
+from src.services import startup  # primeiro import: marca o início do relógio de inicialização
+
+import importlib
+import sys
+import threading
 import tkinter as tk
-from src.ui.dashboard import Dashboard
-from src.ui.details import Details
-from src.ui.graph import GraphFrame  # nova tela de gráficos
+
+with startup.phase("import serviços"):
+    from src.services import persistence
+    from src.services.async_coingecko import shutdown_async
+    from src.services.prefetch import shutdown_prefetch
+    from src.services.price_feed import shutdown_feed
+    from src.services.retention import convert_at_startup, start_maintenance, stop_maintenance
+    from src.services.writer import shutdown_writer
+from src.config import SCREEN_PREWARM_DELAY
+
+# telas registradas: nome -> (módulo, classe). Cada uma é importada e construída
+# no primeiro show_frame — o gráfico (pandas/matplotlib/mplfinance) só carrega se for aberto.
+SCREENS = {
+    "Dashboard": ("src.ui.dashboard", "Dashboard"),
+    "Details": ("src.ui.details", "Details"),
+    "GraphFrame": ("src.ui.graph", "GraphFrame"),  # nova tela de gráficos
+}
 
 
 class App(tk.Tk):
     def __init__(self):
-        super().__init__()
-        self.title("CriptoDash")
-        self.geometry("900x600")
+        with startup.phase("janela"):
+            super().__init__()
+            self.title("CriptoDash")
+            self.geometry("900x600")
 
         # atributo para passar moeda selecionada entre telas
         self.selected_coin = None
 
-        container = tk.Frame(self)
-        container.pack(side="top", fill="both", expand=True)
-        container.grid_rowconfigure(0, weight=1)
-        container.grid_columnconfigure(0, weight=1)
+        self.container = tk.Frame(self)
+        self.container.pack(side="top", fill="both", expand=True)
+        self.container.grid_rowconfigure(0, weight=1)
+        self.container.grid_columnconfigure(0, weight=1)
 
+        # só as telas já construídas; as demais nascem em show_frame
         self.frames = {}
-        # registra todas as telas/Frames da aplicação
-        for F in (Dashboard, Details, GraphFrame):
-            frame = F(parent=container, controller=self)
-            self.frames[F.__name__] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
 
         self.show_frame("Dashboard")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # retenção/compactação/VACUUM do banco em segundo plano
+        start_maintenance()
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        # after_idle roda depois do redesenho pendente da janela: a tela já está pintada
+        startup.mark("primeira pintura")
+        startup.report_if_enabled()
+        if SCREEN_PREWARM_DELAY is not None:
+            self.after(SCREEN_PREWARM_DELAY, self._prewarm_screens)
+
+    def _prewarm_screens(self):
+        """Importa em segundo plano os módulos das telas ainda não abertas (sem criar widgets)."""
+        modules = [module for name, (module, _) in SCREENS.items() if name not in self.frames]
+
+        def run():
+            for module in modules:
+                try:
+                    importlib.import_module(module)
+                except Exception:
+                    pass
+
+        threading.Thread(target=run, name="screen-prewarm", daemon=True).start()
+
+    def get_frame(self, name):
+        """Retorna a tela `name`, importando o módulo e construindo o frame na primeira vez."""
+        frame = self.frames.get(name)
+        if frame is None:
+            module, cls = SCREENS[name]
+            with startup.phase(f"import {module}"):
+                screen = getattr(importlib.import_module(module), cls)
+            with startup.phase(f"tela {name}"):
+                frame = screen(parent=self.container, controller=self)
+                frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[name] = frame
+        return frame
 
     def show_frame(self, name):
-        frame = self.frames[name]
+        frame = self.get_frame(name)
         # permite o frame preparar-se antes de ser mostrado (opcional)
         if hasattr(frame, "on_show"):
             try:
@@ -38,7 +91,35 @@ class App(tk.Tk):
                 pass
         frame.tkraise()
 
+    def on_close(self):
+        # grava os ticks/snapshots ainda na fila antes de fechar o banco
+        try:
+            for frame in self.frames.values():
+                if hasattr(frame, "on_close"):
+                    try:
+                        frame.on_close()
+                    except Exception:
+                        pass
+            shutdown_prefetch()
+            shutdown_async()
+            shutdown_feed()
+            stop_maintenance()
+            shutdown_writer()
+            persistence.close_db()
+        finally:
+            self.destroy()
+
 
 if __name__ == "__main__":
+    # conversão única de bancos antigos para auto_vacuum incremental (VACUUM completo):
+    # roda antes de qualquer tela ou writer gravar, nunca na manutenção de fundo, e só em
+    # bancos pequenos — nos grandes a abertura não espera e a conversão fica pendente
+    try:
+        with startup.phase("conversão auto_vacuum"):
+            if convert_at_startup() == "pending":
+                print("CriptoDash: banco grande ainda sem auto_vacuum incremental; conversão pendente "
+                      "(python -m src.services.retention --convert)", file=sys.stderr)
+    except Exception:
+        pass
     app = App()
     app.mainloop()
@@ -0,0 +1,207 @@
+"""
+Cache em disco de recursos da API (JSON de detalhes das moedas, logos).
+
+Os bytes ficam em um armazenamento endereçado por conteúdo
+(`data/assets/<sha256[:2]>/<sha256>`): o mesmo logo usado por duas chaves ocupa
+um arquivo só, e um blob nunca é reescrito. A tabela `assets` do SQLite liga
+cada chave ("details:bitcoin", "image:<url>") ao seu digest, com validade (TTL)
+e último acesso. Entradas vencidas continuam servindo como fallback (offline) até
+serem revalidadas; o total em disco é limitado por `max_bytes`, removendo as
+chaves menos usadas recentemente e os blobs que ficam sem referência.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from src.config import ASSET_CACHE_MAX_BYTES
+from src.services import persistence
+
+ASSET_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "assets"))
+
+
+def details_key(coin_id: str) -> str:
+    """Chave do JSON de /coins/{id}."""
+    return f"details:{coin_id}"
+
+
+def image_key(url: str) -> str:
+    """Chave dos bytes de um logo."""
+    return f"image:{url}"
+
+
+class AssetEntry:
+    __slots__ = ("key", "data", "digest", "fetched_at", "expires_at")
+
+    def __init__(self, key: str, data: bytes, digest: str, fetched_at: int, expires_at: int):
+        self.key = key
+        self.data = data
+        self.digest = digest
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+    def fresh(self, now: Optional[int] = None) -> bool:
+        return (persistence.now_ms() if now is None else now) < self.expires_at
+
+    def json(self) -> Any:
+        return json.loads(self.data.decode("utf-8"))
+
+
+class AssetStore:
+    """Índice no SQLite + blobs endereçados por conteúdo; thread-safe."""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = ASSET_CACHE_MAX_BYTES):
+        self.root = root or ASSET_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()  # serializa a remoção por limite de tamanho
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    # ---------- leitura ----------
+    def get(self, key: str) -> Optional[AssetEntry]:
+        """Entrada de `key` (fresca ou vencida) ou None. Um blob sumido do disco conta como miss."""
+        with persistence.get_engine().connection() as conn:
+            row = conn.execute(
+                "SELECT digest, fetched_at, expires_at FROM assets WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        digest, fetched_at, expires_at = row
+        try:
+            with open(self._blob_path(digest), "rb") as fh:
+                data = fh.read()
+        except OSError:
+            self.delete(key)
+            self._count("misses")
+            return None
+        entry = AssetEntry(key, data, digest, fetched_at, expires_at)
+        self._count("hits" if entry.fresh() else "stale")
+        with persistence.get_engine().transaction() as conn:
+            conn.execute("UPDATE assets SET accessed_at = ? WHERE key = ?", (persistence.now_ms(), key))
+        return entry
+
+    def get_json(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """(objeto, fresco?) de uma entrada JSON; None se ausente ou ilegível."""
+        entry = self.get(key)
+        if entry is None:
+            return None
+        try:
+            return entry.json(), entry.fresh()
+        except ValueError:
+            self.delete(key)
+            return None
+
+    # ---------- escrita ----------
+    def put(self, key: str, data: bytes, ttl: float) -> AssetEntry:
+        """Guarda `data` sob `key` com validade de `ttl` segundos e aplica o limite de tamanho."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        now = persistence.now_ms()
+        expires_at = now + int(ttl * 1000)
+        with persistence.get_engine().transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO assets (key, digest, size, fetched_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, digest, len(data), now, expires_at, now),
+            )
+        self._count("stores")
+        self.enforce_limit()
+        return AssetEntry(key, data, digest, now, expires_at)
+
+    def put_json(self, key: str, obj: Any, ttl: float) -> AssetEntry:
+        return self.put(key, json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), ttl)
+
+    def touch(self, key: str, ttl: float) -> None:
+        """Renova a validade de uma entrada revalidada sem mudança."""
+        now = persistence.now_ms()
+        with persistence.get_engine().transaction() as conn:
+            conn.execute("UPDATE assets SET fetched_at = ?, expires_at = ? WHERE key = ?",
+                         (now, now + int(ttl * 1000), key))
+
+    def delete(self, key: str) -> None:
+        with persistence.get_engine().transaction() as conn:
+            row = conn.execute("SELECT digest FROM assets WHERE key = ?", (key,)).fetchone()
+            conn.execute("DELETE FROM assets WHERE key = ?", (key,))
+        if row is not None:
+            self._remove_orphan(row[0])
+
+    # ---------- limite de tamanho ----------
+    def total_bytes(self) -> int:
+        """Bytes em disco (cada blob contado uma vez, mesmo com várias chaves)."""
+        with persistence.get_engine().connection() as conn:
+            row = conn.execute("SELECT SUM(size) FROM (SELECT MAX(size) AS size FROM assets GROUP BY digest)").fetchone()
+        return row[0] or 0
+
+    def enforce_limit(self) -> int:
+        """Remove as chaves menos acessadas até o total caber em `max_bytes`. Retorna quantas removeu."""
+        removed = 0
+        with self._lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return 0
+            with persistence.get_engine().connection() as conn:
+                rows = conn.execute("SELECT key, digest, size FROM assets ORDER BY accessed_at").fetchall()
+            refs: Dict[str, int] = {}
+            for _, digest, _ in rows:
+                refs[digest] = refs.get(digest, 0) + 1
+            for key, digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                with persistence.get_engine().transaction() as conn:
+                    conn.execute("DELETE FROM assets WHERE key = ?", (key,))
+                refs[digest] -= 1
+                if refs[digest] == 0:
+                    total -= size
+                    self._remove_orphan(digest)
+                removed += 1
+        self._count("evictions", removed)
+        return removed
+
+    def _remove_orphan(self, digest: str) -> None:
+        """Apaga o blob se nenhuma chave aponta mais para ele."""
+        with persistence.get_engine().connection() as conn:
+            if conn.execute("SELECT 1 FROM assets WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                return
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    # ---------- métricas ----------
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores hits/stale/misses/stores/evictions + ocupação atual."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with persistence.get_engine().connection() as conn:
+            stats["entries"] = conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+        stats["bytes"] = self.total_bytes()
+        return stats
+
+
+_store: Optional[AssetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> AssetStore:
+    """Retorna o cache de recursos compartilhado do processo."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AssetStore()
+        return _store
@@ -0,0 +1,391 @@
+"""
+Camada assíncrona sobre a CoinGecko: um único event loop asyncio em uma thread
+de fundo, em vez de uma thread por clique.
+
+- `AsyncLoop`: dono do loop. `submit(coro, key=...)` agenda uma corrotina a partir
+  de qualquer thread e devolve um `concurrent.futures.Future`; um novo submit com a
+  mesma `key` cancela o anterior ainda pendente (requisição substituída).
+  `to_tk(widget, future, on_result, on_error, key)` entrega o resultado na thread
+  do Tk via `widget.after`, descartando pedidos cancelados, substituídos e de
+  telas já destruídas; `run_tk` junta os dois.
+- `AsyncCoinGeckoClient`: versões `async` de get_prices, get_coin_details,
+  get_price_history (e get_bytes). Compartilha o cache de respostas e o limitador
+  de taxa do client síncrono, e limita as requisições simultâneas com um semáforo.
+  Usa aiohttp se estiver instalado; sem ele, cada GET roda na sessão do
+  `requests` em um pool de threads do tamanho do semáforo.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from src.config import ASYNC_MAX_CONCURRENCY, CACHE_TTL_DETAILS, CACHE_TTL_PRICES
+from src.services import coingecko
+from src.services.coingecko import _cache_key, _handle_request_errors, _history_ttl, chunk_ids
+from src.services.rate_limit import RateLimitError, parse_retry_after
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except Exception:
+    AIOHTTP_AVAILABLE = False
+
+
+class AsyncLoop:
+    """Event loop asyncio rodando em uma thread daemon dedicada."""
+
+    def __init__(self, name: str = "async-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._inflight: Dict[Any, concurrent.futures.Future] = {}
+        # último pedido de cada chave, mesmo já concluído: to_tk descarta resultados substituídos
+        self._latest: Dict[Any, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "superseded": 0, "cancelled": 0, "failed": 0}
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine, key: Any = None) -> concurrent.futures.Future:
+        """Agenda `coro` no loop (thread-safe). Com `key`, cancela o pedido anterior da mesma chave."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        previous = None
+        with self._lock:
+            self._stats["submitted"] += 1
+            if key is not None:
+                previous = self._inflight.get(key)
+                self._inflight[key] = future
+                self._latest[key] = future
+        # fora do lock: o cancelamento dispara _forget, que também o usa
+        if previous is not None and previous.cancel():
+            with self._lock:
+                self._stats["superseded"] += 1
+        if key is not None:
+            future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key: Any, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if future.cancelled():
+                self._stats["cancelled"] += 1
+            elif future.exception() is not None:
+                self._stats["failed"] += 1
+
+    def cancel(self, key: Any) -> bool:
+        """Cancela o pedido pendente de `key` (ex.: a tela foi fechada)."""
+        with self._lock:
+            future = self._inflight.get(key)
+        return future.cancel() if future is not None else False
+
+    def is_current(self, key: Any, future: concurrent.futures.Future) -> bool:
+        """`future` ainda é o último pedido de `key`."""
+        with self._lock:
+            return self._latest.get(key) is future
+
+    def to_tk(self, widget, future: concurrent.futures.Future, on_result: Callable[[Any], None],
+              on_error: Optional[Callable[[Exception], None]] = None, key: Any = None) -> None:
+        """
+        Chama `on_result(valor)` ou `on_error(exc)` na thread do Tk. Descarta aqui, num
+        só lugar, o que não serve mais: pedidos cancelados, pedidos que outro da mesma
+        `key` substituiu (mesmo se já tinham terminado) e widgets já destruídos.
+        """
+
+        def deliver(fn: Callable[[Any], None], value: Any) -> None:
+            if key is not None and not self.is_current(key, future):
+                return
+            try:
+                if not widget.winfo_exists():
+                    return
+            except Exception:
+                return  # janela já destruída
+            fn(value)
+
+        def done(f: concurrent.futures.Future) -> None:
+            if f.cancelled():
+                return
+            exc = f.exception()
+            fn, value = (on_result, f.result()) if exc is None else (on_error, exc)
+            if fn is None:
+                return
+            try:
+                widget.after(0, deliver, fn, value)
+            except Exception:
+                pass  # janela já destruída
+
+        future.add_done_callback(done)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inflight"] = len(self._inflight)
+        return stats
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Cancela as tarefas pendentes e encerra o loop."""
+        async def _shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(timeout)
+            except Exception:
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+
+class AsyncCoinGeckoClient:
+    """
+    Client assíncrono da CoinGecko (mesmos endpoints e formato do `CoinGeckoClient`).
+    Deve ser usado dentro do loop de um `AsyncLoop` (ou de qualquer loop asyncio).
+    """
+
+    def __init__(self, sync_client: Optional[coingecko.CoinGeckoClient] = None,
+                 max_concurrency: int = ASYNC_MAX_CONCURRENCY, use_aiohttp: Optional[bool] = None):
+        self.sync = sync_client or coingecko.get_client()
+        self.max_concurrency = max(1, max_concurrency)
+        self.use_aiohttp = AIOHTTP_AVAILABLE if use_aiohttp is None else use_aiohttp and AIOHTTP_AVAILABLE
+        # criados no primeiro uso, já dentro do loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    @property
+    def cache(self):
+        return self.sync.cache
+
+    @property
+    def limiter(self):
+        return self.sync.limiter
+
+    # ---------- infraestrutura ----------
+    def _sem(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _acquire(self, fn_name: str) -> None:
+        """
+        Espera (sem bloquear o loop) um token do limitador compartilhado. Enquanto
+        espera não reserva a tentativa do half-open; ela só é reservada quando o
+        token sai, e a partir daí `_get` sempre informa o desfecho ao limitador.
+        """
+        deadline = time.monotonic() + self.sync.timeout
+        while True:
+            wait = self.limiter.try_request(fn_name)
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitError(f"{fn_name}: limite local de requisições atingido", wait)
+            await asyncio.sleep(wait)
+
+    async def _fetch(self, url: str, params: Optional[Dict[str, Any]],
+                     headers: Optional[Dict[str, str]]) -> Tuple[int, Dict[str, str], bytes]:
+        """GET cru: (status, cabeçalhos, corpo)."""
+        if self.use_aiohttp:
+            if self._session is None:
+                self._session = aiohttp.ClientSession(
+                    headers=dict(self.sync.session.headers),
+                    timeout=aiohttp.ClientTimeout(total=self.sync.timeout),
+                )
+            async with self._session.get(url, params=params, headers=headers) as resp:
+                return resp.status, dict(resp.headers), await resp.read()
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="async-http")
+        loop = asyncio.get_running_loop()
+        resp = await loop.run_in_executor(
+            self._executor,
+            lambda: self.sync.session.get(url, params=params, headers=headers, timeout=self.sync.timeout),
+        )
+        return resp.status_code, dict(resp.headers), resp.content
+
+    async def _get(self, fn_name: str, url: str, params: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, str]] = None, limited: bool = True) -> Tuple[int, Dict[str, str], bytes]:
+        """GET sob o semáforo e o limitador, com o mesmo tratamento de erros do client síncrono."""
+        async with self._sem():
+            if limited:
+                await self._acquire(fn_name)
+            # a partir daqui a requisição pode ser a tentativa do half-open: toda saída
+            # tem de informar o limitador, senão o circuito fica preso em "testando"
+            settled = not limited
+            try:
+                try:
+                    status, resp_headers, body = await self._fetch(url, params, headers)
+                except asyncio.TimeoutError:
+                    if limited:
+                        self.limiter.on_failure()
+                        settled = True
+                    raise Exception(f"{fn_name}: Timeout - a API demorou a responder")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    if limited:
+                        self.limiter.on_failure()
+                        settled = True
+                    raise Exception(f"{fn_name}: Erro de requisição - {exc}")
+                if limited:
+                    if status == 429:
+                        wait = self.limiter.on_throttled(parse_retry_after(resp_headers.get("Retry-After")))
+                        settled = True
+                        raise RateLimitError(f"{fn_name}: API limitada (HTTP 429) - nova tentativa em {wait:.0f}s", wait)
+                    if status >= 500:
+                        self.limiter.on_failure()
+                    else:
+                        self.limiter.on_success()
+                    settled = True
+            finally:
+                if not settled:
+                    self.limiter.on_abort()  # cancelada (pedido substituído) ou saída inesperada
+        if status >= 400:
+            raise Exception(f"{fn_name}: Erro HTTP - {status} para {url}")
+        return status, resp_headers, body
+
+    async def _get_json(self, fn_name: str, url: str, params: Dict[str, Any], ttl: float) -> Any:
+        """Mesmo protocolo de cache do client síncrono (fresco, revalidação 304, fallback no 429)."""
+        key = _cache_key(url, params)
+        entry = self.cache.lookup(key)
+        if entry is not None and entry.fresh():
+            return entry.value
+        headers = entry.validators() if entry is not None else None
+        try:
+            status, resp_headers, body = await self._get(fn_name, url, params, headers=headers or None)
+        except RateLimitError:
+            if entry is not None:
+                return entry.value
+            raise
+        if status == 304 and entry is not None:
+            self.cache.touch(key, ttl)
+            return entry.value
+        try:
+            value = json.loads(body)
+        except ValueError as exc:
+            # resposta 200 ilegível: mesmo fallback do limite de taxa
+            if entry is not None:
+                return entry.value
+            raise _handle_request_errors(fn_name, exc)
+        self.cache.store(key, value, ttl, len(body),
+                         etag=resp_headers.get("ETag"), last_modified=resp_headers.get("Last-Modified"))
+        return value
+
+    # ---------- endpoints ----------
+    async def get_prices(self, coin_ids: List[str], vs_currencies: List[str],
+                         include_24hr_change: bool = True) -> Dict[str, Any]:
+        """Como CoinGeckoClient.get_prices; os lotes de URL longa saem em paralelo (até o semáforo)."""
+        url = f"{self.sync.base_url}/simple/price"
+        base = {
+            "vs_currencies": ",".join(vs_currencies),
+            "include_24hr_change": str(include_24hr_change).lower(),
+        }
+        budget = self.sync.max_url_length - len(url) - len(urlencode(base)) - len("?&ids=")
+        chunks = chunk_ids(list(coin_ids), max(1, budget))
+        if len(chunks) <= 1:
+            return await self._get_json("get_prices", url, dict(base, ids=",".join(coin_ids)), CACHE_TTL_PRICES)
+        results = await asyncio.gather(
+            *(self._get_json("get_prices", url, dict(base, ids=",".join(chunk)), CACHE_TTL_PRICES) for chunk in chunks),
+            return_exceptions=True,
+        )
+        merged: Dict[str, Any] = {}
+        errors = [r for r in results if isinstance(r, BaseException)]
+        for result in results:
+            if isinstance(result, dict):
+                merged.update(result)
+        if errors and len(errors) == len(chunks):
+            raise errors[0]
+        return merged
+
+    async def get_coin_details(self, coin_id: str) -> Dict[str, Any]:
+        """Como CoinGeckoClient.get_coin_details."""
+        params = {
+            "localization": "false",
+            "tickers": "false",
+            "market_data": "true",
+            "community_data": "false",
+            "developer_data": "false",
+            "sparkline": "false",
+        }
+        return await self._get_json("get_coin_details", f"{self.sync.base_url}/coins/{coin_id}", params,
+                                    CACHE_TTL_DETAILS)
+
+    async def get_price_history(self, coin_id: str, vs_currency: str = "usd", days: int = 1) -> Dict[str, Any]:
+        """Como CoinGeckoClient.get_price_history."""
+        params = {"vs_currency": vs_currency, "days": str(days)}
+        url = f"{self.sync.base_url}/coins/{coin_id}/market_chart"
+        return await self._get_json("get_price_history", url, params, _history_ttl(days))
+
+    async def get_bytes(self, url: str) -> bytes:
+        """Recurso binário (logo) da CDN, fora do limite de taxa da API."""
+        _, _, body = await self._get("get_bytes", url, limited=False)
+        return body
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_loop: Optional[AsyncLoop] = None
+_client: Optional[AsyncCoinGeckoClient] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> AsyncLoop:
+    """Loop assíncrono compartilhado do processo (thread iniciada sob demanda)."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = AsyncLoop()
+        return _loop
+
+
+def get_async_client() -> AsyncCoinGeckoClient:
+    """Client assíncrono compartilhado (usa o client síncrono padrão para cache e limite)."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = AsyncCoinGeckoClient()
+        return _client
+
+
+def run(coro: Coroutine, key: Any = None) -> concurrent.futures.Future:
+    """Atalho: agenda `coro` no loop compartilhado."""
+    return get_loop().submit(coro, key)
+
+
+def run_tk(widget, coro: Coroutine, on_result: Callable[[Any], None],
+           on_error: Optional[Callable[[Exception], None]] = None, key: Any = None) -> concurrent.futures.Future:
+    """Agenda `coro` no loop compartilhado e entrega o desfecho a `widget` pela ponte `to_tk`."""
+    loop = get_loop()
+    future = loop.submit(coro, key)
+    loop.to_tk(widget, future, on_result, on_error, key=key)
+    return future
+
+
+def shutdown_async(timeout: Optional[float] = 5.0) -> None:
+    """Fecha o client e encerra o loop compartilhado (hook de saída do App)."""
+    global _loop, _client
+    with _lock:
+        loop, _loop = _loop, None
+        client, _client = _client, None
+    if loop is None:
+        return
+    if client is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(client.close(), loop.loop).result(timeout)
+        except Exception:
+            pass
+    loop.stop(timeout)
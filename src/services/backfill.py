@@ -0,0 +1,138 @@
+"""
+Backfill do histórico de preços a partir de /coins/{id}/market_chart/range.
+
+Para a janela pedida (lookback do timeframe, ver BACKFILL_LOOKBACK_DAYS) o que
+falta é: a janela menos os intervalos já buscados (tabela `coverage`) e menos os
+buckets que já têm ticks salvos. Os buracos são pedidos em UMA requisição, do
+primeiro ao último; só os pontos que caem dentro dos buracos são gravados (sem
+repetir timestamp) e o trecho que a API devolveu entra na cobertura — a mesma
+faixa nunca é pedida duas vezes. Depois do primeiro backfill, abrir o gráfico
+custa no máximo uma requisição pequena (o trecho desde a última cobertura até
+agora).
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import BACKFILL_LOOKBACK_DAYS
+from src.services import coingecko, persistence
+
+MINUTE_MS = 60_000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+
+# Granularidade automática da API por extensão da faixa pedida: (até, passo)
+_GRANULARITY = ((DAY_MS, 5 * MINUTE_MS), (90 * DAY_MS, HOUR_MS))
+
+Interval = Tuple[int, int]
+
+_lock = threading.Lock()
+
+
+def granularity_ms(span_ms: int) -> int:
+    """Passo dos pontos que /market_chart/range devolve para uma faixa de `span_ms`."""
+    for limit, step in _GRANULARITY:
+        if span_ms <= limit:
+            return step
+    return DAY_MS
+
+
+def lookback_ms(timeframe: str) -> int:
+    return int(BACKFILL_LOOKBACK_DAYS.get(timeframe, 1) * DAY_MS)
+
+
+def _merge(intervals: List[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _bucket_runs(buckets: List[int], step: int) -> List[Interval]:
+    """Converte índices de bucket consecutivos em intervalos [início, fim) em ms."""
+    runs: List[Interval] = []
+    for b in buckets:
+        if runs and runs[-1][1] == b * step:
+            runs[-1] = (runs[-1][0], (b + 1) * step)
+        else:
+            runs.append((b * step, (b + 1) * step))
+    return runs
+
+
+def find_gaps(coin: str, start_ms: int, end_ms: int, step_ms: int, fiat: str = "usd") -> List[Interval]:
+    """
+    Trechos de [start_ms, end_ms] sem cobertura com passo <= step_ms e sem ticks salvos.
+    Buracos menores que um passo são ignorados (a API não teria ponto novo para eles).
+    """
+    covered = persistence.load_coverage(coin, fiat, step_ms, start_ms, end_ms)
+    covered += _bucket_runs(persistence.load_tick_buckets(coin, step_ms, start_ms, end_ms, fiat), step_ms)
+    gaps: List[Interval] = []
+    cursor = start_ms
+    for c_start, c_end in _merge(covered):
+        if c_start > cursor:
+            gaps.append((cursor, min(c_start, end_ms)))
+        cursor = max(cursor, c_end)
+        if cursor >= end_ms:
+            break
+    if cursor < end_ms:
+        gaps.append((cursor, end_ms))
+    return [(a, b) for a, b in gaps if b - a >= step_ms]
+
+
+def _points_in_gaps(points: List[Any], gaps: List[Interval]) -> Dict[int, float]:
+    """{ts: preço} dos pontos dentro dos buracos; timestamps repetidos ficam com o último."""
+    selected: Dict[int, float] = {}
+    i = 0
+    for point in sorted(points, key=lambda p: p[0]):
+        try:
+            ts, price = int(point[0]), float(point[1])
+        except (TypeError, ValueError, IndexError):
+            continue
+        while i < len(gaps) and ts >= gaps[i][1]:
+            i += 1
+        if i == len(gaps):
+            break
+        if ts >= gaps[i][0]:
+            selected[ts] = price
+    return selected
+
+
+def _returned_span(points: List[Any], start_ms: int, end_ms: int) -> Optional[Interval]:
+    """(primeiro, último) ts válidos da resposta dentro de [start_ms, end_ms], ou None se não houver."""
+    times = []
+    for point in points:
+        try:
+            ts = int(point[0])
+        except (TypeError, ValueError, IndexError):
+            continue
+        if start_ms <= ts <= end_ms:
+            times.append(ts)
+    return (min(times), max(times)) if times else None
+
+
+def backfill(coin: str, timeframe: str, fiat: str = "usd", now: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Garante o histórico de `coin` no lookback do timeframe. Faz no máximo uma requisição.
+    Retorna {"gaps": [...], "requested": (início, fim) ou None, "inserted": n}.
+    """
+    end = persistence.now_ms() if now is None else now
+    start = end - lookback_ms(timeframe)
+    step = granularity_ms(end - start)
+    with _lock:
+        gaps = find_gaps(coin, start, end, step, fiat)
+        if not gaps:
+            return {"gaps": [], "requested": None, "inserted": 0}
+        req_start, req_end = gaps[0][0], gaps[-1][1]
+        data = coingecko.get_price_history_range(coin, fiat, req_start, req_end)
+        prices = (data or {}).get("prices") or []
+        returned = _returned_span(prices, req_start, req_end)
+        points = _points_in_gaps(prices, gaps)
+        # merge: um ponto no mesmo ts de um tick do feed não apaga as outras colunas (brl, variação)
+        inserted = persistence.save_ticks(((coin, ts, {fiat: price}) for ts, price in points.items()), merge=True)
+        # cobertura só do trecho que a API devolveu: resposta vazia (erro, moeda nova) é pedida de novo
+        if returned:
+            persistence.add_coverage(coin, fiat, granularity_ms(req_end - req_start), *returned)
+    return {"gaps": gaps, "requested": (req_start, req_end), "inserted": inserted}
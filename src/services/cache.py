@@ -0,0 +1,107 @@
+"""
+Cache em memória das respostas da CoinGecko.
+
+LRU limitado por número de entradas e por bytes, com TTL por entrada e
+validadores HTTP (ETag / Last-Modified) guardados para revalidação condicional.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.config import CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+
+
+class CacheEntry:
+    __slots__ = ("value", "expires_at", "etag", "last_modified", "size")
+
+    def __init__(self, value: Any, expires_at: float, etag: Optional[str], last_modified: Optional[str], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+
+    def fresh(self, now: Optional[float] = None) -> bool:
+        return (time.monotonic() if now is None else now) < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Cabeçalhos para requisição condicional (vazio se o servidor não enviou validadores)."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """LRU thread-safe com TTL e limite de memória."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "revalidated": 0, "evictions": 0}
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """
+        Retorna a entrada (fresca ou expirada) e contabiliza hit/miss/expired.
+        Entradas expiradas continuam disponíveis para revalidação ou fallback.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.fresh():
+                self._stats["hits"] += 1
+            else:
+                self._stats["expired"] += 1
+            return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Entrada atual sem afetar contadores/LRU."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def store(self, key: str, value: Any, ttl: float, size: int,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        entry = CacheEntry(value, time.monotonic() + ttl, etag, last_modified, size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+
+    def touch(self, key: str, ttl: float) -> None:
+        """Renova o TTL de uma entrada revalidada (HTTP 304)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+                self._stats["revalidated"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores hits/misses/expired/revalidated/evictions + ocupação atual."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
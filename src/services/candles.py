@@ -0,0 +1,181 @@
+"""
+Agregador incremental de candles OHLC.
+
+Cada série (moeda, timeframe) guarda os candles em arrays compactos
+(`array('q')` para o início do bucket e `array('d')` para open/high/low/close).
+Um tick novo só mexe no último candle — ou abre o próximo quando o tempo passa
+do limite do bucket — então o custo por tick é O(1) independente do histórico.
+A carga inicial vem pronta da tabela de rollup do banco (`load`) ou é
+calculada dos ticks brutos de forma vetorizada com NumPy (`seed`).
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+# Duração de cada timeframe em ms (mesmas chaves de TF_MAP em ui/graph.py)
+TIMEFRAME_MS = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+# Candles mantidos por série (os mais antigos são descartados)
+MAX_CANDLES = 5000
+
+
+class CandleSeries:
+    """Candles de uma moeda em um timeframe."""
+
+    __slots__ = ("tf_ms", "max_candles", "start", "open", "high", "low", "close")
+
+    def __init__(self, tf_ms: int, max_candles: int = MAX_CANDLES):
+        self.tf_ms = tf_ms
+        self.max_candles = max_candles
+        self.start = array("q")
+        self.open = array("d")
+        self.high = array("d")
+        self.low = array("d")
+        self.close = array("d")
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def bucket(self, ts: int) -> int:
+        return ts - ts % self.tf_ms
+
+    def seed(self, ts, prices) -> None:
+        """Reconstrói a série a partir de arrays (ts ms crescente, preço) de uma vez só."""
+        import numpy as np
+
+        ts = np.asarray(ts, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        for arr in (self.start, self.open, self.high, self.low, self.close):
+            del arr[:]
+        if not len(ts):
+            return
+        buckets = ts - ts % self.tf_ms
+        firsts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        lasts = np.concatenate((firsts[1:] - 1, [len(ts) - 1]))
+        firsts, lasts = firsts[-self.max_candles:], lasts[-self.max_candles:]
+        self.start.frombytes(buckets[firsts].tobytes())
+        self.open.frombytes(prices[firsts].tobytes())
+        self.high.frombytes(np.maximum.reduceat(prices, firsts).tobytes())
+        self.low.frombytes(np.minimum.reduceat(prices, firsts).tobytes())
+        self.close.frombytes(prices[lasts].tobytes())
+
+    def load(self, start, open_, high, low, close) -> None:
+        """Carrega candles já agregados (ex.: persistence.load_candles), em ordem crescente."""
+        import numpy as np
+
+        n = min(len(start), self.max_candles)
+        columns = (
+            (self.start, start, np.int64), (self.open, open_, np.float64), (self.high, high, np.float64),
+            (self.low, low, np.float64), (self.close, close, np.float64),
+        )
+        for arr, values, dtype in columns:
+            del arr[:]
+            arr.frombytes(np.asarray(values, dtype=dtype)[len(start) - n:].tobytes())
+
+    def update(self, ts: int, price: float) -> bool:
+        """
+        Aplica um tick. Retorna True se abriu um candle novo (o anterior fechou).
+        Ticks atrasados atualizam o bucket correspondente (busca binária).
+        """
+        bucket = self.bucket(ts)
+        if self.start and bucket == self.start[-1]:
+            i = len(self.start) - 1
+            if price > self.high[i]:
+                self.high[i] = price
+            if price < self.low[i]:
+                self.low[i] = price
+            self.close[i] = price
+            return False
+        if not self.start or bucket > self.start[-1]:
+            self.start.append(bucket)
+            self.open.append(price)
+            self.high.append(price)
+            self.low.append(price)
+            self.close.append(price)
+            if len(self.start) > 2 * self.max_candles:
+                self._trim()
+            return True
+        i = bisect_left(self.start, bucket)
+        if i < len(self.start) and self.start[i] == bucket:
+            self.high[i] = max(self.high[i], price)
+            self.low[i] = min(self.low[i], price)
+        return False
+
+    def _trim(self) -> None:
+        # corte amortizado: só quando passa do dobro do limite
+        drop = len(self.start) - self.max_candles
+        for arr in (self.start, self.open, self.high, self.low, self.close):
+            del arr[:drop]
+
+    def last(self) -> Optional[Tuple[int, float, float, float, float]]:
+        """(início, open, high, low, close) do candle em formação."""
+        if not self.start:
+            return None
+        return self.start[-1], self.open[-1], self.high[-1], self.low[-1], self.close[-1]
+
+    def to_frame(self, last_n: Optional[int] = None):
+        """DataFrame OHLC (+ volume 0) no formato esperado pelo mplfinance."""
+        import numpy as np
+        import pandas as pd
+
+        n = len(self.start) if last_n is None else min(last_n, len(self.start))
+        first = len(self.start) - n
+        # fatiar o array copia os dados: nenhuma view fica presa ao buffer (que ainda cresce)
+        index = pd.to_datetime(np.frombuffer(self.start[first:], dtype=np.int64), unit="ms")
+        frame = pd.DataFrame({
+            "open": np.frombuffer(self.open[first:], dtype=np.float64),
+            "high": np.frombuffer(self.high[first:], dtype=np.float64),
+            "low": np.frombuffer(self.low[first:], dtype=np.float64),
+            "close": np.frombuffer(self.close[first:], dtype=np.float64),
+        }, index=index)
+        frame["volume"] = 0
+        return frame
+
+
+class CandleEngine:
+    """Séries de candles por (moeda, timeframe); ticks de uma moeda atualizam todas as suas séries."""
+
+    def __init__(self, max_candles: int = MAX_CANDLES):
+        self.max_candles = max_candles
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+
+    def seed(self, coin: str, timeframe: str, ts, prices) -> CandleSeries:
+        series = CandleSeries(TIMEFRAME_MS[timeframe], self.max_candles)
+        series.seed(ts, prices)
+        self._series[(coin, timeframe)] = series
+        return series
+
+    def load(self, coin: str, timeframe: str, start, open_, high, low, close) -> CandleSeries:
+        series = CandleSeries(TIMEFRAME_MS[timeframe], self.max_candles)
+        series.load(start, open_, high, low, close)
+        self._series[(coin, timeframe)] = series
+        return series
+
+    def put(self, coin: str, timeframe: str, series: CandleSeries) -> CandleSeries:
+        """Instala uma série montada fora do engine (ex.: em uma thread de fundo)."""
+        self._series[(coin, timeframe)] = series
+        return series
+
+    def get(self, coin: str, timeframe: str) -> Optional[CandleSeries]:
+        return self._series.get((coin, timeframe))
+
+    def update(self, coin: str, ts: int, price: float) -> None:
+        for (c, _tf), series in self._series.items():
+            if c == coin:
+                series.update(ts, price)
+
+    def drop(self, coin: Optional[str] = None) -> None:
+        """Descarta as séries de `coin` (ou todas)."""
+        if coin is None:
+            self._series.clear()
+        else:
+            for key in [k for k in self._series if k[0] == coin]:
+                del self._series[key]
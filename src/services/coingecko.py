@@ -1,17 +1,36 @@
-# src/services/coingecko.py
 """
 Client simples para CoinGecko API (endpoints usados pelo CriptoDash).
+
+`CoinGeckoClient` mantém um `requests.Session` com pool de conexões keep-alive,
+respostas comprimidas e retries, um cache de respostas com TTL por endpoint
+(revalidado com ETag/Last-Modified quando o servidor envia) e um limitador de
+taxa com circuit breaker (HTTP 429 / Retry-After). As funções do módulo
+(`get_prices`, ...) são fachadas sobre um client padrão compartilhado.
 """
 
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union
+from urllib.parse import urlencode, quote
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError, Timeout, RequestException
+from urllib3.util.retry import Retry
 
-from src.config import API_BASE_URL, REQUEST_TIMEOUT
+from src.config import (
+    API_BASE_URL, REQUEST_TIMEOUT, HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_BACKOFF,
+    MAX_URL_LENGTH, PRICE_FETCH_WORKERS,
+    CACHE_TTL_PRICES, CACHE_TTL_DETAILS, CACHE_TTL_HISTORY, CACHE_TTL_HISTORY_MAX,
+)
+from src.services.cache import ResponseCache
+from src.services.rate_limit import RateLimiter, RateLimitError, parse_retry_after
 
 
 def _handle_request_errors(fn_name: str, exc: Exception) -> Exception:
     """Gera exceção amigável para erro de requisição."""
+    if isinstance(exc, ValueError):  # corpo que não é JSON (página de erro HTML, resposta truncada)
+        return Exception(f"{fn_name}: Resposta inválida da API - {exc}")
     if isinstance(exc, HTTPError):
         return Exception(f"{fn_name}: Erro HTTP - {exc}")
     if isinstance(exc, Timeout):
@@ -21,90 +40,373 @@ def _handle_request_errors(fn_name: str, exc: Exception) -> Exception:
     return Exception(f"{fn_name}: Erro inesperado - {exc}")
 
 
-def get_prices(coin_ids: List[str], vs_currencies: List[str], include_24hr_change: bool = True) -> Dict[str, Any]:
-    """
-    Busca preços atuais e (opcional) variação 24h das moedas especificadas.
-
-    Args:
-        coin_ids: lista de IDs das moedas (ex: ['bitcoin','ethereum'])
-        vs_currencies: lista de fiats (ex: ['usd','brl'])
-        include_24hr_change: se inclui variação em 24h (bool)
+def _cache_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+    return f"{url}?{urlencode(sorted((params or {}).items()))}"
 
-    Returns:
-        dict: dados no formato { coin_id: { 'usd': 123.4, 'brl': 567.8, 'usd_24h_change': 1.23 }, ... }
 
-    Raises:
-        Exception em caso de erro (mensagem legível).
+def chunk_ids(coin_ids: List[str], budget: int) -> List[List[str]]:
     """
-    endpoint = f"{API_BASE_URL}/simple/price"
-    params = {
-        "ids": ",".join(coin_ids),
-        "vs_currencies": ",".join(vs_currencies),
-        "include_24hr_change": str(include_24hr_change).lower(),
-    }
+    Divide `coin_ids` em lotes cujo parâmetro `ids` (já codificado na URL, vírgula = %2C)
+    cabe em `budget` caracteres. Um id maior que o orçamento fica sozinho no lote.
+    """
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for coin in coin_ids:
+        cost = len(quote(coin, safe="")) + (3 if current else 0)
+        if current and size + cost > budget:
+            chunks.append(current)
+            current, size = [], 0
+            cost = len(quote(coin, safe=""))
+        current.append(coin)
+        size += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
 
+def _history_ttl(days: Union[int, str]) -> float:
+    """TTL do /market_chart por faixa de dias (históricos longos mudam menos)."""
     try:
-        resp = requests.get(endpoint, params=params, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as exc:
-        raise _handle_request_errors("get_prices", exc)
+        days = float(days)
+    except (TypeError, ValueError):
+        return CACHE_TTL_HISTORY_MAX  # 'max'
+    for limit in sorted(CACHE_TTL_HISTORY):
+        if days <= limit:
+            return CACHE_TTL_HISTORY[limit]
+    return CACHE_TTL_HISTORY_MAX
 
 
-def get_coin_details(coin_id: str) -> Dict[str, Any]:
+class CoinGeckoClient:
     """
-    Busca detalhes da moeda (/coins/{id}) — inclui descrição, links, imagens e market_data.
+    Client HTTP da CoinGecko com sessão persistente.
 
     Args:
-        coin_id: ID da moeda (ex: 'bitcoin')
+        base_url: URL base da API
+        timeout: timeout (s) de cada requisição
+        pool_size: conexões mantidas abertas por host
+        retries: novas tentativas em falhas de conexão e respostas 5xx
+        backoff_factor: fator de espera exponencial entre tentativas
+        cache: cache de respostas (padrão: um ResponseCache novo)
+        limiter: limitador de taxa/circuit breaker (padrão: um RateLimiter novo)
+        max_url_length: tamanho máximo de URL antes de dividir /simple/price em lotes
+        workers: threads que buscam os lotes em paralelo
+    """
 
-    Returns:
-        dict: JSON retornado pela API.
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        timeout: float = REQUEST_TIMEOUT,
+        pool_size: int = HTTP_POOL_SIZE,
+        retries: int = HTTP_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_url_length: int = MAX_URL_LENGTH,
+        workers: int = PRICE_FETCH_WORKERS,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache = cache if cache is not None else ResponseCache()
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.max_url_length = max_url_length
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.last_chunk_timings: List[Dict[str, Any]] = []
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+            respect_retry_after_header=False,  # 429/Retry-After é tratado pelo RateLimiter
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
 
-    Raises:
-        Exception em caso de erro.
-    """
-    endpoint = f"{API_BASE_URL}/coins/{coin_id}"
-    params = {
-        "localization": "false",
-        "tickers": "false",
-        "market_data": "true",
-        "community_data": "false",
-        "developer_data": "false",
-        "sparkline": "false",
-    }
+    def _get(self, fn_name: str, url: str, params: Optional[Dict[str, Any]] = None,
+             headers: Optional[Dict[str, str]] = None, limited: bool = True) -> requests.Response:
+        """
+        GET com tratamento de erros. Com `limited`, passa pelo RateLimiter: espera um
+        token, e um HTTP 429 abre o circuito e vira RateLimitError.
+        """
+        if limited:
+            self.limiter.before_request(fn_name, max_wait=self.timeout)
+        try:
+            resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        except Exception as exc:
+            if limited:
+                self.limiter.on_failure()
+            raise _handle_request_errors(fn_name, exc)
+        if limited and resp.status_code == 429:
+            wait = self.limiter.on_throttled(parse_retry_after(resp.headers.get("Retry-After")))
+            raise RateLimitError(f"{fn_name}: API limitada (HTTP 429) - nova tentativa em {wait:.0f}s", wait)
+        try:
+            resp.raise_for_status()
+        except Exception as exc:
+            if limited:
+                if resp.status_code >= 500:
+                    self.limiter.on_failure()
+                else:
+                    self.limiter.on_success()
+            raise _handle_request_errors(fn_name, exc)
+        if limited:
+            self.limiter.on_success()
+        return resp
 
-    try:
-        resp = requests.get(endpoint, params=params, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as exc:
-        raise _handle_request_errors("get_coin_details", exc)
+    def _get_json(self, fn_name: str, url: str, params: Dict[str, Any], ttl: float, allow_stale: bool = True,
+                  stale: Optional[List[str]] = None) -> Any:
+        """
+        GET com cache: entrada fresca não vai à rede; expirada é revalidada (304) se possível.
+        Sem `allow_stale`, limite de taxa ou resposta ilegível viram erro em vez de devolver a
+        entrada expirada (quem grava o valor como preço do momento não pode receber um antigo).
+        Quando a entrada expirada é servida, a chave do cache vai para `stale` (se informado).
+        """
+        key = _cache_key(url, params)
+        entry = self.cache.lookup(key)
+        if entry is not None and entry.fresh():
+            return entry.value
+        headers = entry.validators() if entry is not None else None
+        try:
+            resp = self._get(fn_name, url, params, headers=headers or None)
+        except RateLimitError:
+            # circuito aberto / 429: serve o último valor conhecido, mesmo expirado
+            if entry is not None and allow_stale:
+                if stale is not None:
+                    stale.append(key)
+                return entry.value
+            raise
+        if resp.status_code == 304 and entry is not None:
+            self.cache.touch(key, ttl)
+            return entry.value
+        try:
+            value = resp.json()
+        except ValueError as exc:
+            # resposta 200 ilegível: mesmo fallback do limite de taxa
+            if entry is not None and allow_stale:
+                if stale is not None:
+                    stale.append(key)
+                return entry.value
+            raise _handle_request_errors(fn_name, exc)
+        self.cache.store(
+            key, value, ttl, len(resp.content),
+            etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"),
+        )
+        return value
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Contadores do cache (hits, misses, expired, revalidated, evictions, entries, bytes)."""
+        return self.cache.stats()
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Tokens disponíveis, requisições limitadas (429) e estado do circuit breaker."""
+        return self.limiter.stats()
+
+    def get_prices(self, coin_ids: List[str], vs_currencies: List[str], include_24hr_change: bool = True,
+                   allow_stale: bool = True, stale: Optional[set] = None) -> Dict[str, Any]:
+        """
+        Busca preços atuais e (opcional) variação 24h das moedas especificadas.
+
+        Args:
+            coin_ids: lista de IDs das moedas (ex: ['bitcoin','ethereum'])
+            vs_currencies: lista de fiats (ex: ['usd','brl'])
+            include_24hr_change: se inclui variação em 24h (bool)
+            allow_stale: se False, nunca devolve preços vencidos do cache (erro em vez disso)
+            stale: se informado, recebe os ids cujos preços vieram do cache vencido (não são
+                preços do momento: servem para a tela, não para o histórico)
+
+        Returns:
+            dict: dados no formato { coin_id: { 'usd': 123.4, 'brl': 567.8, 'usd_24h_change': 1.23 }, ... }
+
+        Listas que não cabem em uma URL são divididas em lotes paralelos; a latência de
+        cada lote fica em `last_chunk_timings`. Se só parte dos lotes falhar, retorna o
+        que foi obtido.
+
+        Raises:
+            Exception em caso de erro (mensagem legível).
+        """
+        url = f"{self.base_url}/simple/price"
+        base = {
+            "vs_currencies": ",".join(vs_currencies),
+            "include_24hr_change": str(include_24hr_change).lower(),
+        }
+        # listas grandes: lotes que cabem na URL, buscados em paralelo sob o mesmo limitador
+        budget = self.max_url_length - len(url) - len(urlencode(base)) - len("?&ids=")
+        chunks = chunk_ids(list(coin_ids), max(1, budget))
+        def _prices(chunk: List[str]) -> Dict[str, Any]:
+            hits: List[str] = []
+            data = self._get_json("get_prices", url, dict(base, ids=",".join(chunk)), CACHE_TTL_PRICES,
+                                  allow_stale, hits)
+            if hits and stale is not None:
+                stale.update(chunk)
+            return data
+
+        if len(chunks) <= 1:
+            return _prices(list(coin_ids))
+
+        def _fetch(chunk: List[str]):
+            start = time.perf_counter()
+            try:
+                data = _prices(chunk)
+                return data, None, {"coins": len(chunk), "ms": (time.perf_counter() - start) * 1000, "ok": True}
+            except Exception as exc:
+                return None, exc, {"coins": len(chunk), "ms": (time.perf_counter() - start) * 1000, "ok": False}
+
+        merged: Dict[str, Any] = {}
+        timings: List[Dict[str, Any]] = []
+        errors: List[Exception] = []
+        for data, exc, timing in self._pool().map(_fetch, chunks):
+            timings.append(timing)
+            if exc is not None:
+                errors.append(exc)
+            elif data:
+                merged.update(data)
+        self.last_chunk_timings = timings
+        if errors and len(errors) == len(chunks):
+            raise errors[0]
+        return merged
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="coingecko")
+            return self._executor
+
+    def get_coin_details(self, coin_id: str) -> Dict[str, Any]:
+        """
+        Busca detalhes da moeda (/coins/{id}) — inclui descrição, links, imagens e market_data.
+
+        Args:
+            coin_id: ID da moeda (ex: 'bitcoin')
+
+        Returns:
+            dict: JSON retornado pela API.
+
+        Raises:
+            Exception em caso de erro.
+        """
+        params = {
+            "localization": "false",
+            "tickers": "false",
+            "market_data": "true",
+            "community_data": "false",
+            "developer_data": "false",
+            "sparkline": "false",
+        }
+        return self._get_json("get_coin_details", f"{self.base_url}/coins/{coin_id}", params, CACHE_TTL_DETAILS)
+
+    def get_price_history(self, coin_id: str, vs_currency: str = "usd", days: int = 1) -> Dict[str, Any]:
+        """
+        Obtém histórico de preços do endpoint /coins/{id}/market_chart.
+
+        Args:
+            coin_id: ID da moeda (ex: 'bitcoin')
+            vs_currency: moeda fiat (ex: 'usd')
+            days: quantos dias de histórico (1, 7, 30, 'max' também funciona quando passado como str)
+
+        Returns:
+            dict: JSON com chaves como 'prices', 'market_caps', 'total_volumes'.
+                  Ex: { "prices": [[timestamp_ms, price], ...], ... }
+
+        Observação:
+            - 'days' aceita inteiros (1,7,30) ou a string 'max'. Aqui recebemos int; se quiser 'max',
+              chame a API diretamente (ou chame com days=36500 como workaround).
+        """
+        params = {"vs_currency": vs_currency, "days": str(days)}
+        url = f"{self.base_url}/coins/{coin_id}/market_chart"
+        return self._get_json("get_price_history", url, params, _history_ttl(days))
+
+    def get_price_history_range(self, coin_id: str, vs_currency: str, from_ms: int, to_ms: int) -> Dict[str, Any]:
+        """
+        Histórico entre dois instantes via /coins/{id}/market_chart/range.
+
+        A granularidade é escolhida pela API conforme a extensão da faixa:
+        até 1 dia → 5 minutos, até 90 dias → horária, acima disso → diária.
+        Mesmo formato de get_price_history ({"prices": [[ts_ms, preço], ...], ...}).
+        """
+        params = {"vs_currency": vs_currency, "from": str(from_ms // 1000), "to": str(-(-to_ms // 1000))}
+        url = f"{self.base_url}/coins/{coin_id}/market_chart/range"
+        days = (to_ms - from_ms) / 86_400_000
+        return self._get_json("get_price_history_range", url, params, _history_ttl(days))
+
+    def get_bytes(self, url: str) -> bytes:
+        """Baixa um recurso binário (ex.: logo da moeda) reutilizando a mesma sessão."""
+        # imagens vêm da CDN, fora do limite de taxa da API
+        return self._get("get_bytes", url, limited=False).content
+
+    def close(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.session.close()
+
+
+_default_client: Optional[CoinGeckoClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> CoinGeckoClient:
+    """Retorna o client padrão compartilhado (criado sob demanda)."""
+    global _default_client
+    with _client_lock:
+        if _default_client is None:
+            _default_client = CoinGeckoClient()
+        return _default_client
+
+
+def set_client(client: Optional[CoinGeckoClient]) -> None:
+    """Substitui o client padrão (ex.: apontar para outro servidor); None recria o padrão."""
+    global _default_client
+    with _client_lock:
+        old, _default_client = _default_client, client
+    if old is not None and old is not client:
+        old.close()
+
+
+# ---------- Fachadas (API antiga) ----------
+def get_prices(coin_ids: List[str], vs_currencies: List[str], include_24hr_change: bool = True,
+               allow_stale: bool = True, stale: Optional[set] = None) -> Dict[str, Any]:
+    """Busca preços atuais via client padrão (ver CoinGeckoClient.get_prices)."""
+    return get_client().get_prices(coin_ids, vs_currencies, include_24hr_change, allow_stale, stale)
+
+
+def get_coin_details(coin_id: str) -> Dict[str, Any]:
+    """Busca detalhes da moeda via client padrão (ver CoinGeckoClient.get_coin_details)."""
+    return get_client().get_coin_details(coin_id)
 
 
 def get_price_history(coin_id: str, vs_currency: str = "usd", days: int = 1) -> Dict[str, Any]:
-    """
-    Obtém histórico de preços do endpoint /coins/{id}/market_chart.
+    """Busca histórico /market_chart via client padrão (ver CoinGeckoClient.get_price_history)."""
+    return get_client().get_price_history(coin_id, vs_currency, days)
 
-    Args:
-        coin_id: ID da moeda (ex: 'bitcoin')
-        vs_currency: moeda fiat (ex: 'usd')
-        days: quantos dias de histórico (1, 7, 30, 'max' também funciona quando passado como str)
 
-    Returns:
-        dict: JSON com chaves como 'prices', 'market_caps', 'total_volumes'.
-              Ex: { "prices": [[timestamp_ms, price], ...], ... }
+def get_price_history_range(coin_id: str, vs_currency: str, from_ms: int, to_ms: int) -> Dict[str, Any]:
+    """Busca histórico /market_chart/range via client padrão (ver CoinGeckoClient.get_price_history_range)."""
+    return get_client().get_price_history_range(coin_id, vs_currency, from_ms, to_ms)
 
-    Observação:
-        - 'days' aceita inteiros (1,7,30) ou a string 'max'. Aqui recebemos int; se quiser 'max',
-          chame a API diretamente (ou chame com days=36500 como workaround).
-    """
-    endpoint = f"{API_BASE_URL}/coins/{coin_id}/market_chart"
-    params = {"vs_currency": vs_currency, "days": str(days)}
 
-    try:
-        resp = requests.get(endpoint, params=params, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as exc:
-        raise _handle_request_errors("get_price_history", exc)
+def get_bytes(url: str) -> bytes:
+    """Baixa um recurso binário via client padrão."""
+    return get_client().get_bytes(url)
+
+
+def cache_stats() -> Dict[str, int]:
+    """Contadores do cache de respostas do client padrão."""
+    return get_client().cache_stats()
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    """Métricas do limitador de taxa do client padrão."""
+    return get_client().rate_limit_stats()
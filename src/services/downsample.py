@@ -0,0 +1,81 @@
+"""
+Redução visual de séries longas antes de plotar.
+
+Uma linha com mais pontos do que colunas de pixel não mostra nada a mais: o
+matplotlib só gasta tempo empurrando todos eles pelo pipeline de desenho. As
+funções daqui reduzem (x, y) — x crescente — a um número de pontos proporcional
+à largura do canvas:
+
+- `minmax`: mínimo e máximo de cada coluna de pixel, em ordem de tempo. Preserva
+  todos os picos; o traçado fica igual ao da série completa.
+- `lttb`: Largest-Triangle-Three-Buckets, um ponto por bucket escolhido pela
+  maior área de triângulo com os vizinhos. Menos pontos, forma preservada.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+METHODS = ("minmax", "lttb")
+
+
+def _as_arrays(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    return np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+
+def minmax(x, y, columns: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Até 2 pontos (mín. e máx.) por coluna de `columns` colunas de largura igual em x."""
+    xs, ys = _as_arrays(x, y)
+    n = len(xs)
+    if columns <= 0 or n <= 2 * columns:
+        return np.asarray(x), np.asarray(y)
+    span = xs[-1] - xs[0]
+    if span <= 0:
+        return np.asarray(x)[[0, -1]], np.asarray(y)[[0, -1]]
+    col = np.minimum(((xs - xs[0]) * (columns / span)).astype(np.int64), columns - 1)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(col)) + 1))
+    seg = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    lo = np.minimum.reduceat(ys, starts)
+    hi = np.maximum.reduceat(ys, starts)
+    # primeira posição de cada segmento onde o valor é o mínimo/máximo do segmento
+    _, first_lo = np.unique(seg[ys == lo[seg]], return_index=True)
+    _, first_hi = np.unique(seg[ys == hi[seg]], return_index=True)
+    idx = np.union1d(np.flatnonzero(ys == lo[seg])[first_lo], np.flatnonzero(ys == hi[seg])[first_hi])
+    idx = np.union1d(idx, [0, n - 1])
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def lttb(x, y, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets: reduz para `points` pontos (primeiro e último sempre mantidos)."""
+    xs, ys = _as_arrays(x, y)
+    n = len(xs)
+    if points < 3 or n <= points:
+        return np.asarray(x), np.asarray(y)
+    # buckets internos de tamanho igual (em índices), como no algoritmo original
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # médias do bucket seguinte calculadas de uma vez (o laço só escolhe o ponto)
+    sums_x = np.add.reduceat(xs[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(ys[:n - 1], edges[:-1])
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, xs[-1])
+    avg_y = np.append(sums_y / counts, ys[-1])
+    idx = np.empty(points, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = xs[lo:hi], ys[lo:hi]
+        # área (x2) do triângulo (ponto anterior escolhido, candidato, média do próximo bucket)
+        area = np.abs((xs[a] - avg_x[i + 1]) * (by - ys[a]) - (xs[a] - bx) * (avg_y[i + 1] - ys[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def downsample(x, y, width: int, method: str = "minmax") -> Tuple[np.ndarray, np.ndarray]:
+    """Reduz a série para a largura `width` (pixels) do canvas com o método escolhido."""
+    if method == "lttb":
+        return lttb(x, y, max(3, 2 * width))
+    if method == "minmax":
+        return minmax(x, y, max(1, width))
+    raise ValueError(f"método de downsampling desconhecido: {method}")
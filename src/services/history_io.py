@@ -0,0 +1,243 @@
+"""
+Export/import em streaming do histórico completo de ticks.
+
+Formatos (escolhidos pela extensão no export e detectados no import):
+
+- NDJSON (`.ndjson` / `.jsonl`): um tick por linha,
+  {"coin": "bitcoin", "ts": 1700000000000, "usd": 37000.1, "brl": ...}
+- JSON em blocos (`.json`): um documento {"exported_at": ..., "format": ..., "ticks": [...]}
+  escrito e lido elemento a elemento, sem montar a lista na memória.
+
+Qualquer um dos dois pode vir comprimido com gzip (`.gz`; no import o gzip é
+detectado pelo cabeçalho). Os dois lados são geradores: a memória fica constante
+seja qual for o tamanho do arquivo. O import grava em lotes de `batch_size`
+(uma transação cada), ignora timestamps repetidos — no arquivo ou já gravados —
+e informa o progresso por callback.
+"""
+
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from src.services import persistence
+
+# (registros processados, fração concluída 0..1 ou None se desconhecida)
+ProgressCallback = Callable[[int, Optional[float]], None]
+
+FORMAT_TAG = "cryptodash-ticks/1"
+BATCH_SIZE = 5000
+_READ_CHUNK = 1 << 16
+_MAX_ELEMENT = 1 << 20  # um elemento maior que isso é arquivo corrompido, não um tick
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _format_for(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    return "ndjson" if name.endswith((".ndjson", ".jsonl")) else "json"
+
+
+def _open_text_reader(raw: IO[bytes]) -> IO[str]:
+    """Leitor de texto sobre `raw`, descomprimindo se o arquivo começar com o cabeçalho gzip."""
+    compressed = raw.read(2) == _GZIP_MAGIC
+    raw.seek(0)
+    stream = gzip.GzipFile(fileobj=raw, mode="rb") if compressed else raw
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+# ---------- Export ----------
+def export_ticks(
+    path: str,
+    coins: Optional[List[str]] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    fmt: Optional[str] = None,
+    compress: Optional[bool] = None,
+    progress: Optional[ProgressCallback] = None,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Exporta os ticks (de `coins`, ou de todas as moedas) para `path` e retorna quantos escreveu.
+    fmt: "ndjson" ou "json" (padrão: pela extensão); compress: gzip (padrão: se termina em .gz).
+    O arquivo é escrito em `path + ".tmp"` e renomeado no fim — nunca fica pela metade.
+    """
+    fmt = fmt or _format_for(path)
+    if fmt not in ("ndjson", "json"):
+        raise ValueError(f"formato de export desconhecido: {fmt}")
+    compress = path.endswith(".gz") if compress is None else compress
+    total = persistence.count_ticks(coins, start_ms, end_ms) if progress else 0
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    def write_batch(fh: IO[str], lines: List[str], written: int) -> None:
+        if fmt == "ndjson":
+            fh.write("\n".join(lines) + "\n")
+        else:
+            fh.write((",\n" if written else "") + ",\n".join(lines))
+
+    tmp = path + ".tmp"
+    count = 0
+    raw = open(tmp, "wb")
+    try:
+        stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) if compress else raw
+        with io.TextIOWrapper(stream, encoding="utf-8") as fh:
+            if fmt == "json":
+                header = {"exported_at": datetime.utcnow().isoformat(), "format": FORMAT_TAG}
+                fh.write(json.dumps(header)[:-1] + ', "ticks": [\n')
+            lines: List[str] = []
+            for coin, ts, payload in persistence.iter_ticks(coins, start_ms, end_ms, batch_size):
+                lines.append(json.dumps({"coin": coin, "ts": ts, **payload}, separators=(",", ":")))
+                if len(lines) >= batch_size:
+                    write_batch(fh, lines, count)
+                    count += len(lines)
+                    lines = []
+                    if progress:
+                        progress(count, count / total if total else None)
+            if lines:
+                write_batch(fh, lines, count)
+                count += len(lines)
+            if fmt == "json":
+                fh.write("\n]}\n")
+    except BaseException:
+        raw.close()
+        os.remove(tmp)
+        raise
+    raw.close()
+    os.replace(tmp, path)
+    if progress:
+        progress(count, 1.0)
+    return count
+
+
+# ---------- Import ----------
+def iter_ndjson(fh: IO[str]) -> Iterator[Any]:
+    """Objetos de um NDJSON, linha a linha (linhas vazias ignoradas; inválidas viram None)."""
+    for line in fh:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def iter_json_array(fh: IO[str], key: str = "ticks") -> Iterator[Any]:
+    """
+    Elementos da lista `key` de um documento JSON, lidos em blocos de texto com raw_decode.
+    Só o elemento corrente (mais um bloco de leitura) fica na memória.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    marker = f'"{key}"'
+    while True:
+        found = buf.find(marker)
+        bracket = buf.find("[", found) if found >= 0 else -1
+        if bracket >= 0:
+            buf, pos = buf[bracket + 1:], 0
+            break
+        chunk = fh.read(_READ_CHUNK)
+        if not chunk:
+            raise ValueError(f"lista '{key}' não encontrada no arquivo")
+        buf = buf[-len(marker):] + chunk if found < 0 else buf + chunk
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            # elemento incompleto: lê mais um bloco e tenta de novo
+            chunk = fh.read(_READ_CHUNK)
+            if not chunk or len(buf) - pos > _MAX_ELEMENT:
+                raise ValueError(f"JSON truncado ou inválido na lista '{key}'")
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield obj
+        pos = end
+        if pos > _READ_CHUNK:
+            buf, pos = buf[pos:], 0
+
+
+def _to_tick(obj: Any) -> Optional[Tuple[str, int, dict]]:
+    if not isinstance(obj, dict) or not obj.get("coin"):
+        return None
+    ts = persistence.parse_ts(obj.get("ts", obj.get("timestamp")))
+    if ts is None:
+        return None
+    payload = obj.get("data") if isinstance(obj.get("data"), dict) else obj
+    values = {col: payload[col] for col in persistence.TICK_COLUMNS if payload.get(col) is not None}
+    return (str(obj["coin"]), ts, values) if values else None
+
+
+def _records(raw: IO[bytes]) -> Iterator[Any]:
+    """Detecta o formato pela primeira linha (NDJSON tem um tick completo nela) e itera os registros."""
+    fh = _open_text_reader(raw)
+    first = fh.readline()
+    try:
+        first_obj = json.loads(first)
+    except ValueError:
+        first_obj = None
+    if isinstance(first_obj, dict) and "coin" in first_obj:
+        yield first_obj
+        yield from iter_ndjson(fh)
+        return
+    fh.detach()  # solta `raw` sem fechá-lo (o wrapper descartado fecharia no GC)
+    raw.seek(0)
+    yield from iter_json_array(_open_text_reader(raw))
+
+
+def import_ticks(path: str, batch_size: int = BATCH_SIZE,
+                 progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    Importa um arquivo gerado por export_ticks (NDJSON ou JSON, com ou sem gzip).
+    Retorna {"read", "imported", "duplicates", "invalid"}.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+    total_bytes = os.path.getsize(path) or 1
+    batch: Dict[Tuple[str, int], dict] = {}
+    with open(path, "rb") as raw:
+        for obj in _records(raw):
+            stats["read"] += 1
+            tick = _to_tick(obj)
+            if tick is None:
+                stats["invalid"] += 1
+                continue
+            coin, ts, values = tick
+            if (coin, ts) in batch:
+                stats["duplicates"] += 1
+                continue
+            batch[(coin, ts)] = values
+            if len(batch) >= batch_size:
+                _flush(batch, stats)
+                batch = {}
+                if progress:
+                    progress(stats["read"], min(1.0, raw.tell() / total_bytes))
+        if batch:
+            _flush(batch, stats)
+    if progress:
+        progress(stats["read"], 1.0)
+    return stats
+
+
+def _flush(batch: Dict[Tuple[str, int], dict], stats: Dict[str, int]) -> None:
+    """Grava um lote (uma transação), pulando timestamps que já existem no banco."""
+    by_coin: Dict[str, List[int]] = {}
+    for coin, ts in batch:
+        by_coin.setdefault(coin, []).append(ts)
+    rows = []
+    for coin, times in by_coin.items():
+        existing = persistence.existing_tick_times(coin, times)
+        for ts in times:
+            if ts in existing:
+                stats["duplicates"] += 1
+            else:
+                rows.append((coin, ts, batch[(coin, ts)]))
+    stats["imported"] += persistence.save_ticks(rows)
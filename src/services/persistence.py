@@ -1,9 +1,14 @@
-# src/services/persistence.py
 import os
+import queue
 import sqlite3
 import json
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Iterator, Iterable, Tuple
+from datetime import datetime, timezone
+
+from src.services.candles import TIMEFRAME_MS
 
 # Caminho do banco SQLite
 DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "cryptodash.db"))
@@ -11,97 +16,760 @@ DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data",
 # Caminho do snapshot JSON
 DEFAULT_JSON_SNAPSHOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "prices.json"))
 
+# Quantidade máxima de conexões abertas simultaneamente no pool
+POOL_SIZE = 4
 
-# ---------- Inicialização do banco ----------
-def init_db() -> None:
-    """Cria o banco de dados e as tabelas (prices, settings) se não existirem."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    # tabela prices
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS prices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            coin TEXT NOT NULL,
-            data TEXT NOT NULL,
-            timestamp TEXT NOT NULL
+# PRAGMAs aplicados em toda conexão nova (WAL permite leitura concorrente com escrita).
+# auto_vacuum precisa vir antes do WAL para valer em bancos novos; bancos antigos são
+# convertidos na partida por retention.convert_to_incremental (VACUUM completo).
+_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Colunas numéricas de cada tick (preço por fiat + variação 24h)
+TICK_COLUMNS = ("usd", "brl", "usd_24h_change", "brl_24h_change")
+
+# Linhas migradas por transação da tabela antiga `prices` para `ticks`
+MIGRATION_BATCH_SIZE = 5000
+
+# Linhas mais antigas consultadas por load_price para completar colunas ausentes no último tick
+LATEST_FILL_ROWS = 5000
+
+# Fiats com candles pré-agregados (tabela `candles`, um conjunto por timeframe de TIMEFRAME_MS)
+ROLLUP_FIATS = ("usd",)
+
+_SCHEMA = (
+    # ts = epoch em milissegundos (UTC); a PK (coin, ts) é o índice das consultas
+    f"""
+    CREATE TABLE IF NOT EXISTS ticks (
+        coin TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        {", ".join(f"{col} REAL" for col in TICK_COLUMNS)},
+        PRIMARY KEY (coin, ts)
+    ) WITHOUT ROWID
+    """,
+    # candles OHLC materializados por timeframe; open_ts/close_ts permitem ticks fora de ordem
+    """
+    CREATE TABLE IF NOT EXISTS candles (
+        coin TEXT NOT NULL,
+        fiat TEXT NOT NULL,
+        tf TEXT NOT NULL,
+        start INTEGER NOT NULL,
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        open_ts INTEGER NOT NULL,
+        close_ts INTEGER NOT NULL,
+        PRIMARY KEY (coin, fiat, tf, start)
+    ) WITHOUT ROWID
+    """,
+    # intervalos já buscados no backfill (/market_chart/range), por granularidade `step` em ms
+    """
+    CREATE TABLE IF NOT EXISTS coverage (
+        coin TEXT NOT NULL,
+        fiat TEXT NOT NULL,
+        step INTEGER NOT NULL,
+        start_ts INTEGER NOT NULL,
+        end_ts INTEGER NOT NULL,
+        PRIMARY KEY (coin, fiat, step, start_ts)
+    ) WITHOUT ROWID
+    """,
+    # cache de recursos da API (services/asset_store.py): chave -> blob sha256 em data/assets/
+    """
+    CREATE TABLE IF NOT EXISTS assets (
+        key TEXT PRIMARY KEY,
+        digest TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        fetched_at INTEGER NOT NULL,
+        expires_at INTEGER NOT NULL,
+        accessed_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_assets_digest ON assets (digest)",
+    # até onde a compactação de ticks (services/retention.py) já passou, por moeda;
+    # save_ticks recua o valor quando grava ticks mais antigos (backfill, import)
+    """
+    CREATE TABLE IF NOT EXISTS compaction (
+        coin TEXT PRIMARY KEY,
+        until INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+)
+
+
+# ---------- Engine (pool de conexões) ----------
+class PersistenceEngine:
+    """
+    Mantém um pool pequeno de conexões SQLite de longa duração.
+
+    Cada conexão é emprestada a uma thread por vez (``with engine.connection()``),
+    então threads de refresh e o loop do Tk podem gravar sem abrir/fechar o banco
+    a cada chamada. O schema é criado uma única vez por processo.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.RLock()
+        self._schema_ready = False
+        self._closed = False
+        self._migration_lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("PersistenceEngine já foi fechado")
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                conn = self._open()
+                self._created += 1
+                return conn
+        # pool cheio: espera uma conexão ser devolvida
+        return self._pool.get()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão do pool (com o schema garantido)."""
+        conn = self._acquire()
+        try:
+            if not self._schema_ready:
+                self.ensure_schema(conn)
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão e faz commit ao final (rollback em caso de erro)."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def ensure_schema(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """Cria as tabelas uma única vez por processo."""
+        if self._schema_ready:
+            return
+        with self._lock:
+            if self._schema_ready:
+                return
+            if conn is None:
+                with self.connection() as own:
+                    self._create_schema(own)
+            else:
+                self._create_schema(conn)
+            self._schema_ready = True
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            for ddl in _SCHEMA:
+                conn.execute(ddl)
+        legacy = _table_exists(conn, "prices")
+        missing_rollups = (
+            conn.execute("SELECT 1 FROM candles LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM ticks LIMIT 1").fetchone() is not None
         )
+        if legacy or missing_rollups:
+            # banco de versão anterior: migra/reconstrói em segundo plano
+            threading.Thread(target=self._upgrade, args=(legacy,), daemon=True).start()
+
+    def _upgrade(self, legacy: bool) -> None:
+        if legacy:
+            self.migrate_legacy_prices()
+        if not self._closed:
+            rebuild_candles()
+
+    def migrate_legacy_prices(self, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
         """
-    )
-    # tabela settings key/value
-    cur.execute(
+        Copia a tabela antiga `prices` (JSON + timestamp texto) para `ticks`.
+
+        A migração é online: cada lote é inserido e removido de `prices` na mesma
+        transação, começando pelos registros mais recentes, então o app continua
+        lendo/gravando normalmente e um encerramento no meio não perde nada.
+        Ao final a tabela antiga é removida. Retorna o total de linhas migradas.
         """
-        CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT
+        migrated = 0
+        with self._migration_lock:
+            while not self._closed:
+                count = self._migrate_batch(batch_size)
+                if count is None:
+                    break
+                migrated += count
+        return migrated
+
+    def _migrate_batch(self, batch_size: int) -> Optional[int]:
+        """Migra um lote; retorna None quando não há mais nada a migrar."""
+        cols = ", ".join(TICK_COLUMNS)
+        extracts = ", ".join(
+            f"CASE WHEN json_valid(data) THEN json_extract(data, '$.{col}') END" for col in TICK_COLUMNS
         )
-        """
-    )
-    conn.commit()
-    conn.close()
+        with self.transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if not _table_exists(conn, "prices"):
+                return None
+            (max_id,) = conn.execute("SELECT MAX(id) FROM prices").fetchone()
+            if max_id is None:
+                conn.execute("DROP TABLE prices")
+                return None
+            low = max_id - batch_size + 1
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO ticks (coin, ts, {cols})
+                SELECT coin, CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER), {extracts}
+                FROM prices
+                WHERE id >= ? AND julianday(timestamp) IS NOT NULL
+                """,
+                (low,),
+            )
+            return conn.execute("DELETE FROM prices WHERE id >= ?", (low,)).rowcount
+
+    def close(self) -> None:
+        """Fecha as conexões ociosas; as emprestadas são fechadas ao serem devolvidas."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+_engine: Optional[PersistenceEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> PersistenceEngine:
+    """Retorna o engine compartilhado do processo (recriado se DB_PATH mudar)."""
+    global _engine
+    engine = _engine
+    if engine is not None and engine.db_path == DB_PATH:
+        return engine
+    with _engine_lock:
+        if _engine is None or _engine.db_path != DB_PATH:
+            if _engine is not None:
+                _engine.close()
+            _engine = PersistenceEngine(DB_PATH)
+        return _engine
+
+
+def close_db() -> None:
+    """Fecha as conexões do engine compartilhado (ex.: ao sair da aplicação)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
+
+
+# ---------- Inicialização do banco ----------
+def init_db() -> None:
+    """
+    Cria o banco de dados e as tabelas (ticks, candles, coverage, assets, settings) se não existirem.
+    Opcional: a primeira conexão do engine já garante o schema (importar o módulo não abre o banco).
+    """
+    get_engine().ensure_schema()
+
+
+# ---------- Helpers de timestamp / linhas ----------
+def now_ms() -> int:
+    """Epoch atual (UTC) em milissegundos."""
+    return int(time.time() * 1000)
+
+
+def ms_to_str(ts: int) -> str:
+    """Converte epoch ms para 'YYYY-MM-DD HH:MM:SS' (UTC), formato usado pelas telas."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts / 1000))
+
+
+def parse_ts(value: Any) -> Optional[int]:
+    """
+    Converte um timestamp para epoch ms.
+    Aceita int/float (ms) ou string ISO / 'YYYY-MM-DD HH:MM:SS' (assumida UTC).
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _payload_values(payload: dict) -> tuple:
+    values = []
+    for col in TICK_COLUMNS:
+        try:
+            values.append(float(payload[col]) if payload.get(col) is not None else None)
+        except (TypeError, ValueError):
+            values.append(None)
+    return tuple(values)
+
+
+def _row_to_record(row: tuple) -> Dict[str, Any]:
+    ts = row[0]
+    data = {col: val for col, val in zip(TICK_COLUMNS, row[1:]) if val is not None}
+    return {"data": data, "timestamp": ms_to_str(ts), "ts": ts}
+
+
+_TICK_SELECT = f"SELECT ts, {', '.join(TICK_COLUMNS)} FROM ticks"
+_TICK_INSERT = (
+    f"INSERT OR REPLACE INTO ticks (coin, ts, {', '.join(TICK_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in TICK_COLUMNS)})"
+)
+# mesma inserção, mas um tick que já existe só recebe as colunas não nulas (ex.: backfill só de usd)
+_TICK_MERGE = (
+    f"INSERT INTO ticks (coin, ts, {', '.join(TICK_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in TICK_COLUMNS)}) "
+    f"ON CONFLICT (coin, ts) DO UPDATE SET "
+    + ", ".join(f"{col} = COALESCE(excluded.{col}, ticks.{col})" for col in TICK_COLUMNS)
+)
 
 
 # ---------- Funções SQLite ----------
-def save_price(coin: str, payload: dict) -> None:
+def save_price(coin: str, payload: dict, ts: Optional[int] = None) -> None:
     """
     Salva o preço de uma moeda no banco SQLite.
-    O timestamp é salvo no formato 'YYYY-MM-DD HH:MM:SS' (com segundos).
+    O timestamp é salvo em epoch ms (UTC); por padrão, o instante atual.
     """
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO prices (coin, data, timestamp) VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%S', 'now'))",
-        (coin, json.dumps(payload, ensure_ascii=False)),
-    )
-    conn.commit()
-    conn.close()
+    save_prices_bulk({coin: payload}, ts=ts)
+
+
+def save_prices_bulk(prices: Dict[str, dict], ts: Optional[int] = None) -> int:
+    """
+    Salva vários preços (formato de get_prices: {coin: payload}) em uma única transação.
+    Todos recebem o mesmo timestamp (padrão: instante atual). Retorna quantas linhas gravou.
+    """
+    ts = now_ms() if ts is None else ts
+    return save_ticks((coin, ts, payload) for coin, payload in prices.items())
+
+
+def save_ticks(rows: Iterable[Tuple[str, int, dict]], merge: bool = False) -> int:
+    """
+    Grava ticks (coin, ts_ms, payload) com executemany em uma única transação.
+    Com `merge`, um tick já gravado mantém as colunas que o payload não traz.
+    Retorna quantas linhas foram gravadas.
+    """
+    params = [(coin, ts) + _payload_values(payload or {}) for coin, ts, payload in rows]
+    if not params:
+        return 0
+    rollups = _rollup(params)
+    oldest: Dict[str, int] = {}
+    for coin, ts, *_ in params:
+        if ts < oldest.get(coin, ts + 1):
+            oldest[coin] = ts
+    with get_engine().transaction() as conn:
+        conn.executemany(_TICK_MERGE if merge else _TICK_INSERT, params)
+        conn.executemany(_CANDLE_UPSERT, rollups)
+        # ticks abaixo da marca da compactação: a próxima rodada volta até eles
+        conn.executemany(
+            "UPDATE compaction SET until = ? WHERE coin = ? AND until > ?",
+            [(ts, coin, ts) for coin, ts in oldest.items()],
+        )
+    return len(params)
+
+
+# ---------- Candles pré-agregados ----------
+_CANDLE_UPSERT = """
+    INSERT INTO candles (coin, fiat, tf, start, open, high, low, close, open_ts, close_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (coin, fiat, tf, start) DO UPDATE SET
+        open = CASE WHEN excluded.open_ts < candles.open_ts THEN excluded.open ELSE candles.open END,
+        open_ts = MIN(candles.open_ts, excluded.open_ts),
+        high = MAX(candles.high, excluded.high),
+        low = MIN(candles.low, excluded.low),
+        close = CASE WHEN excluded.close_ts >= candles.close_ts THEN excluded.close ELSE candles.close END,
+        close_ts = MAX(candles.close_ts, excluded.close_ts)
+"""
+
+
+def _rollup(params: List[tuple]) -> List[tuple]:
+    """Agrega as linhas de um lote em candles parciais (um upsert por bucket, não por tick)."""
+    buckets: Dict[tuple, list] = {}
+    for fiat in ROLLUP_FIATS:
+        col = TICK_COLUMNS.index(fiat) + 2
+        for row in params:
+            price = row[col]
+            if price is None:
+                continue
+            coin, ts = row[0], row[1]
+            for tf, tf_ms in TIMEFRAME_MS.items():
+                key = (coin, fiat, tf, ts - ts % tf_ms)
+                c = buckets.get(key)
+                if c is None:
+                    buckets[key] = [price, price, price, price, ts, ts]
+                    continue
+                if ts < c[4]:
+                    c[0], c[4] = price, ts
+                if price > c[1]:
+                    c[1] = price
+                if price < c[2]:
+                    c[2] = price
+                if ts >= c[5]:
+                    c[3], c[5] = price, ts
+    return [key + tuple(c) for key, c in buckets.items()]
+
+
+def rebuild_candles(coin: Optional[str] = None) -> int:
+    """
+    Recalcula a tabela `candles` a partir dos ticks brutos (todas as moedas ou só `coin`).
+    Roda uma transação curta por (moeda, fiat, timeframe). Retorna quantos candles gravou.
+    """
+    engine = get_engine()
+    with engine.connection() as conn:
+        if coin is None:
+            coins = [row[0] for row in conn.execute("SELECT DISTINCT coin FROM ticks").fetchall()]
+        else:
+            coins = [coin]
+    total = 0
+    for c in coins:
+        for fiat in ROLLUP_FIATS:
+            for tf, tf_ms in TIMEFRAME_MS.items():
+                with engine.transaction() as conn:
+                    conn.execute("DELETE FROM candles WHERE coin = ? AND fiat = ? AND tf = ?", (c, fiat, tf))
+                    total += conn.execute(
+                        f"""
+                        INSERT INTO candles (coin, fiat, tf, start, open, high, low, close, open_ts, close_ts)
+                        SELECT g.coin, ?, ?, g.bucket,
+                               (SELECT {fiat} FROM ticks WHERE coin = g.coin AND ts = g.open_ts),
+                               g.high, g.low,
+                               (SELECT {fiat} FROM ticks WHERE coin = g.coin AND ts = g.close_ts),
+                               g.open_ts, g.close_ts
+                        FROM (
+                            SELECT coin, ts - ts % ? AS bucket, MIN(ts) AS open_ts, MAX(ts) AS close_ts,
+                                   MAX({fiat}) AS high, MIN({fiat}) AS low
+                            FROM ticks
+                            WHERE coin = ? AND {fiat} IS NOT NULL
+                            GROUP BY bucket
+                        ) AS g
+                        """,
+                        (fiat, tf, tf_ms, c),
+                    ).rowcount
+    return total
+
+
+def load_candles(
+    coin: str,
+    timeframe: str,
+    fiat: str = "usd",
+    limit: int = 1000,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+):
+    """
+    Lê os `limit` candles mais recentes de (coin, fiat, timeframe) direto da tabela de rollup.
+    Retorna arrays NumPy (start_ms, open, high, low, close) em ordem crescente.
+    """
+    import numpy as np
+
+    start = start_ms if start_ms is not None else -(2 ** 63)
+    end = end_ms if end_ms is not None else 2 ** 63 - 1
+    with get_engine().connection() as conn:
+        rows = conn.execute(
+            "SELECT start, open, high, low, close FROM candles "
+            "WHERE coin = ? AND fiat = ? AND tf = ? AND start BETWEEN ? AND ? "
+            "ORDER BY start DESC LIMIT ?",
+            (coin, fiat, timeframe, start, end, limit),
+        ).fetchall()
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return (np.empty(0, dtype=np.int64), empty, empty, empty, empty)
+    data = np.array(rows, dtype=np.float64)[::-1]
+    return (data[:, 0].astype(np.int64),) + tuple(np.ascontiguousarray(data[:, i]) for i in range(1, 5))
+
+
+# ---------- Cobertura do backfill ----------
+def load_tick_buckets(coin: str, bucket_ms: int, start_ms: int, end_ms: int, fiat: str = "usd") -> List[int]:
+    """
+    Índices (ts // bucket_ms) dos buckets da janela que têm ao menos um tick com preço em `fiat`,
+    em ordem crescente. Devolve no máximo uma linha por bucket, seja qual for a densidade dos ticks.
+    """
+    if fiat not in TICK_COLUMNS:
+        raise ValueError(f"fiat não suportado: {fiat}")
+    with get_engine().connection() as conn:
+        rows = conn.execute(
+            f"SELECT DISTINCT ts / ? FROM ticks WHERE coin = ? AND ts BETWEEN ? AND ? AND {fiat} IS NOT NULL "
+            "ORDER BY 1",
+            (bucket_ms, coin, start_ms, end_ms),
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def load_coverage(coin: str, fiat: str, max_step: int, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+    """Intervalos (início, fim) já buscados com granularidade <= max_step que tocam a janela."""
+    with get_engine().connection() as conn:
+        rows = conn.execute(
+            "SELECT start_ts, end_ts FROM coverage "
+            "WHERE coin = ? AND fiat = ? AND step <= ? AND start_ts <= ? AND end_ts >= ? ORDER BY start_ts",
+            (coin, fiat, max_step, end_ms, start_ms),
+        ).fetchall()
+    return [(row[0], row[1]) for row in rows]
+
+
+def add_coverage(coin: str, fiat: str, step: int, start_ms: int, end_ms: int) -> None:
+    """Registra [start_ms, end_ms] como coberto, fundindo com intervalos sobrepostos/adjacentes do mesmo step."""
+    with get_engine().transaction() as conn:
+        rows = conn.execute(
+            "SELECT start_ts, end_ts FROM coverage "
+            "WHERE coin = ? AND fiat = ? AND step = ? AND start_ts <= ? AND end_ts >= ?",
+            (coin, fiat, step, end_ms, start_ms),
+        ).fetchall()
+        for row_start, row_end in rows:
+            start_ms, end_ms = min(start_ms, row_start), max(end_ms, row_end)
+        conn.executemany(
+            "DELETE FROM coverage WHERE coin = ? AND fiat = ? AND step = ? AND start_ts = ?",
+            [(coin, fiat, step, row[0]) for row in rows],
+        )
+        conn.execute(
+            "INSERT INTO coverage (coin, fiat, step, start_ts, end_ts) VALUES (?, ?, ?, ?, ?)",
+            (coin, fiat, step, start_ms, end_ms),
+        )
 
 
 def load_price(coin: str) -> Optional[dict]:
     """
     Carrega o último preço de uma moeda no banco SQLite.
-    Retorna {'data': dict, 'timestamp': str} ou None se não existir.
+    Colunas que faltam no tick mais recente (ex.: backfill só de usd) vêm do tick
+    mais novo que as tenha, olhando no máximo LATEST_FILL_ROWS linhas para trás.
+    Retorna {'data': dict, 'timestamp': str, 'ts': int} ou None se não existir.
     """
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT data, timestamp FROM prices WHERE coin = ? ORDER BY timestamp DESC LIMIT 1",
-        (coin,),
-    )
-    row = cur.fetchone()
-    conn.close()
-    if row:
-        try:
-            return {"data": json.loads(row[0]), "timestamp": row[1]}
-        except Exception:
-            return {"data": {}, "timestamp": row[1]}
-    return None
+    with get_engine().connection() as conn:
+        cursor = conn.execute(f"{_TICK_SELECT} WHERE coin = ? ORDER BY ts DESC LIMIT ?", (coin, LATEST_FILL_ROWS))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        record = _row_to_record(row)
+        data = record["data"]
+        while len(data) < len(TICK_COLUMNS):
+            rows = cursor.fetchmany(100)
+            if not rows:
+                break
+            for older in rows:
+                for col, val in zip(TICK_COLUMNS, older[1:]):
+                    if val is not None and col not in data:
+                        data[col] = val
+    return record
 
 
-def get_price_history(coin: str, limit: int = 100) -> List[Dict[str, Any]]:
+def get_price_history(
+    coin: str,
+    limit: int = 100,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
     Retorna uma lista de registros históricos para a moeda (mais recentes primeiro).
-    Cada item: {'data': dict, 'timestamp': str}
+    Cada item: {'data': dict, 'timestamp': str, 'ts': int}
+    start_ms/end_ms (epoch ms, inclusivos) restringem a janela via índice (coin, ts).
     """
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT data, timestamp FROM prices WHERE coin = ? ORDER BY timestamp DESC LIMIT ?",
-        (coin, limit),
-    )
-    rows = cur.fetchall()
-    conn.close()
-    history = []
-    for row in rows:
-        try:
-            history.append({"data": json.loads(row[0]), "timestamp": row[1]})
-        except Exception:
-            history.append({"data": {}, "timestamp": row[1]})
-    return history
+    start = start_ms if start_ms is not None else -(2 ** 63)
+    end = end_ms if end_ms is not None else 2 ** 63 - 1
+    with get_engine().connection() as conn:
+        rows = conn.execute(
+            f"{_TICK_SELECT} WHERE coin = ? AND ts BETWEEN ? AND ? ORDER BY ts DESC LIMIT ?",
+            (coin, start, end, limit),
+        ).fetchall()
+    return [_row_to_record(row) for row in rows]
+
+
+# ---------- Leitura em streaming (export) ----------
+def list_tick_coins() -> List[str]:
+    """Moedas com ao menos um tick gravado."""
+    with get_engine().connection() as conn:
+        return [row[0] for row in conn.execute("SELECT DISTINCT coin FROM ticks ORDER BY coin").fetchall()]
+
+
+def count_ticks(coins: Optional[List[str]] = None, start_ms: Optional[int] = None,
+                end_ms: Optional[int] = None) -> int:
+    """Quantidade de ticks (das moedas `coins`, ou de todas) na janela."""
+    start = start_ms if start_ms is not None else -(2 ** 63)
+    end = end_ms if end_ms is not None else 2 ** 63 - 1
+    with get_engine().connection() as conn:
+        if coins is None:
+            return conn.execute("SELECT COUNT(*) FROM ticks WHERE ts BETWEEN ? AND ?", (start, end)).fetchone()[0]
+        return sum(
+            conn.execute("SELECT COUNT(*) FROM ticks WHERE coin = ? AND ts BETWEEN ? AND ?",
+                         (coin, start, end)).fetchone()[0]
+            for coin in coins
+        )
+
+
+def iter_ticks(
+    coins: Optional[List[str]] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    batch_size: int = 5000,
+) -> Iterator[Tuple[str, int, Dict[str, float]]]:
+    """
+    Percorre os ticks (coin, ts_ms, payload) em ordem de moeda e ts, em páginas de `batch_size`
+    pela chave (coin, ts). Memória constante e nenhuma leitura longa segurando o banco.
+    """
+    end = end_ms if end_ms is not None else 2 ** 63 - 1
+    for coin in (list_tick_coins() if coins is None else coins):
+        lower, op = (start_ms if start_ms is not None else -(2 ** 63)), ">="
+        while True:
+            with get_engine().connection() as conn:
+                rows = conn.execute(
+                    f"{_TICK_SELECT} WHERE coin = ? AND ts {op} ? AND ts <= ? ORDER BY ts LIMIT ?",
+                    (coin, lower, end, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield coin, row[0], {col: val for col, val in zip(TICK_COLUMNS, row[1:]) if val is not None}
+            if len(rows) < batch_size:
+                break
+            lower, op = rows[-1][0], ">"
+
+
+def existing_tick_times(coin: str, times: Iterable[int], chunk: int = 500) -> set:
+    """
+    Quais dos timestamps `times` de `coin` já estão gravados (deduplicação de imports).
+    Consulta só as chaves pedidas, em blocos de `chunk` parâmetros: a memória
+    acompanha o tamanho do lote, não o intervalo de tempo que ele cobre.
+    """
+    times = list(times)
+    found = set()
+    with get_engine().connection() as conn:
+        for i in range(0, len(times), chunk):
+            part = times[i:i + chunk]
+            rows = conn.execute(
+                f"SELECT ts FROM ticks WHERE coin = ? AND ts IN ({', '.join('?' for _ in part)})",
+                (coin, *part),
+            ).fetchall()
+            found.update(row[0] for row in rows)
+    return found
+
+
+# ---------- Leitura vetorizada (gráficos) ----------
+def load_price_arrays(
+    coin: str,
+    fiat: str = "usd",
+    limit: int = 5000,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+):
+    """
+    Retorna (ts_ms, preços) como arrays NumPy (int64, float64) em ordem crescente de ts,
+    com os `limit` ticks mais recentes que têm preço em `fiat`. Sem json.loads por linha.
+    """
+    import numpy as np
+
+    if fiat not in TICK_COLUMNS:
+        raise ValueError(f"fiat não suportado: {fiat}")
+    start = start_ms if start_ms is not None else -(2 ** 63)
+    end = end_ms if end_ms is not None else 2 ** 63 - 1
+    with get_engine().connection() as conn:
+        rows = conn.execute(
+            f"SELECT ts, {fiat} FROM ticks WHERE coin = ? AND ts BETWEEN ? AND ? AND {fiat} IS NOT NULL "
+            "ORDER BY ts DESC LIMIT ?",
+            (coin, start, end, limit),
+        ).fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    data = np.array(rows, dtype=np.float64)[::-1]
+    return data[:, 0].astype(np.int64), np.ascontiguousarray(data[:, 1])
+
+
+def load_price_buckets(coin: str, buckets: int, fiat: str = "usd"):
+    """
+    Histórico completo de `coin` reduzido no SQLite: o intervalo de ts é dividido em
+    `buckets` faixas iguais e cada uma devolve só o tick de menor e o de maior preço
+    (colunas "soltas" junto de MIN/MAX do SQLite trazem o ts da linha escolhida), mais
+    o primeiro e o último tick. Retorna (total de ticks, ts_ms, preços), com no máximo
+    2 * buckets + 2 pontos em ordem de ts: memória e trabalho em Python não crescem com o tamanho do histórico.
+    """
+    import numpy as np
+
+    if fiat not in TICK_COLUMNS:
+        raise ValueError(f"fiat não suportado: {fiat}")
+    empty = (0, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    with get_engine().connection() as conn:
+        first, last = conn.execute(
+            f"SELECT MIN(ts), MAX(ts) FROM ticks WHERE coin = ? AND {fiat} IS NOT NULL", (coin,)
+        ).fetchone()
+        if first is None:
+            return empty
+        ends = conn.execute(
+            f"SELECT ts, {fiat} FROM ticks WHERE coin = ? AND ts IN (?, ?)", (coin, first, last)
+        ).fetchall()
+        width = max(1, -(-(last - first + 1) // max(1, buckets)))
+        params = (first, width, coin)
+        lows = conn.execute(
+            f"SELECT (ts - ?) / ?, ts, MIN({fiat}), COUNT(*) FROM ticks "
+            f"WHERE coin = ? AND {fiat} IS NOT NULL GROUP BY 1",
+            params,
+        ).fetchall()
+        highs = conn.execute(
+            f"SELECT (ts - ?) / ?, ts, MAX({fiat}) FROM ticks WHERE coin = ? AND {fiat} IS NOT NULL GROUP BY 1",
+            params,
+        ).fetchall()
+    total = sum(row[3] for row in lows)
+    points = dict(ends)
+    points.update((row[1], row[2]) for row in lows)
+    points.update((row[1], row[2]) for row in highs)
+    ts = np.fromiter(sorted(points), dtype=np.int64, count=len(points))
+    prices = np.array([points[t] for t in ts.tolist()], dtype=np.float64)
+    return total, ts, prices
+
+
+def load_price_frame(
+    coin: str,
+    fiat: str = "usd",
+    limit: int = 5000,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+):
+    """
+    Histórico de preços como DataFrame pandas (índice datetime UTC 'dt', coluna 'price'),
+    ordenado e sem timestamps duplicados. Timestamps convertidos de uma vez só.
+    """
+    import pandas as pd
+
+    ts, prices = load_price_arrays(coin, fiat=fiat, limit=limit, start_ms=start_ms, end_ms=end_ms)
+    if not len(ts):
+        return pd.DataFrame()
+    index = pd.to_datetime(ts, unit="ms")
+    index.name = "dt"
+    return pd.DataFrame({"price": prices}, index=index)
 
 
 # ---------- Funções de settings (key/value) ----------
@@ -110,35 +778,23 @@ def save_setting(key: str, value: str) -> None:
     Salva ou atualiza uma configuração simples no DB.
     Value deve ser string.
     """
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-    conn.commit()
-    conn.close()
+    with get_engine().transaction() as conn:
+        conn.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
 
 
 def load_setting(key: str) -> Optional[str]:
     """
     Carrega uma configuração. Retorna string ou None se não existir.
     """
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT value FROM settings WHERE key = ?", (key,))
-    row = cur.fetchone()
-    conn.close()
+    with get_engine().connection() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
     return row[0] if row else None
 
 
 def delete_setting(key: str) -> None:
     """Remove uma configuração do DB."""
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM settings WHERE key = ?", (key,))
-    conn.commit()
-    conn.close()
+    with get_engine().transaction() as conn:
+        conn.execute("DELETE FROM settings WHERE key = ?", (key,))
 
 
 # ---------- Funções JSON Snapshot ----------
@@ -149,11 +805,15 @@ def save_json_snapshot(path: str, data: Dict[str, Any]) -> None:
       "saved_at": "<isoutc>",
       "prices": { "bitcoin": {...}, ... }
     }
+    Export explícito: o cache de partida usa o snapshot binário (services/snapshot.py).
+    Grava em `path + ".tmp"` e renomeia, para nunca deixar um arquivo pela metade.
     """
     os.makedirs(os.path.dirname(path), exist_ok=True)
     payload = {"saved_at": datetime.utcnow().isoformat(), "prices": data}
-    with open(path, "w", encoding="utf-8") as fh:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
         json.dump(payload, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
 
 
 def load_json_snapshot(path: str) -> Optional[Dict[str, Any]]:
@@ -196,22 +856,15 @@ def import_prices_from_json(path: str) -> List[str]:
         payload = json.load(fh)
     prices = payload.get("prices", {})
     imported: List[str] = []
+    rows = []
+    default_ts = now_ms()
     for coin, obj in prices.items():
         data_obj = obj.get("data", {}) if isinstance(obj, dict) else obj
-        timestamp = obj.get("fetched_at", datetime.utcnow().isoformat())
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
+        timestamp = obj.get("fetched_at") if isinstance(obj, dict) else None
         # salvar com timestamp fornecido (string)
-        cur.execute(
-            "INSERT INTO prices (coin, data, timestamp) VALUES (?, ?, ?)",
-            (coin, json.dumps(data_obj, ensure_ascii=False), timestamp),
-        )
-        conn.commit()
-        conn.close()
+        rows.append((coin, parse_ts(timestamp) or default_ts, data_obj))
         imported.append(coin)
+    save_ticks(rows)
     return imported
 
-
-# ---------- Inicializa DB ao importar ----------
-init_db()
 # ---------- Fim do arquivo ----------
\ No newline at end of file
@@ -0,0 +1,232 @@
+"""
+Prefetch da watchlist em tempo ocioso.
+
+Depois que a tela principal carrega, uma thread de fundo aquece, moeda a moeda
+(a selecionada primeiro), o que as outras telas buscariam ao abrir:
+
+- detalhes (/coins/{id}) no cache em disco (services/asset_store.py);
+- o logo: bytes no cache em disco e a versão já redimensionada em memória
+  (limitada a `max_bytes`, LRU), pronta para virar PhotoImage na tela de detalhes;
+- candles recentes: o backfill do timeframe padrão do gráfico.
+
+Cada passo que vai à rede espera a API ficar ociosa: nenhuma requisição do
+usuário há `idle` segundos e tokens sobrando além de `reserve` no limite
+compartilhado. As requisições do prefetch rodam dentro de `rate_limit.background()`,
+então não contam como atividade do usuário. Uma requisição do usuário faz o
+prefetch parar no próximo passo e esperar a API ficar ociosa de novo; `cancel()`
+esvazia a fila e abandona a moeda em andamento.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from io import BytesIO
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from src.config import (
+    ASSET_TTL_DETAILS, ASSET_TTL_IMAGE, PREFETCH_IDLE, PREFETCH_MAX_BYTES, PREFETCH_TIMEFRAME,
+    PREFETCH_TOKEN_RESERVE,
+)
+from src.services import backfill, coingecko, rate_limit
+from src.services.asset_store import details_key, get_store, image_key
+
+THUMBNAIL_SIZE = (120, 120)  # mesmo tamanho do logo na tela de detalhes
+_POLL = 0.25  # segundos entre verificações de ociosidade
+
+
+class _Cancelled(Exception):
+    """O prefetch foi cancelado (ou parado) no meio de uma moeda."""
+
+
+class Prefetcher:
+    """Fila de moedas a aquecer + thread de fundo que respeita o limite da API."""
+
+    def __init__(self, idle: float = PREFETCH_IDLE, reserve: float = PREFETCH_TOKEN_RESERVE,
+                 max_bytes: int = PREFETCH_MAX_BYTES, timeframe: str = PREFETCH_TIMEFRAME):
+        self.idle = idle
+        self.reserve = reserve
+        self.max_bytes = max_bytes
+        self.timeframe = timeframe
+        self._queue: Deque[str] = deque()
+        self._done: set = set()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+        self._images: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._image_bytes = 0
+        self._images_lock = threading.Lock()
+        self._stats = {"coins": 0, "details": 0, "images": 0, "backfills": 0, "cancelled": 0,
+                       "errors": 0, "image_evictions": 0}
+
+    # ---------- controle ----------
+    def schedule(self, coins: Iterable[str], first: Optional[str] = None) -> None:
+        """Enfileira as moedas ainda não aquecidas (`first` na frente) e inicia a thread."""
+        with self._cond:
+            for coin in coins:
+                if coin not in self._done and coin not in self._queue:
+                    self._queue.append(coin)
+            if first:
+                self._move_to_front(first)
+            self._cond.notify()
+        self._ensure_thread()
+
+    def prioritize(self, coin: str) -> None:
+        """Passa `coin` para o começo da fila (ex.: moeda selecionada no combo)."""
+        with self._cond:
+            self._move_to_front(coin)
+            self._cond.notify()
+
+    def _move_to_front(self, coin: str) -> None:
+        if coin in self._done:
+            return
+        try:
+            self._queue.remove(coin)
+        except ValueError:
+            pass
+        self._queue.appendleft(coin)
+
+    def cancel(self) -> None:
+        """Esvazia a fila e interrompe a moeda em andamento no próximo passo."""
+        with self._cond:
+            self._queue.clear()
+            self._generation += 1
+            self._cond.notify()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+
+    # ---------- consumo ----------
+    def image(self, url: str):
+        """Logo já redimensionado (PIL.Image) se o prefetch o preparou; None caso contrário."""
+        with self._images_lock:
+            item = self._images.get(url)
+            if item is None:
+                return None
+            self._images.move_to_end(url)
+            return item[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+        with self._images_lock:
+            stats["image_bytes"] = self._image_bytes
+            stats["images_cached"] = len(self._images)
+        return stats
+
+    # ---------- thread ----------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._queue and not self._stop.is_set():
+                    self._cond.wait()
+                if self._stop.is_set():
+                    return
+                coin = self._queue.popleft()
+                generation = self._generation
+            try:
+                self._warm(coin, generation)
+            except _Cancelled:
+                self._count("cancelled")
+                continue
+            except Exception:
+                with self._cond:
+                    self._stats["errors"] += 1
+            with self._cond:
+                self._done.add(coin)
+                self._stats["coins"] += 1
+
+    def _wait_turn(self, generation: int) -> None:
+        """Bloqueia até a API estar ociosa para o prefetch; _Cancelled se cancelado/parado."""
+        limiter = coingecko.get_client().limiter
+        while True:
+            if self._stop.is_set() or generation != self._generation:
+                raise _Cancelled()
+            if limiter.foreground_idle() >= self.idle and limiter.has_spare(self.reserve):
+                return
+            self._stop.wait(_POLL)
+
+    def _warm(self, coin: str, generation: int) -> None:
+        store = get_store()
+        cached = store.get_json(details_key(coin))
+        data = cached[0] if cached else None
+        if cached is None or not cached[1]:
+            self._wait_turn(generation)
+            with rate_limit.background():
+                data = coingecko.get_coin_details(coin)
+            store.put_json(details_key(coin), data, ASSET_TTL_DETAILS)
+            self._count("details")
+
+        image_info = (data or {}).get("image", {}) or {}
+        url = image_info.get("large") or image_info.get("thumb") or image_info.get("small")
+        if url:
+            entry = store.get(image_key(url))
+            payload = entry.data if entry is not None else None
+            if entry is None or not entry.fresh():
+                self._wait_turn(generation)
+                payload = coingecko.get_bytes(url)
+                store.put(image_key(url), payload, ASSET_TTL_IMAGE)
+            if self.image(url) is None:
+                self._keep_image(url, payload)
+
+        self._wait_turn(generation)
+        with rate_limit.background():
+            backfill.backfill(coin, self.timeframe)
+        self._count("backfills")
+
+    def _keep_image(self, url: str, payload: bytes) -> None:
+        try:
+            from PIL import Image  # opcional (e pesado): só carregado quando há logo para preparar
+        except ImportError:
+            return
+        img = Image.open(BytesIO(payload))
+        img.thumbnail(THUMBNAIL_SIZE)
+        img.load()
+        size = img.width * img.height * len(img.getbands())
+        if size > self.max_bytes:
+            return
+        evictions = 0
+        with self._images_lock:
+            self._images[url] = (img, size)
+            self._image_bytes += size
+            while self._image_bytes > self.max_bytes:
+                _, (_, evicted) = self._images.popitem(last=False)
+                self._image_bytes -= evicted
+                evictions += 1
+        self._count("images")
+        self._count("image_evictions", evictions)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._cond:
+            self._stats[name] += n
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Retorna o prefetcher compartilhado do processo."""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
+
+
+def shutdown_prefetch() -> None:
+    """Cancela o prefetch e encerra a thread (hook de saída do App)."""
+    global _prefetcher
+    with _prefetcher_lock:
+        prefetcher, _prefetcher = _prefetcher, None
+    if prefetcher is not None:
+        prefetcher.stop()
@@ -0,0 +1,246 @@
+"""
+Feed central de preços compartilhado pelas telas.
+
+Cada tela se inscreve com as moedas/fiats que exibe e um callback. A cada tick
+o feed faz UMA chamada /simple/price com a união de todas as inscrições, grava
+os ticks via writer e distribui o resultado para todos os inscritos. Requisições
+concorrentes para a mesma chave (moedas + fiats) são unificadas (single-flight).
+
+Os callbacks rodam na thread do feed: telas Tk devem repassar com `self.after`.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from src.services import coingecko
+from src.services.writer import get_writer
+
+PriceCallback = Callable[[Dict[str, Any]], None]
+ErrorCallback = Callable[[str], None]
+
+
+class SingleFlight:
+    """Garante uma única execução em andamento por chave; chamadas concorrentes esperam o mesmo resultado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, "_Call"] = {}
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[Exception] = None
+
+
+class Subscription:
+    __slots__ = ("coins", "fiats", "callback", "on_error", "interval")
+
+    def __init__(self, coins: Iterable[str], fiats: Iterable[str], callback: PriceCallback,
+                 on_error: Optional[ErrorCallback], interval: Optional[float]):
+        self.coins = list(coins)
+        self.fiats = list(fiats)
+        self.callback = callback
+        self.on_error = on_error
+        self.interval = interval
+
+
+class PriceFeed:
+    """
+    Agendador de preços: uma chamada por tick com a união das inscrições.
+
+    Inscrições com `interval=None` não disparam polling, mas recebem os dados
+    sempre que outra tela (ou `refresh_now`) buscar preços. O tick periódico usa
+    o menor intervalo entre as inscrições ativas.
+    """
+
+    def __init__(self, persist: bool = True):
+        self.persist = persist
+        self._subs: Dict[str, Subscription] = {}
+        self._cond = threading.Condition()
+        self._flight = SingleFlight()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_fetch = 0.0
+        self._stats = {"ticks": 0, "api_calls": 0, "shared": 0, "errors": 0, "stale": 0}
+
+    # ---------- inscrições ----------
+    def subscribe(self, name: str, coins: Iterable[str], fiats: Iterable[str], callback: PriceCallback,
+                  on_error: Optional[ErrorCallback] = None, interval: Optional[float] = None) -> None:
+        """Registra (ou substitui) a inscrição `name`."""
+        with self._cond:
+            self._subs[name] = Subscription(coins, fiats, callback, on_error, interval)
+            self._cond.notify_all()
+        self._ensure_thread()
+
+    def update(self, name: str, coins: Optional[Iterable[str]] = None,
+               fiats: Optional[Iterable[str]] = None, interval: Any = ...) -> None:
+        """Altera moedas/fiats/intervalo de uma inscrição existente (interval=None desliga o polling)."""
+        with self._cond:
+            sub = self._subs.get(name)
+            if sub is None:
+                return
+            if coins is not None:
+                sub.coins = list(coins)
+            if fiats is not None:
+                sub.fiats = list(fiats)
+            if interval is not ...:
+                sub.interval = interval
+            self._cond.notify_all()
+
+    def unsubscribe(self, name: str) -> None:
+        with self._cond:
+            self._subs.pop(name, None)
+            self._cond.notify_all()
+
+    # ---------- busca ----------
+    def fetch(self, coins: Iterable[str], fiats: Iterable[str]) -> Dict[str, Any]:
+        """
+        Busca preços (single-flight por moedas+fiats), grava os ticks e devolve o dict
+        no formato de coingecko.get_prices. Não distribui para os inscritos.
+        Preços servidos do cache vencido (limite de taxa, resposta ilegível) vão para
+        quem pediu, mas não viram ticks: não são o preço deste momento.
+        """
+        key: Tuple[Tuple[str, ...], Tuple[str, ...]] = (tuple(sorted(set(coins))), tuple(sorted(set(fiats))))
+        leader = []
+
+        def _do():
+            leader.append(True)
+            with self._cond:
+                self._stats["api_calls"] += 1
+            stale: set = set()
+            data = coingecko.get_prices(list(key[0]), list(key[1]), stale=stale)
+            fresh = {coin: payload for coin, payload in (data or {}).items() if coin not in stale}
+            if stale:
+                with self._cond:
+                    self._stats["stale"] += 1
+            if self.persist and fresh:
+                get_writer().submit_prices(fresh)
+            return data
+
+        data = self._flight.do(key, _do)
+        if not leader:
+            with self._cond:
+                self._stats["shared"] += 1
+        return data
+
+    def refresh_now(self) -> None:
+        """Dispara um tick imediato em segundo plano (resultado vai para todos os inscritos)."""
+        threading.Thread(target=self._tick, daemon=True).start()
+
+    def _tick(self) -> None:
+        with self._cond:
+            subs = list(self._subs.values())
+            self._last_fetch = time.monotonic()
+            self._stats["ticks"] += 1
+        if not subs:
+            return
+        coins = {c for s in subs for c in s.coins}
+        fiats = {f for s in subs for f in s.fiats}
+        try:
+            data = self.fetch(coins, fiats)
+        except Exception as exc:
+            with self._cond:
+                self._stats["errors"] += 1
+            for sub in subs:
+                if sub.on_error is not None:
+                    _safe_call(sub.on_error, str(exc))
+            return
+        for sub in subs:
+            _safe_call(sub.callback, {c: data[c] for c in sub.coins if c in data})
+
+    # ---------- agendador ----------
+    def _interval(self) -> Optional[float]:
+        intervals = [s.interval for s in self._subs.values() if s.interval]
+        return min(intervals) if intervals else None
+
+    def _ensure_thread(self) -> None:
+        with self._cond:
+            self._running = True
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="price-feed", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                interval = self._interval()
+                if interval is None:
+                    self._cond.wait()
+                    continue
+                wait = self._last_fetch + interval - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            self._tick()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Ticks executados, chamadas à API, chamadas poupadas por single-flight, erros e respostas vencidas."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["subscribers"] = sorted(self._subs)
+            stats["interval"] = self._interval()
+        return stats
+
+
+def _safe_call(fn: Callable, *args) -> None:
+    try:
+        fn(*args)
+    except Exception:
+        pass
+
+
+_feed: Optional[PriceFeed] = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> PriceFeed:
+    """Retorna o feed compartilhado do processo."""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = PriceFeed()
+        return _feed
+
+
+def shutdown_feed() -> None:
+    """Para o agendador do feed compartilhado."""
+    global _feed
+    with _feed_lock:
+        feed, _feed = _feed, None
+    if feed is not None:
+        feed.stop()
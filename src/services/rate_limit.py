@@ -0,0 +1,296 @@
+"""
+Controle de taxa das chamadas à CoinGecko.
+
+- `TokenBucket`: limita a taxa média e a rajada de requisições.
+- `CircuitBreaker`: após HTTP 429 (respeitando Retry-After) ou falhas seguidas,
+  abre o circuito com backoff exponencial com jitter; enquanto aberto nenhuma
+  requisição sai e o client serve o último valor em cache.
+- `RateLimiter`: junta os dois e expõe as métricas.
+- `background()`: marca as chamadas da thread atual como de fundo (prefetch); o
+  limiter registra quando houve a última chamada "de usuário" para que o
+  trabalho de fundo ceda a vez.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import (
+    RATE_LIMIT_PER_MIN, RATE_LIMIT_BURST, BREAKER_FAILURE_THRESHOLD, BACKOFF_BASE, BACKOFF_MAX,
+)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Requisições feitas dentro do bloco (nesta thread) não contam como atividade do usuário."""
+    previous = getattr(_local, "background", False)
+    _local.background = True
+    try:
+        yield
+    finally:
+        _local.background = previous
+
+
+def is_background() -> bool:
+    return getattr(_local, "background", False)
+
+
+class RateLimitError(Exception):
+    """Requisição não enviada/aceita por limite de taxa; `retry_in` indica a espera (s)."""
+
+    def __init__(self, message: str, retry_in: float = 0.0):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Backoff exponencial com jitter ("full jitter" entre metade e o valor cheio)."""
+    delay = min(cap, base * (2 ** max(0, attempt - 1)))
+    return random.uniform(delay / 2, delay)
+
+
+class TokenBucket:
+    """Balde de tokens thread-safe: `rate` tokens/s, no máximo `capacity` acumulados."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Consome um token se houver; senão retorna quantos segundos faltam para o próximo."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até obter um token (ou até `timeout`); retorna False se o tempo esgotar."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class CircuitBreaker:
+    """Circuito closed -> open (por um tempo) -> half_open (uma tentativa) -> closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD):
+        self.failure_threshold = failure_threshold
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._open_until == 0.0:
+            return self.CLOSED
+        if time.monotonic() < self._open_until:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def blocked_for(self) -> float:
+        """Como `allow`, mas só consulta: não reserva a tentativa do half-open."""
+        with self._lock:
+            state = self._state()
+            if state == self.OPEN:
+                return self._open_until - time.monotonic()
+            if state == self.HALF_OPEN and self._probing:
+                return 1.0
+            return 0.0
+
+    def allow(self) -> float:
+        """
+        0 se a requisição pode sair; senão segundos até o circuito aceitar nova tentativa.
+        No half-open, o 0 reserva a única tentativa: quem o recebe deve terminar com
+        record_success/record_failure ou, se a requisição não sair, `release_probe`.
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return 0.0
+            if state == self.OPEN:
+                return self._open_until - time.monotonic()
+            if self._probing:  # half-open: só uma requisição de teste por vez
+                return 1.0
+            self._probing = True
+            return 0.0
+
+    def release_probe(self) -> None:
+        """Devolve a tentativa do half-open reservada por uma requisição que não chegou a sair."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trips = 0
+            self._open_until = 0.0
+            self._probing = False
+
+    def record_failure(self, retry_after: Optional[float] = None, force: bool = False) -> float:
+        """
+        Registra falha; abre o circuito se `force` (ex.: 429) ou ao atingir o limite.
+        Retorna por quantos segundos o circuito ficou aberto (0 se continua fechado).
+        """
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if not force and self._failures < self.failure_threshold and self._open_until == 0.0:
+                return 0.0
+            self._trips += 1
+            delay = max(retry_after or 0.0, backoff_delay(self._trips))
+            self._open_until = time.monotonic() + delay
+            return delay
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "trips": self._trips,
+                "open_for": max(0.0, self._open_until - time.monotonic()) if state == self.OPEN else 0.0,
+            }
+
+
+class RateLimiter:
+    """Balde de tokens + circuit breaker compartilhados por todas as chamadas de um client."""
+
+    def __init__(self, per_minute: float = RATE_LIMIT_PER_MIN, burst: float = RATE_LIMIT_BURST,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD):
+        self.bucket = TokenBucket(per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker(failure_threshold)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "rejected": 0, "waited_s": 0.0, "background": 0}
+        self._last_foreground = 0.0
+
+    def before_request(self, fn_name: str, max_wait: Optional[float] = None) -> None:
+        """Espera um token (até `max_wait`) ou levanta RateLimitError se o circuito estiver aberto."""
+        background_call = is_background()
+        if not background_call:
+            self._last_foreground = time.monotonic()
+        self._reject_if_blocked(fn_name, self.breaker.blocked_for())
+        start = time.monotonic()
+        if not self.bucket.acquire(max_wait):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise RateLimitError(f"{fn_name}: limite local de requisições atingido", self.bucket.try_acquire())
+        # só com o token na mão reserva a tentativa do half-open: a requisição sai agora
+        self._reject_if_blocked(fn_name, self.breaker.allow())
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["background"] += background_call
+            self._stats["waited_s"] += time.monotonic() - start
+
+    def try_request(self, fn_name: str) -> float:
+        """
+        Versão sem bloqueio de `before_request` (para o client assíncrono): 0 se a
+        requisição pode sair agora (já contabilizada), senão os segundos até o próximo
+        token. RateLimitError se o circuito estiver aberto. Com 0, a requisição deve
+        terminar em on_success/on_failure/on_throttled ou em `on_abort`.
+        """
+        background_call = is_background()
+        if not background_call:
+            self._last_foreground = time.monotonic()
+        self._reject_if_blocked(fn_name, self.breaker.blocked_for())
+        wait = self.bucket.try_acquire()
+        if wait > 0:
+            return wait
+        self._reject_if_blocked(fn_name, self.breaker.allow())
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["background"] += background_call
+        return 0.0
+
+    def _reject_if_blocked(self, fn_name: str, blocked: float) -> None:
+        if blocked > 0:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise RateLimitError(f"{fn_name}: API limitada - nova tentativa em {blocked:.0f}s", blocked)
+
+    def foreground_idle(self) -> float:
+        """Segundos desde a última requisição fora de `background()` (inf se nunca houve)."""
+        last = self._last_foreground
+        return float("inf") if last == 0.0 else time.monotonic() - last
+
+    def has_spare(self, reserve: float) -> bool:
+        """True se o circuito está fechado e sobram tokens além de `reserve` (guardados para o usuário)."""
+        return self.breaker.state == CircuitBreaker.CLOSED and self.bucket.tokens() >= reserve + 1
+
+    def on_throttled(self, retry_after: Optional[float]) -> float:
+        """Resposta 429: abre o circuito por max(Retry-After, backoff). Retorna a espera."""
+        with self._lock:
+            self._stats["throttled"] += 1
+        return self.breaker.record_failure(retry_after, force=True)
+
+    def on_failure(self) -> None:
+        self.breaker.record_failure()
+
+    def on_success(self) -> None:
+        self.breaker.record_success()
+
+    def on_abort(self) -> None:
+        """A requisição liberada não teve resposta (cancelada, erro local): libera o half-open."""
+        self.breaker.release_probe()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tokens disponíveis, contadores (requests/background/throttled/rejected) e estado do breaker."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens"] = round(self.bucket.tokens(), 2)
+        stats["breaker"] = self.breaker.snapshot()
+        return stats
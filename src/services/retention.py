@@ -0,0 +1,315 @@
+"""
+Retenção, compactação e VACUUM do banco de preços.
+
+- Ticks mais novos que `raw_days` ficam com resolução completa. Os mais antigos
+  são compactados para o último tick de cada bucket de `compact_minutes` (com
+  todas as colunas). O OHLC exato desses períodos continua na tabela `candles`,
+  que é mantida na gravação.
+- Candles de timeframes curtos são apagados depois de `candle_days[tf]` dias.
+- O espaço liberado volta ao sistema com `PRAGMA incremental_vacuum`. Bancos
+  criados antes do auto_vacuum precisam de um VACUUM completo, uma única vez
+  (`convert_to_incremental`). Ele segura o lock de escrita durante toda a
+  reconstrução, então só roda na partida, antes de qualquer writer (main.py e
+  o coletor) — nunca na manutenção em segundo plano. O app só converte bancos
+  até CONVERT_MAX_STARTUP_BYTES; os maiores ficam pendentes para
+  `python -m src.services.retention --convert`.
+
+A política vem de config.py e pode ser sobrescrita pela tabela settings (chaves
+"retention.raw_days", "retention.compact_minutes" e "retention.candle_days",
+esta em JSON). O `MaintenanceScheduler` roda tudo em segundo plano, em lotes
+pequenos para não segurar o lock de escrita do writer.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import (
+    CONVERT_MAX_STARTUP_BYTES,
+    MAINTENANCE_DELAY,
+    MAINTENANCE_INTERVAL,
+    RETENTION_CANDLE_DAYS,
+    RETENTION_COMPACT_MINUTES,
+    RETENTION_RAW_DAYS,
+    VACUUM_PAGES,
+)
+from src.services import persistence
+
+DAY_MS = 86_400_000
+# Ticks compactados por transação (um dia de uma moeda)
+COMPACT_CHUNK_MS = DAY_MS
+# Marca global das versões anteriores (settings); substituída pela tabela `compaction`
+_LEGACY_WATERMARK_KEY = "retention.compacted_until"
+
+
+class RetentionPolicy:
+    """Janelas de retenção (em dias) e resolução da compactação (em minutos)."""
+
+    def __init__(self, raw_days: float = RETENTION_RAW_DAYS, compact_minutes: float = RETENTION_COMPACT_MINUTES,
+                 candle_days: Optional[Dict[str, float]] = None, vacuum_pages: int = VACUUM_PAGES):
+        self.raw_days = raw_days
+        self.compact_minutes = compact_minutes
+        self.candle_days = dict(RETENTION_CANDLE_DAYS if candle_days is None else candle_days)
+        self.vacuum_pages = vacuum_pages
+
+    @property
+    def compact_ms(self) -> int:
+        return max(1, int(self.compact_minutes * 60_000))
+
+    @classmethod
+    def from_settings(cls) -> "RetentionPolicy":
+        """Política de config.py com os valores da tabela settings por cima (quando válidos)."""
+        policy = cls()
+        for key, attr in (("retention.raw_days", "raw_days"), ("retention.compact_minutes", "compact_minutes")):
+            value = persistence.load_setting(key)
+            if value is not None:
+                try:
+                    setattr(policy, attr, float(value))
+                except ValueError:
+                    pass
+        value = persistence.load_setting("retention.candle_days")
+        if value is not None:
+            try:
+                policy.candle_days.update({tf: float(days) for tf, days in json.loads(value).items()})
+            except (ValueError, TypeError, AttributeError):
+                pass
+        return policy
+
+
+# ---------- Compactação de ticks ----------
+def compact_ticks(policy: RetentionPolicy, now: Optional[int] = None) -> int:
+    """
+    Mantém só o último tick de cada bucket de `compact_ms` para ticks anteriores a `raw_days`.
+    Processa um dia de uma moeda por transação. Retorna quantas linhas foram apagadas.
+
+    Cada moeda guarda até onde já foi compactada (tabela `compaction`); save_ticks
+    recua essa marca ao gravar ticks mais antigos (backfill, import), então eles
+    também passam pela compactação.
+    """
+    now = persistence.now_ms() if now is None else now
+    step = policy.compact_ms
+    cutoff = int(now - policy.raw_days * DAY_MS)
+    cutoff -= cutoff % step
+    engine = persistence.get_engine()
+    with engine.transaction() as conn:
+        # moedas sem marca começam do zero (inclusive as que tinham só a marca global antiga)
+        conn.execute("INSERT OR IGNORE INTO compaction (coin, until) SELECT DISTINCT coin, 0 FROM ticks")
+        marks = conn.execute("SELECT coin, until FROM compaction").fetchall()
+        conn.execute("DELETE FROM settings WHERE key = ?", (_LEGACY_WATERMARK_KEY,))
+    deleted = 0
+    for coin, watermark in marks:
+        if cutoff <= watermark:
+            continue
+        with engine.connection() as conn:
+            row = conn.execute("SELECT MIN(ts) FROM ticks WHERE coin = ? AND ts >= ?", (coin, watermark)).fetchone()
+        if row[0] is not None:
+            start = max(watermark, row[0])
+            start -= start % step  # chunks alinhados aos buckets
+            while start < cutoff:
+                end = min(start + COMPACT_CHUNK_MS, cutoff)
+                with engine.transaction() as conn:
+                    deleted += conn.execute(
+                        "DELETE FROM ticks WHERE coin = ? AND ts >= ? AND ts < ? AND ts NOT IN ("
+                        "  SELECT MAX(ts) FROM ticks WHERE coin = ? AND ts >= ? AND ts < ? GROUP BY ts / ?"
+                        ")",
+                        (coin, start, end, coin, start, end, step),
+                    ).rowcount
+                start = end
+        with engine.transaction() as conn:
+            # só avança se ninguém recuou a marca enquanto esta rodada compactava
+            conn.execute("UPDATE compaction SET until = ? WHERE coin = ? AND until = ?", (cutoff, coin, watermark))
+    return deleted
+
+
+def prune_candles(policy: RetentionPolicy, now: Optional[int] = None) -> int:
+    """Apaga candles mais antigos que a retenção do seu timeframe. Retorna quantos apagou."""
+    now = persistence.now_ms() if now is None else now
+    deleted = 0
+    for tf, days in policy.candle_days.items():
+        if days is None or days <= 0:
+            continue
+        with persistence.get_engine().transaction() as conn:
+            deleted += conn.execute(
+                "DELETE FROM candles WHERE tf = ? AND start < ?", (tf, int(now - days * DAY_MS))
+            ).rowcount
+    return deleted
+
+
+# ---------- VACUUM / tamanho ----------
+def db_size() -> Dict[str, int]:
+    """Tamanho do arquivo (banco + WAL) em bytes e contadores de páginas."""
+    path = persistence.DB_PATH
+    size = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+    with persistence.get_engine().connection() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"file_bytes": size, "page_size": page_size, "page_count": page_count, "freelist_pages": freelist}
+
+
+def needs_conversion() -> bool:
+    """True se o banco ainda não está em auto_vacuum incremental."""
+    with persistence.get_engine().connection() as conn:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+
+
+def convert_to_incremental() -> bool:
+    """
+    VACUUM completo que passa um banco antigo para auto_vacuum incremental.
+    Bloqueia as escritas enquanto roda: chamar só na partida, antes de iniciar o
+    writer. Retorna False se o banco já estava convertido.
+    """
+    if not needs_conversion():
+        return False
+    with persistence.get_engine().connection() as conn:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return True
+
+
+def convert_at_startup(max_bytes: Optional[int] = CONVERT_MAX_STARTUP_BYTES) -> str:
+    """
+    Conversão na partida do app, limitada por tamanho: "ok" se o banco já estava
+    convertido, "converted" se converteu agora, "pending" se é grande demais para
+    segurar a abertura (fica para o comando --convert).
+    """
+    if not needs_conversion():
+        return "ok"
+    if max_bytes is not None and db_size()["file_bytes"] > max_bytes:
+        return "pending"
+    return "converted" if convert_to_incremental() else "ok"
+
+
+def vacuum(max_pages: int = VACUUM_PAGES) -> Dict[str, Any]:
+    """
+    Devolve páginas livres ao sistema: incremental_vacuum de até `max_pages` (0 = todas).
+    Em banco ainda não convertido não faz nada (`needs_conversion` no relatório).
+    """
+    before = db_size()
+    if needs_conversion():
+        return {"needs_conversion": True, "reclaimed_pages": 0, "reclaimed_bytes": 0,
+                "before": before, "after": before}
+    with persistence.get_engine().connection() as conn:
+        # executescript roda o pragma até o fim (execute() daria um único passo = 1 página)
+        conn.executescript(f"PRAGMA incremental_vacuum({max(0, int(max_pages))});")
+        # encolhe o WAL para o tamanho do arquivo refletir o que foi liberado
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    after = db_size()
+    return {
+        "needs_conversion": False,
+        "reclaimed_pages": max(0, before["page_count"] - after["page_count"]),
+        "reclaimed_bytes": max(0, before["file_bytes"] - after["file_bytes"]),
+        "before": before,
+        "after": after,
+    }
+
+
+def run_maintenance(policy: Optional[RetentionPolicy] = None, now: Optional[int] = None) -> Dict[str, Any]:
+    """Uma rodada completa: compacta ticks, poda candles e faz o vacuum. Retorna o relatório."""
+    policy = RetentionPolicy.from_settings() if policy is None else policy
+    start = time.perf_counter()
+    report: Dict[str, Any] = {
+        "ticks_deleted": compact_ticks(policy, now),
+        "candles_deleted": prune_candles(policy, now),
+    }
+    report.update(vacuum(policy.vacuum_pages))
+    report["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    return report
+
+
+# ---------- Agendamento ----------
+class MaintenanceScheduler:
+    """Thread de fundo que roda `run_maintenance` a cada `interval` segundos."""
+
+    def __init__(self, interval: float = MAINTENANCE_INTERVAL, delay: float = MAINTENANCE_DELAY):
+        self.interval = interval
+        self.delay = delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reports: List[Dict[str, Any]] = []
+        self.last_error: Optional[str] = None
+
+    def start(self) -> "MaintenanceScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def last_report(self) -> Optional[Dict[str, Any]]:
+        return self.reports[-1] if self.reports else None
+
+    def _run(self) -> None:
+        wait = self.delay
+        while not self._stop.wait(wait):
+            try:
+                self.reports = (self.reports + [run_maintenance()])[-10:]
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            wait = self.interval
+
+
+_scheduler: Optional[MaintenanceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def start_maintenance() -> MaintenanceScheduler:
+    """Inicia (uma vez por processo) a manutenção periódica do banco."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = MaintenanceScheduler()
+        return _scheduler.start()
+
+
+def stop_maintenance() -> None:
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.stop()
+
+
+# ---------- CLI ----------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.services.retention", description="Manutenção do banco.")
+    parser.add_argument("--convert", action="store_true", help="converte para auto_vacuum incremental (VACUUM completo)")
+    parser.add_argument("--run", action="store_true", help="roda uma rodada de retenção e vacuum")
+    args = parser.parse_args(argv)
+
+    try:
+        before = db_size()
+        print(f"banco: {persistence.DB_PATH} ({before['file_bytes'] / 1e6:.1f} MB)")
+        if args.convert:
+            if not needs_conversion():
+                print("já está em auto_vacuum incremental")
+            else:
+                print("convertendo (VACUUM completo; feche o app e o coletor antes)...", flush=True)
+                start = time.perf_counter()
+                convert_to_incremental()
+                after = db_size()
+                print(f"convertido em {time.perf_counter() - start:.1f}s: {after['file_bytes'] / 1e6:.1f} MB")
+        elif needs_conversion():
+            print("conversão para auto_vacuum incremental pendente: rode com --convert")
+        if args.run:
+            report = run_maintenance()
+            print(f"ticks compactados: {report['ticks_deleted']}, candles podados: {report['candles_deleted']}, "
+                  f"páginas recuperadas: {report['reclaimed_pages']} ({report['elapsed_ms']:.0f} ms)")
+    finally:
+        persistence.close_db()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Snapshot binário dos últimos preços (cache de partida da tela principal).
+
+Layout (little-endian), versão 1:
+
+    cabeçalho  <4sHHqII>   magic b"CDSN", versão, nº de colunas, saved_at (epoch ms),
+                           nº de moedas, CRC32 do corpo
+    nomes      u32 tamanho + UTF-8 "\n".join(colunas + moedas)   ex.: usd, brl, ..., bitcoin
+    valores    moedas × colunas f64 (linha por moeda; NaN = ausente)
+
+Nomes e valores são lidos com um `split` e um único `struct.unpack`.
+
+A gravação é atômica (arquivo temporário + fsync + rename) e só acontece quando
+o corpo muda — o `saved_at` fica fora do CRC, então repetir os mesmos preços não
+reescreve o arquivo. A leitura confere magic, versão, tamanho e CRC: um arquivo
+corrompido gera `SnapshotError` em vez de virar "sem cache" silenciosamente.
+O JSON continua disponível como export explícito (persistence.save_json_snapshot).
+"""
+
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SNAPSHOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "prices.snap"))
+
+MAGIC = b"CDSN"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHqII")
+_U32 = struct.Struct("<I")
+_NAN = math.nan
+
+# CRC do último corpo gravado por caminho (evita reescrever preços iguais)
+_last_crc: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+class SnapshotError(Exception):
+    """Snapshot ilegível: versão desconhecida, truncado ou com checksum inválido."""
+
+
+def _columns(data: Dict[str, dict]) -> List[str]:
+    cols = set()
+    for payload in data.values():
+        if isinstance(payload, dict):
+            cols.update(k for k, v in payload.items() if isinstance(v, (int, float)) and not isinstance(v, bool))
+    return sorted(cols)
+
+
+def encode(data: Dict[str, dict], saved_at: Optional[int] = None) -> bytes:
+    """Serializa {coin: {coluna: número}} no formato binário (valores não numéricos são ignorados)."""
+    cols = _columns(data)
+    coins = [coin for coin, payload in data.items() if isinstance(payload, dict)]
+    if any("\n" in name for name in cols + coins):
+        raise ValueError("nomes de moeda/coluna não podem conter quebra de linha")
+    names = "\n".join(cols + coins).encode("utf-8")
+    values = []
+    for coin in coins:
+        payload = data[coin]
+        for col in cols:
+            value = payload.get(col)
+            values.append(float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else _NAN)
+    body = _U32.pack(len(names)) + names + struct.pack(f"<{len(values)}d", *values)
+    saved_at = int(time.time() * 1000) if saved_at is None else saved_at
+    return _HEADER.pack(MAGIC, VERSION, len(cols), saved_at, len(coins), zlib.crc32(body)) + body
+
+
+def decode(buf: bytes) -> Tuple[int, Dict[str, Dict[str, float]]]:
+    """Lê (saved_at_ms, {coin: {coluna: valor}}) de um buffer; SnapshotError se inválido."""
+    if len(buf) < _HEADER.size + _U32.size:
+        raise SnapshotError("snapshot truncado (cabeçalho incompleto)")
+    magic, version, ncols, saved_at, ncoins, crc = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise SnapshotError("arquivo não é um snapshot do CriptoDash")
+    if version != VERSION:
+        raise SnapshotError(f"versão de snapshot não suportada: {version}")
+    if zlib.crc32(memoryview(buf)[_HEADER.size:]) != crc:
+        raise SnapshotError("checksum do snapshot não confere")
+    pos = _HEADER.size + _U32.size
+    (names_len,) = _U32.unpack_from(buf, _HEADER.size)
+    count = ncols * ncoins
+    if len(buf) != pos + names_len + count * 8:
+        raise SnapshotError("tamanho do snapshot não confere com o cabeçalho")
+    try:
+        names = buf[pos:pos + names_len].decode("utf-8").split("\n") if names_len else []
+    except UnicodeDecodeError as e:
+        raise SnapshotError(f"snapshot corrompido: {e}") from e
+    if len(names) != ncols + ncoins:
+        raise SnapshotError("número de nomes não confere com o cabeçalho")
+    cols, coins = names[:ncols], names[ncols:]
+    values = struct.unpack_from(f"<{count}d", buf, pos + names_len)
+    data: Dict[str, Dict[str, float]] = {}
+    for i, coin in enumerate(coins):
+        row = values[i * ncols:(i + 1) * ncols]
+        data[coin] = {col: v for col, v in zip(cols, row) if v == v}  # v != v só para NaN
+    return saved_at, data
+
+
+def save_snapshot(path: str, data: Dict[str, Any]) -> bool:
+    """
+    Grava o snapshot de forma atômica se o conteúdo mudou. Retorna True se escreveu.
+    """
+    blob = encode(data)
+    crc = _HEADER.unpack_from(blob)[5]
+    with _lock:
+        if _last_crc.get(path) is None and os.path.exists(path):
+            # primeira gravação do processo: compara com o que já está no disco
+            try:
+                with open(path, "rb") as fh:
+                    _last_crc[path] = _HEADER.unpack(fh.read(_HEADER.size))[5]
+            except (OSError, struct.error):
+                pass
+        if _last_crc.get(path) == crc:
+            return False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(blob)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        _last_crc[path] = crc
+    return True
+
+
+def rotate_snapshots(path: str, keep: int) -> bool:
+    """
+    Guarda uma cópia do snapshot atual como `path.1`, deslocando as anteriores
+    (`.1` -> `.2` ...) e descartando as além de `keep`. Retorna False se não há snapshot.
+    """
+    if keep < 1 or not os.path.exists(path):
+        return False
+    with _lock:
+        for i in range(keep - 1, 0, -1):
+            older = f"{path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{path}.{i + 1}")
+        stale = f"{path}.{keep + 1}"
+        if os.path.exists(stale):
+            os.remove(stale)
+        with open(path, "rb") as fh:
+            blob = fh.read()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(blob)
+        os.replace(tmp, f"{path}.1")
+    return True
+
+
+def load_snapshot(path: str = DEFAULT_SNAPSHOT) -> Optional[Dict[str, Any]]:
+    """
+    Carrega o snapshot: {"saved_at": epoch ms, "prices": {coin: {...}}}.
+    None se o arquivo não existe; SnapshotError se existe mas está inválido.
+    """
+    try:
+        with open(path, "rb") as fh:
+            buf = fh.read()
+    except FileNotFoundError:
+        return None
+    saved_at, prices = decode(buf)
+    return {"saved_at": saved_at, "prices": prices}
@@ -0,0 +1,77 @@
+"""
+Medição das fases de inicialização do app (imports, janela, telas, primeira pintura).
+
+O relógio começa quando este módulo é importado — o main.py o importa antes de
+qualquer outra coisa. Cada fase é registrada com `phase("nome")` (duração) ou
+`mark("nome")` (instante desde o início). Com CRIPTODASH_TIMINGS=1 no ambiente
+o relatório vai para o stderr quando a primeira pintura acontece.
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ENV_FLAG = "CRIPTODASH_TIMINGS"
+
+
+class StartupTimer:
+    """Fases (nome, início em ms desde t0, duração em ms), em ordem de registro."""
+
+    def __init__(self, t0: Optional[float] = None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self._phases: List[Tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._phases.append((name, (start - self.t0) * 1000, (end - start) * 1000))
+
+    def mark(self, name: str) -> float:
+        """Registra um instante (duração zero); retorna os ms desde o início."""
+        at = self.elapsed_ms()
+        with self._lock:
+            self._phases.append((name, at, 0.0))
+        return at
+
+    def phases(self) -> List[Tuple[str, float, float]]:
+        with self._lock:
+            return list(self._phases)
+
+    def as_dict(self) -> Dict[str, float]:
+        """{fase: duração em ms} (marcas: instante em ms desde o início)."""
+        return {name: (dur if dur else at) for name, at, dur in self.phases()}
+
+    def report(self) -> str:
+        lines = [f"{'fase':<28} {'início (ms)':>11} {'duração (ms)':>12}"]
+        for name, at, dur in self.phases():
+            lines.append(f"{name:<28} {at:11.1f} {(f'{dur:.1f}' if dur else '-'):>12}")
+        return "\n".join(lines)
+
+
+timer = StartupTimer()
+
+
+def phase(name: str):
+    """Atalho para `timer.phase` (o timer do processo)."""
+    return timer.phase(name)
+
+
+def mark(name: str) -> float:
+    return timer.mark(name)
+
+
+def report_if_enabled() -> None:
+    if os.environ.get(ENV_FLAG) == "1":
+        print(timer.report(), file=sys.stderr)
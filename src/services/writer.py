@@ -0,0 +1,302 @@
+"""
+Gravação assíncrona (write-behind) de preços e snapshots.
+
+As telas enfileiram ticks com `submit_prices` e seguem em frente; uma única
+thread de fundo agrupa os ticks (coalescendo por (coin, ts)) e grava em lote
+no SQLite quando o lote enche ou o intervalo de flush vence. Um lote que falha
+(ex.: banco travado) continua pendente e é regravado com backoff, até
+`WRITE_RETRIES` vezes; só então é descartado e contado em `lost`. Os snapshots
+também são coalescidos: só a versão mais recente de cada arquivo é escrita
+(binário via services/snapshot.py, ou JSON se o caminho terminar em .json).
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services import persistence, snapshot
+
+# Limites padrão do writer
+MAX_QUEUE = 10000  # itens na fila antes de aplicar backpressure
+BATCH_SIZE = 500  # ticks por transação
+FLUSH_INTERVAL = 1.0  # segundos máximos que um tick espera na memória
+PUT_TIMEOUT = 0.5  # segundos que o produtor espera com a fila cheia antes de descartar
+WRITE_RETRIES = 5  # novas tentativas de um lote que falhou (ex.: "database is locked") antes de desistir
+RETRY_BACKOFF = 0.5  # espera (s) antes da 1ª nova tentativa; dobra a cada falha
+RETRY_BACKOFF_MAX = 10.0
+
+_STOP = object()
+
+
+class PriceWriter:
+    """Thread única com fila limitada que grava ticks e snapshots em lote."""
+
+    def __init__(
+        self,
+        max_queue: int = MAX_QUEUE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        put_timeout: float = PUT_TIMEOUT,
+        retries: int = WRITE_RETRIES,
+        retry_backoff: float = RETRY_BACKOFF,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # ticks aceitos e ainda não gravados (leitura "read-your-writes" para as telas)
+        self._unflushed: Dict[Tuple[str, int], dict] = {}
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "snapshots": 0,
+            "snapshots_unchanged": 0,
+            "blocked": 0,
+            "dropped": 0,
+            "errors": 0,
+            "retries": 0,
+            "lost": 0,
+            "failing_since": None,
+            "last_error": None,
+            "max_depth": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> "PriceWriter":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="price-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Grava tudo o que está na fila e encerra a thread (não perde ticks enfileirados)."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ---------- produtores ----------
+    def submit_prices(self, prices: Dict[str, dict], ts: Optional[int] = None) -> bool:
+        """Enfileira {coin: payload} (formato de get_prices). Retorna False se descartado."""
+        ts = persistence.now_ms() if ts is None else ts
+        rows = [(coin, ts, payload) for coin, payload in prices.items()]
+        if not rows:
+            return True
+        with self._lock:
+            for coin, ts_, payload in rows:
+                self._unflushed[(coin, ts_)] = payload
+        if self._put(("ticks", rows)):
+            return True
+        with self._lock:
+            for coin, ts_, _ in rows:
+                self._unflushed.pop((coin, ts_), None)
+        return False
+
+    def submit_snapshot(self, path: str, data: Dict[str, Any]) -> bool:
+        """Enfileira a gravação de um snapshot (só a versão mais recente é escrita)."""
+        return self._put(("snapshot", path, data))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até tudo que foi enfileirado antes desta chamada estar gravado."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def _put(self, item: Any) -> bool:
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._stats["blocked"] += 1
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                with self._lock:
+                    self._stats["dropped"] += 1
+                return False
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["max_depth"] = max(self._stats["max_depth"], self._queue.qsize())
+        return True
+
+    # ---------- leitura ----------
+    def pending(self, coin: str) -> List[Tuple[int, dict]]:
+        """Ticks de `coin` já aceitos mas ainda não gravados no banco, em ordem de ts."""
+        with self._lock:
+            items = [(ts, payload) for (c, ts), payload in self._unflushed.items() if c == coin]
+        return sorted(items, key=lambda item: item[0])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Métricas de fila/backpressure: profundidade atual, descartes, lotes gravados etc.
+        `failing_since` (epoch ms) fica preenchido enquanto as gravações falham; `lost`
+        conta ticks descartados depois de esgotar as novas tentativas.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_ticks"] = len(self._unflushed)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    # ---------- thread de gravação ----------
+    def _run(self) -> None:
+        ticks: Dict[Tuple[str, int], dict] = {}
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        waiters: List[threading.Event] = []
+        deadline = None
+        retry_at = None  # após uma falha, nada é gravado antes deste instante
+        attempt = 0
+        stopping = False
+
+        while not stopping:
+            wake = retry_at if retry_at is not None else deadline
+            timeout = None if wake is None else max(0.0, wake - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                kind = item[0]
+                if kind == "ticks":
+                    for coin, ts, payload in item[1]:
+                        if (coin, ts) in ticks:
+                            with self._lock:
+                                self._stats["coalesced"] += 1
+                        ticks[(coin, ts)] = payload
+                elif kind == "snapshot":
+                    snapshots[item[1]] = item[2]
+                elif kind == "flush":
+                    waiters.append(item[1])
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            now = time.monotonic()
+            if retry_at is not None and now < retry_at and not stopping:
+                continue
+            due = deadline is not None and now >= deadline
+            if not (stopping or waiters or due or len(ticks) >= self.batch_size):
+                continue
+            while True:
+                ticks, snapshots = self._write(ticks, snapshots)
+                if not ticks and not snapshots:
+                    attempt, retry_at, deadline = 0, None, None
+                    self._recovered()
+                    break
+                attempt += 1
+                if attempt > self.retries:
+                    self._give_up(ticks, snapshots)
+                    ticks, snapshots = {}, {}
+                    attempt, retry_at, deadline = 0, None, None
+                    break
+                with self._lock:
+                    self._stats["retries"] += 1
+                wait = min(RETRY_BACKOFF_MAX, self.retry_backoff * (2 ** (attempt - 1)))
+                if not stopping:
+                    retry_at = time.monotonic() + wait
+                    deadline = retry_at
+                    break
+                time.sleep(wait)  # encerrando: tenta de novo aqui mesmo, sem perder o lote
+            # flush() só é liberado quando o que veio antes foi gravado ou desistido
+            if not ticks and not snapshots:
+                for ev in waiters:
+                    ev.set()
+                waiters = []
+
+    def _write(self, ticks: Dict[Tuple[str, int], dict], snapshots: Dict[str, Dict[str, Any]]):
+        """Grava ticks e snapshots; retorna (ticks, snapshots) que falharam e seguem pendentes."""
+        start = time.perf_counter()
+        rows = [(coin, ts, payload) for (coin, ts), payload in ticks.items()]
+        failed_ticks: Dict[Tuple[str, int], dict] = {}
+        failed_snapshots: Dict[str, Dict[str, Any]] = {}
+        written: List[Tuple[str, int]] = []
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            try:
+                persistence.save_ticks(batch)
+                written.extend((coin, ts) for coin, ts, _ in batch)
+                with self._lock:
+                    self._stats["written"] += len(batch)
+                    self._stats["batches"] += 1
+            except Exception as e:
+                failed_ticks.update(((coin, ts), payload) for coin, ts, payload in batch)
+                self._error(e)
+        for path, data in snapshots.items():
+            try:
+                if path.endswith(".json"):
+                    persistence.save_json_snapshot(path, data)
+                    done = True
+                else:
+                    done = snapshot.save_snapshot(path, data)
+                with self._lock:
+                    self._stats["snapshots" if done else "snapshots_unchanged"] += 1
+            except Exception as e:
+                failed_snapshots[path] = data
+                self._error(e)
+        with self._lock:
+            # só sai de `_unflushed` o que foi de fato gravado
+            for key in written:
+                if self._unflushed.get(key) is ticks[key]:
+                    del self._unflushed[key]
+            if rows or snapshots:
+                self._stats["last_flush_ms"] = (time.perf_counter() - start) * 1000
+        return failed_ticks, failed_snapshots
+
+    def _error(self, exc: Exception) -> None:
+        with self._lock:
+            self._stats["errors"] += 1
+            self._stats["last_error"] = str(exc)
+            if self._stats["failing_since"] is None:
+                self._stats["failing_since"] = persistence.now_ms()
+
+    def _recovered(self) -> None:
+        with self._lock:
+            self._stats["failing_since"] = None
+
+    def _give_up(self, ticks: Dict[Tuple[str, int], dict], snapshots: Dict[str, Dict[str, Any]]) -> None:
+        """Esgotadas as novas tentativas: descarta o lote e registra a perda."""
+        with self._lock:
+            for key, payload in ticks.items():
+                if self._unflushed.get(key) is payload:
+                    del self._unflushed[key]
+            self._stats["lost"] += len(ticks)
+
+
+_writer: Optional[PriceWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> PriceWriter:
+    """Retorna o writer compartilhado do processo (iniciado sob demanda)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = PriceWriter()
+            atexit.register(shutdown_writer)
+        return _writer.start()
+
+
+def shutdown_writer(timeout: Optional[float] = 10.0) -> None:
+    """Grava os ticks pendentes e encerra o writer compartilhado (hook de saída do App)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop(timeout)
@@ -2,8 +2,12 @@ import threading
 import time
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
-from src.services import coingecko, persistence
-from src.config import DEFAULT_COINS, DEFAULT_FIAT, AUTO_REFRESH_INTERVAL
+from src.services import history_io, persistence, snapshot
+from src.services.prefetch import get_prefetcher
+from src.services.price_feed import get_feed
+from src.services.writer import get_writer
+from src.ui.price_grid import PriceGrid
+from src.config import DEFAULT_COINS, DEFAULT_FIATS, AUTO_REFRESH_INTERVAL, PREFETCH_DELAY
 
 try:
     from src.services.persistence import DEFAULT_JSON_SNAPSHOT
@@ -21,7 +25,6 @@ class Dashboard(ctk.CTkFrame):
 
         self.auto_refresh = ctk.BooleanVar(value=False)
         self.refresh_interval = ctk.IntVar(value=AUTO_REFRESH_INTERVAL)
-        self._after_id = None
         self._fetch_in_progress = False
 
         # Título grande futurista
@@ -33,7 +36,8 @@ class Dashboard(ctk.CTkFrame):
         ctrl_frame.pack(fill="x", padx=20, pady=(0, 15))
 
         ctk.CTkLabel(ctrl_frame, text="Selecionar moeda para detalhes:").pack(side="left", padx=(0, 10))
-        self.coin_box = ctk.CTkComboBox(ctrl_frame, values=[c.capitalize() for c in DEFAULT_COINS], width=160)
+        self.coin_box = ctk.CTkComboBox(ctrl_frame, values=[c.capitalize() for c in DEFAULT_COINS], width=160,
+                                        command=self._on_coin_selected)
         self.coin_box.pack(side="left")
         if DEFAULT_COINS:
             self.coin_box.set(DEFAULT_COINS[0].capitalize())
@@ -56,29 +60,31 @@ class Dashboard(ctk.CTkFrame):
 
         ctk.CTkLabel(auto_frame, text="Intervalo (s):").pack(side="left", padx=(20, 8))
 
-        self.interval_slider = ctk.CTkSlider(auto_frame, from_=5, to=300, variable=self.refresh_interval, width=200)
+        self.interval_slider = ctk.CTkSlider(auto_frame, from_=5, to=300, variable=self.refresh_interval, width=200,
+                                             command=self._on_interval_change)
         self.interval_slider.pack(side="left")
 
+        # Histórico completo (NDJSON/JSON, gzip opcional) em streaming
+        self.btn_import = ctk.CTkButton(auto_frame, text="Importar Histórico", width=140, command=self.importar_historico)
+        self.btn_import.pack(side="right", padx=(8, 0))
+        self.btn_export = ctk.CTkButton(auto_frame, text="Exportar Histórico", width=140, command=self.exportar_historico)
+        self.btn_export.pack(side="right")
+
         # Status
         self.status_label = ctk.CTkLabel(self, text="", text_color="#00FFA3")
         self.status_label.pack(pady=6)
 
-        # Resultado (lista)
-        self.result_frame = ctk.CTkFrame(self)
-        self.result_frame.pack(padx=20, pady=8, fill="both", expand=True)
-
-        header = ctk.CTkFrame(self.result_frame)
-        header.pack(fill="x", pady=(0, 8))
-        ctk.CTkLabel(header, text="Moeda", width=120, anchor="w").pack(side="left", padx=5)
-        ctk.CTkLabel(header, text="USD", width=120, anchor="w").pack(side="left", padx=5)
-        ctk.CTkLabel(header, text="BRL", width=120, anchor="w").pack(side="left", padx=5)
-        ctk.CTkLabel(header, text="Variação 24h", width=120, anchor="w").pack(side="left", padx=5)
-
-        self.price_labels = {}
-        self._build_labels()
+        # Resultado (tabela virtualizada: só as linhas visíveis têm widgets)
+        self.price_grid = PriceGrid(self, DEFAULT_COINS)
+        self.price_grid.pack(padx=20, pady=8, fill="both", expand=True)
 
         self.load_cached_prices()
 
+        # preços chegam pelo feed compartilhado (também quando o gráfico ao vivo busca)
+        self._feed = get_feed()
+        self._feed.subscribe("Dashboard", DEFAULT_COINS, DEFAULT_FIATS,
+                             callback=self._on_feed_data, on_error=self._on_feed_error)
+
         saved_auto = persistence.load_setting("auto_refresh")
         saved_interval = persistence.load_setting("refresh_interval")
         if saved_auto is not None:
@@ -92,26 +98,18 @@ class Dashboard(ctk.CTkFrame):
             except Exception:
                 pass
         if self.auto_refresh.get():
-            self._schedule_next_refresh(delay_ms=500)
-
-    def _build_labels(self):
-        # limpa linhas antigas
-        for child in self.result_frame.winfo_children():
-            if child != self.result_frame.winfo_children()[0]:
-                child.destroy()
-
-        self.price_labels.clear()
-        for coin in DEFAULT_COINS:
-            row = ctk.CTkFrame(self.result_frame)
-            row.pack(fill="x", pady=4)
-            ctk.CTkLabel(row, text=coin.capitalize(), width=120, anchor="w").pack(side="left", padx=5)
-            lbl_usd = ctk.CTkLabel(row, text="--", width=120, anchor="w")
-            lbl_usd.pack(side="left", padx=5)
-            lbl_brl = ctk.CTkLabel(row, text="--", width=120, anchor="w")
-            lbl_brl.pack(side="left", padx=5)
-            lbl_change = ctk.CTkLabel(row, text="--", width=120, anchor="w")
-            lbl_change.pack(side="left", padx=5)
-            self.price_labels[coin] = {"usd": lbl_usd, "brl": lbl_brl, "change": lbl_change}
+            self._feed.update("Dashboard", interval=self._interval_seconds())
+
+        # aquece detalhes/logos/candles da watchlist quando a API estiver ociosa
+        if PREFETCH_DELAY is not None:
+            self.after(PREFETCH_DELAY, self._start_prefetch)
+
+    def _start_prefetch(self):
+        get_prefetcher().schedule(DEFAULT_COINS, first=self.coin_box.get().lower() or None)
+
+    def _on_coin_selected(self, value):
+        if PREFETCH_DELAY is not None and value:
+            get_prefetcher().prioritize(value.lower())
 
     def _set_status(self, text: str, color: str = "#00FFA3"):
         self.status_label.configure(text=text, text_color=color)
@@ -129,41 +127,20 @@ class Dashboard(ctk.CTkFrame):
             return
         self._set_ui_busy(True)
         self._set_status("Carregando preços...", "#00FFFF")
-        thread = threading.Thread(target=self._fetch_and_apply, daemon=True)
-        thread.start()
+        self._feed.refresh_now()
 
-    def _fetch_and_apply(self):
-        try:
-            data = coingecko.get_prices(DEFAULT_COINS, DEFAULT_FIAT)
-            if DEFAULT_JSON_SNAPSHOT:
-                try:
-                    persistence.save_json_snapshot(DEFAULT_JSON_SNAPSHOT, data)
-                except Exception:
-                    pass
-            for coin, payload in data.items():
-                try:
-                    persistence.save_price(coin, payload)
-                except Exception:
-                    pass
-            self.after(0, self._apply_prices, data)
-        except Exception as exc:
-            self.after(0, self._handle_fetch_error, str(exc))
+    def _on_feed_data(self, data):
+        # roda na thread do feed (os ticks já foram enfileirados no writer)
+        if data:
+            get_writer().submit_snapshot(snapshot.DEFAULT_SNAPSHOT, data)
+        self.after(0, self._apply_prices, data)
+
+    def _on_feed_error(self, message):
+        self.after(0, self._handle_fetch_error, message)
 
     def _apply_prices(self, data):
-        for coin, labels in self.price_labels.items():
-            info = data.get(coin, {})
-            usd = info.get("usd")
-            brl = info.get("brl")
-            change = info.get("usd_24h_change")
-
-            labels["usd"].configure(text=f"${usd:,.2f}" if usd is not None else "--")
-            labels["brl"].configure(text=f"R${brl:,.2f}" if brl is not None else "--")
-            if change is not None:
-                txt = f"{change:+.2f}%"
-                color = "#00FF00" if change >= 0 else "#FF3300"
-                labels["change"].configure(text=txt, text_color=color)
-            else:
-                labels["change"].configure(text="--", text_color="#AAAAAA")
+        # só as células visíveis que mudaram são repintadas (em um único after_idle)
+        self.price_grid.update_prices(data)
 
         self._set_ui_busy(False)
         self._set_status(f"Atualizado em {time.strftime('%Y-%m-%d %H:%M:%S')}", "#00FFA3")
@@ -181,44 +158,37 @@ class Dashboard(ctk.CTkFrame):
             pass
 
         if on:
-            self._schedule_next_refresh(delay_ms=200)
+            self._feed.update("Dashboard", interval=self._interval_seconds())
             self._set_status("Auto-refresh ligado", "#00FFFF")
         else:
-            self._cancel_scheduled_refresh()
+            self._feed.update("Dashboard", interval=None)
             self._set_status("Auto-refresh desligado", "#FFA500")
 
-    def _schedule_next_refresh(self, delay_ms: int | None = None):
-        if delay_ms is None:
-            delay_ms = max(1, int(self.refresh_interval.get())) * 1000
-        self._cancel_scheduled_refresh()
-        self._after_id = self.after(delay_ms, self._auto_refresh_worker)
-
-    def _cancel_scheduled_refresh(self):
-        if self._after_id is not None:
-            try:
-                self.after_cancel(self._after_id)
-            except Exception:
-                pass
-            finally:
-                self._after_id = None
+    def _on_interval_change(self, _value=None):
+        if self.auto_refresh.get():
+            self._feed.update("Dashboard", interval=self._interval_seconds())
 
-    def _auto_refresh_worker(self):
-        if self._fetch_in_progress:
-            self._schedule_next_refresh(delay_ms=1000)
-            return
-        self.atualizar_precos()
-        interval_ms = max(5, int(self.refresh_interval.get())) * 1000
-        self._schedule_next_refresh(delay_ms=interval_ms)
+    def _interval_seconds(self) -> int:
+        return max(5, int(self.refresh_interval.get()))
 
     def load_cached_prices(self):
+        # snapshot binário primeiro (uma leitura de arquivo); depois o DB e o JSON legado
         data = {}
-        for coin in DEFAULT_COINS:
-            try:
-                rec = persistence.load_price(coin)
-            except Exception:
-                rec = None
-            if rec and isinstance(rec.get("data"), dict):
-                data[coin] = rec["data"]
+        try:
+            snap = snapshot.load_snapshot(snapshot.DEFAULT_SNAPSHOT)
+            if snap:
+                data = snap["prices"]
+        except snapshot.SnapshotError as e:
+            self._set_status(f"Cache de preços ignorado: {e}", "#FFA500")
+
+        if not data:
+            for coin in DEFAULT_COINS:
+                try:
+                    rec = persistence.load_price(coin)
+                except Exception:
+                    rec = None
+                if rec and isinstance(rec.get("data"), dict):
+                    data[coin] = rec["data"]
 
         if not data and DEFAULT_JSON_SNAPSHOT:
             try:
@@ -231,6 +201,61 @@ class Dashboard(ctk.CTkFrame):
         if data:
             self._apply_prices(data)
 
+    # ---------- Export / import do histórico ----------
+    _HISTORY_FILETYPES = [("NDJSON gzip", "*.ndjson.gz"), ("NDJSON", "*.ndjson"), ("JSON", "*.json"),
+                          ("JSON gzip", "*.json.gz")]
+
+    def exportar_historico(self):
+        path = filedialog.asksaveasfilename(title="Exportar histórico", defaultextension=".ndjson.gz",
+                                            filetypes=self._HISTORY_FILETYPES)
+        if not path:
+            return
+
+        def work():
+            get_writer().flush(timeout=5)  # inclui os ticks ainda na fila
+            count = history_io.export_ticks(path, progress=self._history_progress("Exportando"))
+            return f"Exportados {count:,} ticks para {path}"
+
+        self._run_history_job(work)
+
+    def importar_historico(self):
+        path = filedialog.askopenfilename(title="Importar histórico",
+                                          filetypes=self._HISTORY_FILETYPES + [("Todos", "*.*")])
+        if not path:
+            return
+
+        def work():
+            stats = history_io.import_ticks(path, progress=self._history_progress("Importando"))
+            return (f"Importados {stats['imported']:,} ticks "
+                    f"({stats['duplicates']:,} repetidos, {stats['invalid']:,} inválidos)")
+
+        self._run_history_job(work)
+
+    def _history_progress(self, verb: str):
+        def progress(records, fraction):
+            pct = f" ({fraction:.0%})" if fraction is not None else ""
+            self.after(0, self._set_status, f"{verb}... {records:,} registros{pct}", "#00FFFF")
+        return progress
+
+    def _run_history_job(self, work):
+        """Roda export/import em uma thread, com os botões travados e o resultado no status."""
+        for btn in (self.btn_export, self.btn_import):
+            btn.configure(state="disabled")
+
+        def runner():
+            try:
+                message, color = work(), "#00FFA3"
+            except Exception as e:
+                message, color = f"Erro: {e}", "#FF3300"
+            self.after(0, self._finish_history_job, message, color)
+
+        threading.Thread(target=runner, daemon=True).start()
+
+    def _finish_history_job(self, message: str, color: str):
+        for btn in (self.btn_export, self.btn_import):
+            btn.configure(state="normal")
+        self._set_status(message, color)
+
     def ir_para_detalhes(self):
         sel = self.coin_box.get()
         if not sel:
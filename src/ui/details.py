@@ -1,14 +1,17 @@
 # src/ui/details.py
-import threading
+import asyncio
 import webbrowser
 import re
+from collections import OrderedDict
 from io import BytesIO
 
 import customtkinter as ctk
 import tkinter.messagebox as messagebox
 
-from src.services import coingecko, persistence
-from src.config import DEFAULT_FIAT
+from src.services import async_coingecko, persistence
+from src.services.asset_store import details_key, get_store, image_key
+from src.services.prefetch import get_prefetcher
+from src.config import ASSET_TTL_DETAILS, ASSET_TTL_IMAGE, DEFAULT_FIAT, IMAGE_LRU_SIZE
 
 # tenta usar Pillow para exibir imagem; se não tiver, será opcional
 try:
@@ -34,6 +37,26 @@ def _format_currency(value, currency="$"):
         return f"{currency}{value}"
 
 
+class _ImageLRU:
+    """Logos já redimensionados (PhotoImage) por URL; usado só na thread do Tk."""
+
+    def __init__(self, size: int = IMAGE_LRU_SIZE):
+        self.size = size
+        self._items: "OrderedDict[str, object]" = OrderedDict()
+
+    def get(self, url: str):
+        img = self._items.get(url)
+        if img is not None:
+            self._items.move_to_end(url)
+        return img
+
+    def put(self, url: str, img) -> None:
+        self._items[url] = img
+        self._items.move_to_end(url)
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+
 def _strip_html_tags(text: str) -> str:
     if not text:
         return ""
@@ -102,6 +125,10 @@ class Details(ctk.CTkFrame):
         # Placeholder para imagem
         self._tk_image = None
         self._image_url = None
+        self._images = _ImageLRU()
+        self._images_loading = set()
+        # moeda sendo exibida: respostas de uma moeda anterior são descartadas
+        self._coin = None
 
         # Dados atuais
         self.current_data = None
@@ -115,37 +142,83 @@ class Details(ctk.CTkFrame):
             self.status_label.configure(text="Nenhuma moeda selecionada.", text_color="#ffaa00")
             return
 
+        self._coin = coin
         self.status_label.configure(text="Carregando detalhes...", text_color="#00aaff")
-        threading.Thread(target=self.fetch_details, args=(coin,), daemon=True).start()
+        # mesma chave: abrir outra moeda cancela (ou descarta) a etapa anterior ainda pendente
+        self._run("details", self._cached_details(coin), lambda cached: self._on_cached_details(coin, cached))
+
+    def _run(self, what: str, coro, on_result, on_error=None):
+        """Roda `coro` no loop compartilhado; o desfecho volta na thread do Tk pela ponte do AsyncLoop."""
+        async_coingecko.run_tk(self, coro, on_result, on_error, key=(id(self), what))
 
     # Fetch
-    def fetch_details(self, coin_id: str):
+    @staticmethod
+    async def _cached_details(coin_id: str):
+        """(dados, fresco) do JSON em cache no disco, ou None."""
+        try:
+            return await asyncio.to_thread(get_store().get_json, details_key(coin_id))
+        except Exception:
+            return None
+
+    def _on_cached_details(self, coin_id: str, cached):
+        """
+        Mostra primeiro o JSON do cache em disco (se houver) e só vai à rede se ele
+        estiver vencido ou ausente; sem rede, o cache vencido continua na tela.
+        """
+        if cached is not None:
+            data, fresh = cached
+            self.populate(data, coin_id, "cache" if fresh else "stale")
+            if fresh:
+                return
+        self._run("details", self.fetch_details(coin_id),
+                  lambda data: self._on_details(coin_id, data, cached),
+                  lambda exc: self._on_details_error(coin_id, exc, cached))
+
+    @staticmethod
+    async def fetch_details(coin_id: str) -> dict:
+        """
+        Detalhes da rede; grava o JSON no cache em disco.
+        Roda no event loop compartilhado; o disco vai para `asyncio.to_thread`.
+        """
+        data = await async_coingecko.get_async_client().get_coin_details(coin_id)
         try:
-            data = coingecko.get_coin_details(coin_id)
-            try:
-                market = data.get("market_data", {}) or {}
-                simple_payload = {
-                    "usd": market.get("current_price", {}).get("usd"),
-                    "brl": market.get("current_price", {}).get("brl"),
-                    "usd_24h_change": market.get("price_change_percentage_24h"),
-                }
-                persistence.save_price(coin_id, simple_payload)
-            except Exception:
-                pass
-
-            self.after(0, self.populate, data)
-        except Exception as e:
-            try:
-                cached = persistence.load_price(coin_id)
-            except Exception:
-                cached = None
-            if cached and cached.get("data"):
-                self.after(0, self.populate_from_cache, cached)
-            else:
-                self.after(0, self.show_error, str(e))
+            await asyncio.to_thread(get_store().put_json, details_key(coin_id), data, ASSET_TTL_DETAILS)
+        except Exception:
+            pass
+        # o preço não vai para o histórico: a resposta pode ter até CACHE_TTL_DETAILS (ou ser o
+        # fallback vencido de um 429); os ticks vêm do PriceFeed
+        return data
+
+    def _on_details(self, coin_id: str, data: dict, cached):
+        if cached is None or cached[0] != data:
+            self.populate(data, coin_id)
+        else:
+            self._set_status(coin_id, "Detalhes carregados.", "#00cc66")
+
+    def _on_details_error(self, coin_id: str, exc: Exception, cached):
+        if cached is not None:
+            self._set_status(coin_id, "Sem conexão: mostrando detalhes do cache.", "#ffaa00")
+            return
+        # sem rede e sem cache de detalhes: último preço salvo no banco
+        self._run("details", asyncio.to_thread(persistence.load_price, coin_id),
+                  lambda rec: self._on_last_price(coin_id, rec, exc),
+                  lambda _e: self._on_last_price(coin_id, None, exc))
+
+    def _on_last_price(self, coin_id: str, rec, exc: Exception):
+        if rec and rec.get("data"):
+            self.populate_from_cache(rec, coin_id)
+        elif coin_id == self._coin:
+            self.show_error(str(exc))
+
+    def _set_status(self, coin_id: str, text: str, color: str):
+        if coin_id == self._coin:
+            self.status_label.configure(text=text, text_color=color)
 
     # Populate
-    def populate(self, data: dict):
+    def populate(self, data: dict, coin_id: str = None, source: str = None):
+        """source: None (rede), "cache" (disco, válido) ou "stale" (disco, revalidando)."""
+        if coin_id is not None and coin_id != self._coin:
+            return  # o usuário já abriu outra moeda
         self.current_data = data
         name = data.get("name", "")
         symbol = data.get("symbol", "").upper()
@@ -183,7 +256,13 @@ class Details(ctk.CTkFrame):
         img_url = image_info.get("large") or image_info.get("thumb") or image_info.get("small")
         self._image_url = img_url
         if img_url and PIL_AVAILABLE:
-            threading.Thread(target=self._load_image_thread, args=(img_url,), daemon=True).start()
+            tk_img = self._images.get(img_url)
+            if tk_img is not None:
+                self._show_image(tk_img)
+            elif img_url not in self._images_loading:
+                # um logo por vez: o de uma moeda anterior é cancelado
+                self._images_loading = {img_url}
+                self._load_image(img_url)
         else:
             self.img_label.configure(image=None, text="(sem imagem)")
 
@@ -196,13 +275,21 @@ class Details(ctk.CTkFrame):
             self._homepage = None
             self.homepage_btn.configure(state="disabled")
 
-        self.status_label.configure(text="Detalhes carregados.", text_color="#00cc66")
+        if source == "cache":
+            self.status_label.configure(text="Detalhes carregados (cache local).", text_color="#00cc66")
+        elif source == "stale":
+            self.status_label.configure(text="Detalhes do cache local; atualizando...", text_color="#00aaff")
+        else:
+            self.status_label.configure(text="Detalhes carregados.", text_color="#00cc66")
 
-    def populate_from_cache(self, cached: dict):
+    def populate_from_cache(self, cached: dict, coin_id: str = None):
+        if coin_id is not None and coin_id != self._coin:
+            return  # o usuário já abriu outra moeda
         data = cached.get("data", {})
         usd = _safe_float(data.get("usd"))
         brl = _safe_float(data.get("brl"))
-        self.name_label.configure(text=f"{getattr(self.controller, 'selected_coin', '').capitalize()} (cache)")
+        name = coin_id or getattr(self.controller, "selected_coin", "") or ""
+        self.name_label.configure(text=f"{name.capitalize()} (cache)")
         self.price_usd.configure(text=f"USD: {_format_currency(usd, '$')}" if usd is not None else "USD: --")
         self.price_brl.configure(text=f"{DEFAULT_FIAT.upper()}: {_format_currency(brl, 'R$')}" if brl is not None else f"{DEFAULT_FIAT.upper()}: --")
         self.market_cap.configure(text="Market Cap: -- (cache)")
@@ -215,26 +302,76 @@ class Details(ctk.CTkFrame):
         self.status_label.configure(text="Mostrando dados do cache.", text_color="#ffaa00")
 
     # Imagem
-    def _load_image_thread(self, url: str):
+    def _load_image(self, url: str):
+        """
+        Logo do prefetch, senão do cache em disco (e da rede, se ausente/vencido); a
+        decodificação e o thumbnail rodam fora do loop, o PhotoImage nasce na thread do Tk.
+        """
+        prefetched = get_prefetcher().image(url)
+        if prefetched is not None:
+            self._apply_image(url, prefetched, True)
+            return
+        self._run("image", self._cached_image(url), lambda cached: self._on_cached_image(url, cached))
+
+    @classmethod
+    async def _cached_image(cls, url: str):
+        """(entrada do cache em disco, imagem decodificada), ou None."""
         try:
-            import requests
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
-            img_data = resp.content
-            img = Image.open(BytesIO(img_data))
-            img.thumbnail((120, 120))
-            tk_img = ImageTk.PhotoImage(img)
-
-            def _apply():
-                self._tk_image = tk_img
-                self.img_label.configure(image=self._tk_image, text="")
-
-            self.after(0, _apply)
+            entry = await asyncio.to_thread(get_store().get, image_key(url))
+            if entry is None:
+                return None
+            return entry, await asyncio.to_thread(cls._decode_image, entry.data)
         except Exception:
-            def _fail():
+            return None
+
+    def _on_cached_image(self, url: str, cached):
+        entry = None
+        if cached is not None:
+            entry, img = cached
+            self._apply_image(url, img, entry.fresh())
+            if entry.fresh():
+                return
+        # sem rede, fica o logo em cache (se houver)
+        self._run("image", self._fetch_image(url, entry),
+                  lambda img: self._apply_image(url, img, True),
+                  lambda _e: self._apply_image(url, None, True))
+
+    @classmethod
+    async def _fetch_image(cls, url: str, entry):
+        """Logo da rede, gravado no cache em disco. None se for o mesmo do cache (nada a redesenhar)."""
+        img_data = await async_coingecko.get_async_client().get_bytes(url)
+        try:
+            stored = await asyncio.to_thread(get_store().put, image_key(url), img_data, ASSET_TTL_IMAGE)
+        except Exception:
+            stored = None
+        if entry is not None and stored is not None and stored.digest == entry.digest:
+            return None
+        return await asyncio.to_thread(cls._decode_image, img_data)
+
+    @staticmethod
+    def _decode_image(data: bytes):
+        img = Image.open(BytesIO(data))
+        img.thumbnail((120, 120))
+        img.load()
+        return img
+
+    def _apply_image(self, url: str, img, done: bool):
+        """Na thread do Tk: cria o PhotoImage, guarda no LRU e exibe se ainda for o logo atual."""
+        if done:
+            self._images_loading.discard(url)
+        if img is None:
+            if url == self._image_url and self._images.get(url) is None:
                 self.img_label.configure(image=None, text="(imagem não disponível)")
                 self._tk_image = None
-            self.after(0, _fail)
+            return
+        tk_img = ImageTk.PhotoImage(img)
+        self._images.put(url, tk_img)
+        if url == self._image_url:
+            self._show_image(tk_img)
+
+    def _show_image(self, tk_img):
+        self._tk_image = tk_img
+        self.img_label.configure(image=self._tk_image, text="")
 
     # Links
     def open_homepage(self):
@@ -2,17 +2,31 @@
 """
 GraphFrame: exibe gráfico tipo corretora (candlesticks) com histórico salvo no DB
 e atualização ao vivo por polling. Usa mplfinance + matplotlib + customtkinter.
+No modo ao vivo só o candle em formação é redesenhado (blitting, ver ui/live_chart.py).
+
+Rede e leitura do banco rodam em um executor de fundo; só a série de candles
+pronta volta para a thread do Tk. Cada recarga recebe uma geração: resultados
+de uma moeda/timeframe que o usuário já trocou são descartados.
 """
 
-import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Optional, Tuple
+
 import customtkinter as ctk
 import pandas as pd
-import mplfinance as mpf
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
-from src.services import persistence, coingecko
-from src.config import DEFAULT_COINS
+from src.services import backfill, persistence
+from src.services.downsample import downsample
+from src.services.candles import TIMEFRAME_MS, CandleEngine, CandleSeries
+from src.services.price_feed import get_feed
+from src.services.writer import get_writer
+from src.ui.live_chart import LiveCandleChart
+from src.config import (
+    DEFAULT_COINS, DOWNSAMPLE_METHOD, MAX_CHART_CANDLES, MAX_HISTORY_ROWS, OVERVIEW_BUCKETS_PER_PIXEL,
+)
 
 TF_MAP = {
     "1m": "1T",
@@ -30,7 +44,18 @@ class GraphFrame(ctk.CTkFrame):
         self.controller = controller
 
         self._live = False
-        self._after_id = None
+        # candles incrementais: recarga completa só ao trocar moeda/timeframe ou no refresh manual
+        self._candles = CandleEngine()
+        self._series_key = None
+        # linha de fallback (ts, preços) enquanto não há candle fechado; o live acrescenta os ticks nela,
+        # limitada aos últimos MAX_CHART_CANDLES pontos, e só atualiza os dados da Line2D desenhada
+        self._line: Optional[Tuple[Deque[int], Deque[float]]] = None
+        self._line_artist = None
+        # pipeline de fundo: uma thread basta (as recargas são sequenciais)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graph")
+        self._generation = 0
+        self._loading: Optional[int] = None
+        self._overview = False
 
         # Vars
         self.selected_coin = ctk.StringVar(value=(DEFAULT_COINS[0] if DEFAULT_COINS else "bitcoin"))
@@ -60,6 +85,7 @@ class GraphFrame(ctk.CTkFrame):
         self.btn_start.pack(side="left", padx=15)
 
         ctk.CTkButton(top, text="Atualizar Agora", command=self.manual_refresh, width=130).pack(side="left", padx=5)
+        ctk.CTkButton(top, text="Visão Geral", command=self.show_overview, width=110).pack(side="left", padx=5)
         ctk.CTkButton(top, text="Voltar", command=lambda: controller.show_frame("Dashboard"), width=80).pack(side="right")
 
         # Matplotlib figure and canvas
@@ -67,104 +93,214 @@ class GraphFrame(ctk.CTkFrame):
         self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
         self.canvas.get_tk_widget().pack(fill="both", expand=True, padx=12, pady=(0, 12))
+        self.chart = LiveCandleChart(self.fig, self.ax, self.canvas)
 
         # Status label
         self.status = ctk.CTkLabel(self, text="", text_color="#00aaff", anchor="w", font=ctk.CTkFont(size=14))
         self.status.pack(fill="x", padx=12, pady=(0, 12))
 
-        self.draw_chart()
+        # troca de moeda/timeframe recarrega em segundo plano
+        self.selected_coin.trace_add("write", lambda *_: self.draw_chart())
+        self.tf_var.trace_add("write", lambda *_: self.draw_chart())
 
-    # Data helpers
-    def _load_history_df(self, coin_id: str, lookback_hours: int = 24, max_rows: int = 5000) -> pd.DataFrame:
-        rows = persistence.get_price_history(coin_id, limit=max_rows)
-        if not rows:
-            return pd.DataFrame()
-
-        records = []
-        for r in rows:
-            ts = r.get("timestamp")
-            try:
-                dt = pd.to_datetime(ts)
-            except Exception:
-                try:
-                    dt = pd.to_datetime(r.get("timestamp", ""))
-                except Exception:
-                    continue
-            price = None
-            d = r.get("data") or {}
-            if isinstance(d, dict):
-                price = d.get("usd")
-            try:
-                price = float(price) if price is not None else None
-            except Exception:
-                price = None
-            if price is None:
-                continue
-            records.append({"dt": dt, "price": price})
+        # a tela é construída no primeiro acesso: pinta antes de disparar a primeira carga
+        self.after_idle(self.draw_chart)
 
-        if not records:
-            return pd.DataFrame()
+    def on_close(self):
+        """Chamado pelo App ao fechar: desliga o live e descarta recargas pendentes."""
+        if self._live:
+            self.stop_live()
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
-        df = pd.DataFrame(records).drop_duplicates(subset="dt").set_index("dt").sort_index()
-        return df
+    def _marshal(self, fn, *args):
+        """Agenda `fn` na thread do Tk (chamado a partir de threads de fundo)."""
+        try:
+            self.after(0, fn, *args)
+        except Exception:
+            pass  # janela já destruída
 
-    def _make_ohlc(self, df_price: pd.DataFrame, timeframe: str = "5m") -> pd.DataFrame:
-        if df_price.empty:
-            return pd.DataFrame()
+    def _current(self) -> Tuple[str, str]:
+        coin = self.selected_coin.get().lower()
+        tf = self.tf_var.get() if self.tf_var.get() in TF_MAP else "5m"
+        return coin, tf
 
-        rule = TF_MAP.get(timeframe, "5T")
-        ohlc = df_price['price'].resample(rule).ohlc()
-        ohlc['volume'] = 0
-        ohlc = ohlc.dropna()
-        return ohlc
+    def _plot_width(self) -> int:
+        """Largura da área do gráfico em pixels (limite de pontos úteis de uma linha)."""
+        return max(100, int(self.ax.bbox.width))
 
-    # Plotting
-    def draw_chart(self):
-        coin = self.selected_coin.get().lower()
-        tf = self.tf_var.get()
-        self.status.configure(text=f"Carregando histórico para {coin} ({tf})...")
-        df_price = self._load_history_df(coin)
-        if df_price.empty:
+    def _submit(self, fn, args: tuple, on_ready, *ready_args):
+        """Nova geração: roda `fn(*args)` no executor e entrega o future a `on_ready` na thread do Tk."""
+        self._generation += 1
+        gen = self._loading = self._generation
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            return  # executor encerrado (app fechando)
+        future.add_done_callback(lambda f: self._marshal(on_ready, gen, *ready_args, f))
+
+    # Data helpers
+    def _load_history_df(self, coin_id: str, lookback_hours: int = 24, max_rows: int = MAX_HISTORY_ROWS,
+                         fiat: str = "usd") -> pd.DataFrame:
+        start_ms = persistence.now_ms() - lookback_hours * 3_600_000
+        df = persistence.load_price_frame(coin_id, fiat=fiat, limit=max_rows, start_ms=start_ms)
+
+        # inclui ticks ainda na fila do writer (não gravados no banco)
+        pending = [(ts, payload.get(fiat)) for ts, payload in get_writer().pending(coin_id)
+                   if payload.get(fiat) is not None]
+        if pending:
+            extra = pd.DataFrame({"price": [float(p) for _, p in pending]},
+                                 index=pd.to_datetime([ts for ts, _ in pending], unit="ms"))
+            extra.index.name = "dt"
+            df = pd.concat([df, extra]) if not df.empty else extra
+            df = df[~df.index.duplicated(keep="first")].sort_index()
+        return df
+
+    def _load_series(self, coin: str, tf: str) -> CandleSeries:
+        """Candles do timeframe lidos da tabela de rollup + ticks ainda na fila do writer."""
+        series = CandleSeries(TIMEFRAME_MS[tf], self._candles.max_candles)
+        series.load(*persistence.load_candles(coin, tf, limit=MAX_CHART_CANDLES))
+        for ts, payload in get_writer().pending(coin):
+            if payload.get("usd") is not None:
+                series.update(ts, float(payload["usd"]))
+        return series
+
+    def _build_series(self, coin: str, tf: str, fetch: bool, width: int) -> Tuple[CandleSeries, Optional[tuple]]:
+        """
+        Roda no executor: completa o histórico do lookback do timeframe (backfill, no máximo uma
+        requisição), busca o preço atual (se pedido), lê os candles e, se forem poucos, os ticks.
+        """
+        try:
+            backfill.backfill(coin, tf)
+        except Exception:
+            pass  # sem rede/limite de taxa: mostra o que já está no banco
+        if fetch:
+            try:
+                get_feed().fetch([coin], ["usd"])
+            except Exception:
+                pass
+        series = self._load_series(coin, tf)
+        if not len(series) and not fetch:
             try:
-                raw = coingecko.get_prices([coin], ["usd"])
+                raw = get_feed().fetch([coin], ["usd"])
                 if raw and coin in raw:
-                    persistence.save_price(coin, raw[coin])
-                    df_price = self._load_history_df(coin)
+                    series = self._load_series(coin, tf)
             except Exception:
                 pass
+        line = None
+        if len(series) == 1:
+            df = self._load_history_df(coin)
+            if not df.empty:
+                ts = df.index.values.astype("datetime64[ms]").astype("int64")
+                line = downsample(ts, df["price"].to_numpy(), width, DOWNSAMPLE_METHOD)
+        return series, line
+
+    def _build_overview(self, coin: str, width: int) -> Tuple[int, tuple]:
+        """
+        Roda no executor: histórico completo agregado no SQLite (mín./máx. por bucket, poucos
+        pontos por coluna de pixel) e reduzido à largura do canvas com minmax/LTTB.
+        """
+        total, ts, prices = persistence.load_price_buckets(coin, OVERVIEW_BUCKETS_PER_PIXEL * width)
+        return total, downsample(ts, prices, width, DOWNSAMPLE_METHOD)
+
+    # Plotting
+    def draw_chart(self, fetch: bool = False):
+        """Recarga completa em segundo plano; o desenho acontece em `_on_series_ready`."""
+        coin, tf = self._current()
+        self._overview = False
+        self.status.configure(text=f"Carregando histórico para {coin} ({tf})...")
+        self._submit(self._build_series, (coin, tf, fetch, self._plot_width()), self._on_series_ready, coin, tf)
+
+    def show_overview(self):
+        """Visão geral: todo o histórico salvo da moeda em linha (pontos limitados à largura do canvas)."""
+        coin, _tf = self._current()
+        self.status.configure(text=f"Carregando visão geral de {coin}...")
+        self._submit(self._build_overview, (coin, self._plot_width()), self._on_overview_ready, coin)
 
-        if df_price.empty:
+    def _on_overview_ready(self, gen: int, coin: str, future):
+        if gen != self._generation or future.cancelled():
+            return
+        self._loading = None
+        try:
+            total, (ts, prices) = future.result()
+        except Exception as e:
+            self.status.configure(text=f"Erro ao carregar histórico: {e}")
+            return
+        if not total:
+            self.status.configure(text="Sem dados históricos.")
+            return
+        self._overview = True
+        self._series_key = None
+        self._line = None
+        self._plot_line(ts, prices, f"{coin.upper()} - Preço (USD) - visão geral")
+        self.status.configure(text=f"Visão geral: {total:,} ticks, {len(ts):,} pontos desenhados.")
+
+    def _plot_line(self, ts, prices, title: str):
+        self.chart.reset()
+        self.ax.clear()
+        (self._line_artist,) = self.ax.plot(pd.to_datetime(ts, unit="ms"), prices, linewidth=1)
+        self.ax.set_title(title)
+        self.fig.autofmt_xdate(rotation=30)
+        self.canvas.draw_idle()
+
+    def _on_series_ready(self, gen: int, coin: str, tf: str, future):
+        if gen != self._generation or future.cancelled():
+            return  # moeda/timeframe mudou enquanto carregava
+        self._loading = None
+        try:
+            series, line = future.result()
+        except Exception as e:
+            self.status.configure(text=f"Erro ao carregar histórico: {e}")
+            return
+        self._candles.drop(coin)
+        self._candles.put(coin, tf, series)
+        self._line = None
+
+        if not len(series):
+            self._series_key = None
+            self.chart.reset()
             self.ax.clear()
             self.ax.text(0.5, 0.5, "Sem histórico disponível", ha="center", va="center")
             self.canvas.draw_idle()
             self.status.configure(text="Sem dados históricos.")
             return
 
-        ohlc = self._make_ohlc(df_price, timeframe=tf)
-        if ohlc.empty:
-            self.ax.clear()
-            df_plot = df_price.copy()
-            df_plot = df_plot.last("200")
-            self.ax.plot(df_plot.index, df_plot['price'])
-            self.ax.set_title(f"{coin.upper()} - Preço (USD) - linha (fallback)")
-            self.fig.autofmt_xdate(rotation=30)
-            self.canvas.draw_idle()
+        self._series_key = (coin, tf)
+        if not self.chart.can_render(series):
+            # um candle só não diz muito: mostra os ticks das últimas 24h em linha
+            if line is None:
+                start, _o, _h, _l, close = series.last()
+                line = ([start], [close])
+            self._line = (deque(line[0], maxlen=MAX_CHART_CANDLES), deque(line[1], maxlen=MAX_CHART_CANDLES))
+            self._plot_line(list(self._line[0]), list(self._line[1]), self._line_title(coin))
             self.status.configure(text="Dados insuficientes para candles; mostrando linha.")
             return
 
-        self.ax.clear()
-        mpf.plot(
-            ohlc,
-            type='candle',
-            ax=self.ax,
-            volume=False,
-            show_nontrading=False,
-            style='charles',
-            datetime_format='%Y-%m-%d %H:%M'
-        )
-        self.ax.set_title(f"{coin.upper()} - Candles {tf}")
+        self._render_candles(coin, tf)
+
+    def _extend_line(self):
+        """Troca só os dados da linha já desenhada (sem limpar o eixo) e reescala."""
+        ts, prices = self._line
+        self._line_artist.set_data(pd.to_datetime(list(ts), unit="ms"), list(prices))
+        self.ax.relim()
+        self.ax.autoscale_view()
         self.canvas.draw_idle()
-        self.status.configure(text=f"Último: {ohlc.index[-1].strftime('%Y-%m-%d %H:%M:%S')}")
+
+    @staticmethod
+    def _line_title(coin: str) -> str:
+        return f"{coin.upper()} - Preço (USD) - linha (fallback)"
+
+    def _render_candles(self, coin: str, tf: str, incremental: bool = False):
+        series = self._candles.get(coin, tf)
+        title = f"{coin.upper()} - Candles {tf}"
+        if incremental:
+            self.chart.update(series, title)
+        else:
+            self.chart.render(series, title)
+        last = pd.Timestamp(series.start[-1], unit="ms")
+        timer = self.chart.timer
+        self.status.configure(
+            text=f"Último: {last.strftime('%Y-%m-%d %H:%M:%S')} | quadro {timer.last_ms:.1f} ms ({timer.last_kind})"
+        )
 
     # Live control
     def toggle_live(self):
@@ -176,56 +312,57 @@ class GraphFrame(ctk.CTkFrame):
     def start_live(self):
         self._live = True
         self.btn_start.configure(text="Stop Live")
-        self._schedule_next_update(delay_ms=200)
+        # o feed junta esta moeda com as do dashboard em uma única chamada por tick
+        get_feed().subscribe("GraphFrame", [self.selected_coin.get().lower()], ["usd"],
+                             callback=lambda data: self._marshal(self._live_worker, data),
+                             interval=self._poll_seconds())
 
     def stop_live(self):
         self._live = False
         self.btn_start.configure(text="Start Live")
-        self._cancel_scheduled_update()
-
-    def _schedule_next_update(self, delay_ms: int | None = None):
-        if delay_ms is None:
-            delay_ms = max(1, int(self.poll_interval.get())) * 1000
-        self._cancel_scheduled_update()
-        self._after_id = self.after(delay_ms, self._live_worker)
-
-    def _cancel_scheduled_update(self):
-        if self._after_id is not None:
-            try:
-                self.after_cancel(self._after_id)
-            except Exception:
-                pass
-            finally:
-                self._after_id = None
+        get_feed().unsubscribe("GraphFrame")
 
-    def _live_worker(self):
-        coin = self.selected_coin.get().lower()
+    def _poll_seconds(self) -> int:
         try:
-            data = coingecko.get_prices([coin], ["usd"])
-            if data and coin in data:
-                try:
-                    persistence.save_price(coin, data[coin])
-                except Exception:
-                    pass
+            return max(1, int(self.poll_interval.get()))
         except Exception:
-            pass
+            return 10
 
+    def _live_worker(self, data):
+        """Roda na thread do Tk com o resultado do feed (rede e gravação já feitas na thread do feed)."""
+        if not self._live:
+            return
+        coin, tf = self._current()
+        # acompanha troca de moeda/intervalo feita com o live ligado
+        get_feed().update("GraphFrame", coins=[coin], interval=self._poll_seconds())
         try:
-            self.draw_chart()
-        except Exception:
-            pass
-
-        if self._live:
-            interval_ms = max(1, int(self.poll_interval.get())) * 1000
-            self._schedule_next_update(delay_ms=interval_ms)
+            if self._overview:
+                return  # visão geral é estática; ticks seguem gravados pelo feed
+            price = (data.get(coin) or {}).get("usd")
+            if self._series_key != (coin, tf):
+                if self._loading is None:
+                    self.draw_chart()
+                return
+            if price is None:
+                return
+            ts = persistence.now_ms()
+            # só o candle em formação muda: O(1) por tick
+            self._candles.update(coin, ts, float(price))
+            if self._line is not None:
+                if not self.chart.can_render(self._candles.get(coin, tf)):
+                    # ainda sem candle fechado: segue na linha, com o tick novo no fim
+                    self._line[0].append(ts)
+                    self._line[1].append(float(price))
+                    self._extend_line()
+                    self.status.configure(text="Dados insuficientes para candles; mostrando linha.")
+                    return
+                self._line = None  # o primeiro candle fechou: passa para os candles
+                self._render_candles(coin, tf)
+                return
+            self._render_candles(coin, tf, incremental=True)
+        except Exception as e:
+            self.status.configure(text=f"Erro no modo ao vivo: {e}")
 
     # Manual refresh
     def manual_refresh(self):
-        coin = self.selected_coin.get().lower()
-        try:
-            data = coingecko.get_prices([coin], ["usd"])
-            if data and coin in data:
-                persistence.save_price(coin, data[coin])
-        except Exception:
-            pass
-        self.draw_chart()
+        self.draw_chart(fetch=True)
@@ -0,0 +1,211 @@
+# src/ui/live_chart.py
+"""
+Renderização de candles com blitting para o modo ao vivo.
+
+O desenho completo (eixos, grade, candles fechados) é feito uma vez pelo
+mplfinance e guardado como fundo (`copy_from_bbox`). A cada tick só o candle em
+formação e o marcador do último preço — artistas `animated` — são redesenhados
+sobre esse fundo e enviados com `canvas.blit`. O redesenho completo só acontece
+quando a moeda, o timeframe ou o eixo x mudam (candle novo), ou quando o preço
+sai da faixa vertical visível.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import numpy as np
+import mplfinance as mpf
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+
+from src.services.candles import CandleSeries
+
+CHART_STYLE = "charles"
+Y_MARGIN = 0.05  # folga vertical (fração da faixa) para o candle em formação caber sem redesenho completo
+
+
+class FrameTimer:
+    """Tempo de quadro (ms) por tipo de redesenho: último, média das últimas N e pior caso."""
+
+    def __init__(self, window: int = 120):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._max: Dict[str, float] = {}
+        self._count: Dict[str, int] = {}
+        self.last_kind: Optional[str] = None
+        self.last_ms = 0.0
+
+    @contextmanager
+    def measure(self, kind: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, (time.perf_counter() - start) * 1000)
+
+    def record(self, kind: str, ms: float) -> None:
+        self._samples.setdefault(kind, deque(maxlen=self.window)).append(ms)
+        self._max[kind] = max(self._max.get(kind, 0.0), ms)
+        self._count[kind] = self._count.get(kind, 0) + 1
+        self.last_kind, self.last_ms = kind, ms
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            kind: {
+                "frames": self._count[kind],
+                "last_ms": samples[-1],
+                "avg_ms": sum(samples) / len(samples),
+                "max_ms": self._max[kind],
+            }
+            for kind, samples in self._samples.items()
+        }
+
+
+class LiveCandleChart:
+    """Desenha uma CandleSeries em `ax`; `update` usa blitting sempre que possível."""
+
+    def __init__(self, fig, ax, canvas, style: str = CHART_STYLE,
+                 datetime_format: str = "%Y-%m-%d %H:%M"):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.style = style
+        self.datetime_format = datetime_format
+        colors = mpf.make_mpf_style(base_mpf_style=style)["marketcolors"]
+        self._up, self._down = colors["candle"]["up"], colors["candle"]["down"]
+        self.timer = FrameTimer()
+        self._bg = None
+        self._key = None
+        self._title = ""
+        self._width = 0.6
+        self._body: Optional[Rectangle] = None
+        self._wick: Optional[Line2D] = None
+        self._price_line: Optional[Line2D] = None
+        self._price_text = None
+        # redesenhos completos (inclusive resize) recapturam o fundo
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def reset(self) -> None:
+        """Esquece o estado de blitting (chamar quando o eixo for usado para outro desenho)."""
+        self._key = None
+        self._bg = None
+        self._body = self._wick = self._price_line = self._price_text = None
+
+    # ---------- desenho ----------
+    @staticmethod
+    def can_render(series: CandleSeries) -> bool:
+        """Há ao menos um candle fechado (o em formação sozinho vira um gráfico vazio)."""
+        return len(series) >= 2
+
+    def render(self, series: CandleSeries, title: str) -> None:
+        """Redesenho completo: candles fechados via mplfinance + artistas animados do candle atual."""
+        if not self.can_render(series):
+            raise ValueError("é preciso ao menos um candle fechado para desenhar candles")
+        with self.timer.measure("full"):
+            self.reset()
+            self._title = title
+            ohlc = series.to_frame()
+            # o candle em formação entra como NaN: o mplfinance reserva a posição e o rótulo do eixo x,
+            # mas quem o desenha são os artistas animados
+            ohlc.iloc[-1, :4] = np.nan
+            width_config: Dict[str, Any] = {}
+            self.ax.clear()
+            mpf.plot(
+                ohlc,
+                type='candle',
+                ax=self.ax,
+                volume=False,
+                show_nontrading=False,
+                style=self.style,
+                datetime_format=self.datetime_format,
+                return_width_config=width_config,
+                warn_too_much_data=len(ohlc) + 1,
+            )
+            self._width = float(width_config.get("candle_width", self._width))
+            self.ax.set_title(title)
+            self._set_ylim(series)
+            self._make_artists(width_config.get("candle_linewidth", 1.0))
+            self._set_forming(series)
+            self._key = self._series_key(series)
+            # draw síncrono: o draw_event captura o fundo e pinta os artistas animados
+            self.canvas.draw()
+
+    def update(self, series: CandleSeries, title: Optional[str] = None) -> str:
+        """
+        Atualiza após um tick. Retorna "blit" ou "full" (conforme o caminho usado);
+        `title` vale para o redesenho completo (padrão: o do último `render`).
+        """
+        if not self._can_blit(series):
+            self.render(series, title or self._title)
+            return "full"
+        with self.timer.measure("blit"):
+            self.canvas.restore_region(self._bg)
+            self._set_forming(series)
+            self._draw_animated()
+            self.canvas.blit(self.ax.bbox)
+        return "blit"
+
+    def frame_stats(self) -> Dict[str, Dict[str, float]]:
+        return self.timer.stats()
+
+    # ---------- internos ----------
+    @staticmethod
+    def _series_key(series: CandleSeries):
+        return len(series), series.start[0], series.start[-1], series.tf_ms
+
+    def _can_blit(self, series: CandleSeries) -> bool:
+        if self._bg is None or self._body is None or not len(series):
+            return False
+        if self._series_key(series) != self._key:
+            return False  # candle novo (ou série trocada): o eixo x mudou
+        _start, _o, high, low, _c = series.last()
+        y0, y1 = self.ax.get_ylim()
+        return y0 <= low and high <= y1
+
+    def _set_ylim(self, series: CandleSeries) -> None:
+        low = min(series.low)
+        high = max(series.high)
+        pad = (high - low) * Y_MARGIN or abs(high) * Y_MARGIN or 1.0
+        self.ax.set_ylim(low - pad, high + pad)
+
+    def _make_artists(self, linewidth: float) -> None:
+        self._wick = Line2D([], [], linewidth=linewidth, animated=True)
+        self._body = Rectangle((0, 0), self._width, 0, linewidth=linewidth, animated=True)
+        self._price_line = Line2D([], [], linewidth=0.8, linestyle="--", animated=True)
+        self._price_text = self.ax.text(
+            0.005, 0, "", transform=self.ax.get_yaxis_transform(), ha="left", va="bottom",
+            fontsize=8, color="white", animated=True,
+            bbox=dict(boxstyle="round,pad=0.2", linewidth=0),
+        )
+        self.ax.add_line(self._wick)
+        self.ax.add_patch(self._body)
+        self.ax.add_line(self._price_line)
+
+    def _set_forming(self, series: CandleSeries) -> None:
+        _start, open_, high, low, close = series.last()
+        x = len(series) - 1
+        color = self._up if close >= open_ else self._down
+        self._wick.set_data([x, x], [low, high])
+        self._wick.set_color(color)
+        self._body.set_xy((x - self._width / 2, min(open_, close)))
+        self._body.set_height(abs(close - open_))
+        self._body.set_facecolor(color)
+        self._body.set_edgecolor(color)
+        x0, x1 = self.ax.get_xlim()
+        self._price_line.set_data([x0, x1], [close, close])
+        self._price_line.set_color(color)
+        self._price_text.set_y(close)
+        self._price_text.set_text(f"{close:,.2f}")
+        self._price_text.get_bbox_patch().set_facecolor(color)
+
+    def _draw_animated(self) -> None:
+        for artist in (self._price_line, self._wick, self._body, self._price_text):
+            self.ax.draw_artist(artist)
+
+    def _on_draw(self, _event) -> None:
+        if self._body is None:
+            return
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_animated()
@@ -0,0 +1,255 @@
+# src/ui/price_grid.py
+"""
+Tabela de preços virtualizada da tela principal.
+
+Só existem widgets para as linhas visíveis: um pool de linhas (frame + 4 labels)
+é reaproveitado conforme a rolagem, então o custo de criar a tela não depende do
+tamanho da watchlist. Os preços ficam no `GridModel` (sem Tk); cada atualização
+marca como sujas apenas as moedas cujo valor mudou, e o repaint acontece em um
+único `after_idle`, reconfigurando só as células cujo texto ou cor mudou.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import customtkinter as ctk
+
+COLUMNS = (("Moeda", 120), ("USD", 120), ("BRL", 120), ("Variação 24h", 120))
+ROW_HEIGHT = 32  # altura de uma linha (label de 28 px + pady)
+COLOR_UP = "#00FF00"
+COLOR_DOWN = "#FF3300"
+COLOR_EMPTY = "#AAAAAA"
+
+# célula = (texto, cor); cor None = cor padrão do tema
+Cell = Tuple[str, Optional[str]]
+
+
+def format_row(coin: str, info: Optional[Dict[str, Any]]) -> Tuple[Cell, ...]:
+    """Textos/cores das quatro colunas de uma moeda (mesmo formato da tela antiga)."""
+    info = info or {}
+    usd = info.get("usd")
+    brl = info.get("brl")
+    change = info.get("usd_24h_change")
+    if change is not None:
+        change_cell = (f"{change:+.2f}%", COLOR_UP if change >= 0 else COLOR_DOWN)
+    else:
+        change_cell = ("--", COLOR_EMPTY)
+    return (
+        (coin.capitalize(), None),
+        (f"${usd:,.2f}" if usd is not None else "--", None),
+        (f"R${brl:,.2f}" if brl is not None else "--", None),
+        change_cell,
+    )
+
+
+class GridModel:
+    """
+    Estado da tabela sem widgets: ordem das moedas, último preço de cada uma,
+    janela visível e o conjunto de linhas visíveis que precisam ser repintadas.
+    """
+
+    def __init__(self, coins: Iterable[str] = ()):
+        self.coins: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.prices: Dict[str, Dict[str, Any]] = {}
+        self.top = 0
+        self.visible = 0
+        self.dirty: Set[str] = set()
+        self.set_coins(coins)
+
+    def set_coins(self, coins: Iterable[str]) -> None:
+        self.coins = list(dict.fromkeys(coins))
+        self.index = {coin: i for i, coin in enumerate(self.coins)}
+        self.prices = {coin: info for coin, info in self.prices.items() if coin in self.index}
+        self.top = min(self.top, self.max_top())
+        self.dirty = set(self.window())
+
+    def max_top(self) -> int:
+        return max(0, len(self.coins) - self.visible)
+
+    def window(self) -> List[str]:
+        return self.coins[self.top:self.top + self.visible]
+
+    def is_visible(self, coin: str) -> bool:
+        i = self.index.get(coin)
+        return i is not None and self.top <= i < self.top + self.visible
+
+    def update(self, data: Dict[str, Dict[str, Any]], replace: bool = True) -> int:
+        """
+        Guarda os preços novos e marca como sujas as moedas visíveis que mudaram.
+        replace=True: moedas da watchlist ausentes em `data` voltam a "--" (como um refresh completo).
+        Retorna quantas moedas mudaram (visíveis ou não).
+        """
+        changed = 0
+        for coin, info in data.items():
+            if coin in self.index and self.prices.get(coin) != info:
+                self.prices[coin] = dict(info)  # cópia: o chamador pode reaproveitar o dict
+                changed += 1
+                if self.is_visible(coin):
+                    self.dirty.add(coin)
+        if replace:
+            for coin in self.prices.keys() - data.keys():
+                del self.prices[coin]
+                changed += 1
+                if self.is_visible(coin):
+                    self.dirty.add(coin)
+        return changed
+
+    def scroll_to(self, top: int) -> bool:
+        """Move a janela visível; as linhas que entraram ficam sujas. Retorna False se não mudou."""
+        top = max(0, min(int(top), self.max_top()))
+        if top == self.top:
+            return False
+        self.top = top
+        self.dirty = set(self.window())
+        return True
+
+    def resize(self, visible: int) -> None:
+        self.visible = max(0, visible)
+        self.top = min(self.top, self.max_top())
+        self.dirty = set(self.window())
+
+    def take_dirty(self) -> List[Tuple[int, str]]:
+        """(posição na janela, moeda) das linhas a repintar; esvazia o conjunto."""
+        rows = [(self.index[coin] - self.top, coin) for coin in self.dirty if self.is_visible(coin)]
+        self.dirty = set()
+        return sorted(rows)
+
+
+class _PoolRow:
+    """Uma linha de widgets reaproveitável; lembra o que está mostrando para só reconfigurar o que mudou."""
+
+    def __init__(self, parent):
+        self.frame = ctk.CTkFrame(parent, height=ROW_HEIGHT - 4)
+        self.labels = []
+        for _, width in COLUMNS:
+            label = ctk.CTkLabel(self.frame, text="", width=width, anchor="w")
+            label.pack(side="left", padx=5)
+            self.labels.append(label)
+        self.default_color = self.labels[0].cget("text_color")
+        self.cells: List[Optional[Cell]] = [None] * len(COLUMNS)
+        self.coin: Optional[str] = None
+
+    def show(self, coin: str, cells: Tuple[Cell, ...]) -> int:
+        """Aplica as células que mudaram; retorna quantos widgets foram reconfigurados."""
+        self.coin = coin
+        configured = 0
+        for i, cell in enumerate(cells):
+            if self.cells[i] == cell:
+                continue
+            text, color = cell
+            self.labels[i].configure(text=text, text_color=color or self.default_color)
+            self.cells[i] = cell
+            configured += 1
+        return configured
+
+    def widgets(self) -> list:
+        return [self.frame] + self.labels
+
+
+class PriceGrid(ctk.CTkFrame):
+    """Cabeçalho + corpo rolável com pool de linhas; `update_prices` é barato para watchlists grandes."""
+
+    def __init__(self, parent, coins: Iterable[str] = (), row_height: int = ROW_HEIGHT):
+        super().__init__(parent)
+        self.row_height = row_height
+        self.model = GridModel(coins)
+        self._pool: List[_PoolRow] = []
+        self._repaint_id: Optional[str] = None
+        # widgets reconfigurados / repaints (para medir o custo das atualizações)
+        self.stats = {"repaints": 0, "configured": 0, "pool_rows": 0}
+
+        header = ctk.CTkFrame(self)
+        header.pack(fill="x", pady=(0, 8))
+        for title, width in COLUMNS:
+            ctk.CTkLabel(header, text=title, width=width, anchor="w").pack(side="left", padx=5)
+
+        area = ctk.CTkFrame(self, fg_color="transparent")
+        area.pack(fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(area, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = ctk.CTkFrame(area, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.grid_columnconfigure(0, weight=1)
+        self.body.grid_propagate(False)  # o pool acompanha a altura do corpo, não o contrário
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.body)
+
+    # ---------- API ----------
+    def set_coins(self, coins: Iterable[str]) -> None:
+        self.model.set_coins(coins)
+        self._layout()
+
+    def update_prices(self, data: Dict[str, Dict[str, Any]], replace: bool = True) -> int:
+        """Registra os preços e agenda um repaint (um só por ciclo ocioso). Retorna quantas moedas mudaram."""
+        changed = self.model.update(data, replace)
+        if self.model.dirty:
+            self._schedule_repaint()
+        return changed
+
+    def scroll_to(self, top: int) -> None:
+        if self.model.scroll_to(top):
+            self._update_scrollbar()
+            self._schedule_repaint()
+
+    # ---------- pool / layout ----------
+    def _on_resize(self, event) -> None:
+        visible = max(1, math.ceil(event.height / self.row_height))
+        if visible != self.model.visible:
+            self.model.resize(visible)
+            self._layout()
+
+    def _layout(self) -> None:
+        """Cria linhas no pool até cobrir a área visível e esconde as que sobram."""
+        needed = min(self.model.visible, len(self.model.coins))
+        while len(self._pool) < needed:
+            row = _PoolRow(self.body)
+            for widget in row.widgets():
+                self._bind_wheel(widget)
+            self._pool.append(row)
+        self.stats["pool_rows"] = len(self._pool)
+        for i, row in enumerate(self._pool):
+            if i < needed:
+                row.frame.grid(row=i, column=0, sticky="ew", pady=2)
+            else:
+                row.frame.grid_remove()
+                row.coin = None
+        self._update_scrollbar()
+        self._schedule_repaint()
+
+    def _schedule_repaint(self) -> None:
+        if self._repaint_id is None:
+            self._repaint_id = self.after_idle(self._repaint)
+
+    def _repaint(self) -> None:
+        self._repaint_id = None
+        self.stats["repaints"] += 1
+        prices = self.model.prices
+        for pos, coin in self.model.take_dirty():
+            if pos < len(self._pool):
+                self.stats["configured"] += self._pool[pos].show(coin, format_row(coin, prices.get(coin)))
+
+    # ---------- rolagem ----------
+    def _update_scrollbar(self) -> None:
+        total = len(self.model.coins)
+        if total <= self.model.visible or total == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.model.top / total, (self.model.top + self.model.visible) / total)
+
+    def _on_scrollbar(self, action, value, unit=None) -> None:
+        if action == "moveto":
+            self.scroll_to(round(float(value) * len(self.model.coins)))
+        elif action == "scroll":
+            step = self.model.visible if unit == "pages" else 1
+            self.scroll_to(self.model.top + int(value) * step)
+
+    def _bind_wheel(self, widget) -> None:
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", lambda _e: self.scroll_to(self.model.top - 3), add="+")
+        widget.bind("<Button-5>", lambda _e: self.scroll_to(self.model.top + 3), add="+")
+
+    def _on_wheel(self, event) -> None:
+        # Windows: múltiplos de 120; macOS: valores pequenos
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.model.top - 3 * delta)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# permite `pytest` direto da raiz (os módulos são importados como src.*)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services import persistence  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Banco SQLite temporário no lugar de src/data/cryptodash.db."""
+    persistence.close_db()
+    monkeypatch.setattr(persistence, "DB_PATH", str(tmp_path / "test.db"))
+    yield persistence.DB_PATH
+    persistence.close_db()
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.async_coingecko import AsyncCoinGeckoClient, AsyncLoop
+from src.services.coingecko import CoinGeckoClient
+from src.services.rate_limit import CircuitBreaker, RateLimiter
+
+
+def _client(fetch) -> AsyncCoinGeckoClient:
+    sync = CoinGeckoClient(base_url="http://stub.invalid", limiter=RateLimiter(per_minute=600, burst=5))
+    client = AsyncCoinGeckoClient(sync, use_aiohttp=False)
+    client._fetch = fetch
+    breaker = client.limiter.breaker
+    breaker.record_failure(force=True)
+    breaker._open_until = time.monotonic() - 0.01  # half-open
+    return client
+
+
+def test_cancelled_probe_is_released():
+    started = asyncio.Event()
+
+    async def slow_fetch(url, params, headers):
+        started.set()
+        await asyncio.sleep(10)
+
+    client = _client(slow_fetch)
+
+    async def scenario():
+        task = asyncio.create_task(client.get_coin_details("bitcoin"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert client.limiter.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.limiter.try_request("teste") == 0  # a tentativa voltou a ficar livre
+
+
+def test_probe_success_closes_breaker():
+    async def ok_fetch(url, params, headers):
+        return 200, {}, b'{"id": "bitcoin"}'
+
+    client = _client(ok_fetch)
+    assert asyncio.run(client.get_coin_details("bitcoin")) == {"id": "bitcoin"}
+    assert client.limiter.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_submit_with_same_key_cancels_previous():
+    loop = AsyncLoop()
+    try:
+        first = loop.submit(asyncio.sleep(10), key="details")
+        second = loop.submit(asyncio.sleep(0, result="ok"), key="details")
+        assert second.result(5) == "ok"
+        assert first.cancelled()
+        assert loop.stats()["superseded"] == 1
+    finally:
+        loop.stop()
+
+
+def test_invalid_json_falls_back_to_stale_entry():
+    bodies = [b'{"id": "bitcoin"}', b"<html>502</html>", b"<html>502</html>"]
+
+    async def fetch(url, params, headers):
+        return 200, {}, bodies.pop(0)
+
+    client = _client(fetch)
+    url = "http://stub.invalid/coins/bitcoin"
+    assert asyncio.run(client._get_json("teste", url, {}, -1)) == {"id": "bitcoin"}  # já nasce vencida
+    assert asyncio.run(client._get_json("teste", url, {}, -1)) == {"id": "bitcoin"}
+    with pytest.raises(Exception, match="Resposta inválida da API"):
+        asyncio.run(client._get_json("teste", "http://stub.invalid/outra", {}, 60))
+
+
+class _FakeWidget:
+    """Só o que a ponte usa: `after` enfileira, `pump` roda como a thread do Tk."""
+
+    def __init__(self):
+        self.calls = []
+        self.alive = True
+
+    def after(self, _ms, fn, *args):
+        self.calls.append((fn, args))
+
+    def winfo_exists(self):
+        return self.alive
+
+    def pump(self):
+        calls, self.calls = self.calls, []
+        for fn, args in calls:
+            fn(*args)
+
+
+def test_to_tk_drops_superseded_and_destroyed():
+    loop = AsyncLoop()
+    widget = _FakeWidget()
+    got = []
+    try:
+        first = loop.submit(asyncio.sleep(0, result="a"), key="details")
+        loop.to_tk(widget, first, got.append, key="details")
+        first.result(5)
+        # já concluído, mas outro pedido da mesma chave chegou antes do Tk entregar
+        second = loop.submit(asyncio.sleep(0, result="b"), key="details")
+        loop.to_tk(widget, second, got.append, key="details")
+        second.result(5)
+        time.sleep(0.05)
+        widget.pump()
+        assert got == ["b"]
+
+        errors = []
+        third = loop.submit(asyncio.sleep(0, result="c"), key="other")
+        loop.to_tk(widget, third, got.append, errors.append, key="other")
+        third.result(5)
+        time.sleep(0.05)
+        widget.alive = False
+        widget.pump()
+        assert got == ["b"] and errors == []
+    finally:
+        loop.stop()
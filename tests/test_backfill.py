@@ -0,0 +1,53 @@
+from src.services import backfill, coingecko, persistence
+
+HOUR = backfill.HOUR_MS
+NOW = 1000 * backfill.DAY_MS
+
+
+def _api(monkeypatch, points):
+    calls = []
+
+    def fake(coin, fiat, start, end):
+        calls.append((start, end))
+        return {"prices": [p for p in points if start <= p[0] <= end]}
+
+    monkeypatch.setattr(coingecko, "get_price_history_range", fake)
+    return calls
+
+
+def test_empty_response_is_not_recorded_as_coverage(temp_db, monkeypatch):
+    calls = _api(monkeypatch, [])
+    assert backfill.backfill("bitcoin", "1m", now=NOW)["inserted"] == 0
+    assert persistence.load_coverage("bitcoin", "usd", backfill.DAY_MS, 0, NOW) == []
+    backfill.backfill("bitcoin", "1m", now=NOW)
+    assert len(calls) == 2  # a faixa vazia é pedida de novo
+
+
+def test_coverage_is_the_returned_span(temp_db, monkeypatch):
+    step = backfill.granularity_ms(backfill.DAY_MS)
+    points = [[NOW - 12 * HOUR + i * step, 100.0 + i] for i in range(10)]
+    _api(monkeypatch, points)
+    backfill.backfill("bitcoin", "1m", now=NOW)
+    assert persistence.load_coverage("bitcoin", "usd", backfill.DAY_MS, 0, NOW) == [(points[0][0], points[-1][0])]
+
+
+def test_backfill_keeps_other_columns_for_latest_price(temp_db, monkeypatch):
+    step = backfill.granularity_ms(backfill.DAY_MS)
+    real_ts = NOW - 2 * HOUR
+    persistence.save_ticks([("bitcoin", real_ts, {"usd": 100.0, "brl": 500.0, "usd_24h_change": 1.5})])
+    # pontos do backfill mais novos que o tick real, só com usd
+    points = [[real_ts + i * step, 101.0 + i] for i in range(1, 5)]
+    _api(monkeypatch, points)
+    backfill.backfill("bitcoin", "1m", now=NOW)
+    latest = persistence.load_price("bitcoin")
+    assert latest["ts"] == points[-1][0]
+    assert latest["data"]["usd"] == points[-1][1]
+    assert latest["data"]["brl"] == 500.0 and latest["data"]["usd_24h_change"] == 1.5
+
+
+def test_merge_keeps_existing_columns(temp_db):
+    persistence.save_ticks([("bitcoin", 1000, {"usd": 100.0, "brl": 500.0})])
+    persistence.save_ticks([("bitcoin", 1000, {"usd": 99.0})], merge=True)
+    assert persistence.load_price("bitcoin")["data"] == {"usd": 99.0, "brl": 500.0}
+    persistence.save_ticks([("bitcoin", 1000, {"usd": 98.0})])
+    assert persistence.load_price("bitcoin")["data"] == {"usd": 98.0}
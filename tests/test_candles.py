@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.services.candles import CandleEngine, CandleSeries
+
+MIN = 60_000
+
+
+def _rows(series: CandleSeries):
+    return list(zip(series.start, series.open, series.high, series.low, series.close))
+
+
+def test_update_opens_and_closes_buckets():
+    series = CandleSeries(MIN)
+    assert series.update(0, 10.0) is True
+    assert series.update(30_000, 12.0) is False
+    assert series.update(50_000, 9.0) is False
+    assert series.update(MIN + 1, 11.0) is True  # o primeiro candle fechou
+    assert _rows(series) == [(0, 10.0, 12.0, 9.0, 9.0), (MIN, 11.0, 11.0, 11.0, 11.0)]
+    assert series.last() == (MIN, 11.0, 11.0, 11.0, 11.0)
+
+
+def test_late_tick_updates_its_bucket_only():
+    series = CandleSeries(MIN)
+    for ts, price in ((0, 10.0), (MIN, 11.0), (2 * MIN, 12.0)):
+        series.update(ts, price)
+    assert series.update(MIN + 5, 20.0) is False
+    assert series.update(MIN + 6, 1.0) is False
+    assert _rows(series)[1] == (MIN, 11.0, 20.0, 1.0, 11.0)  # close do bucket fica o que era
+    series.update(-5 * MIN, 99.0)  # anterior a toda a série: ignorado
+    assert len(series) == 3
+
+
+def test_seed_matches_incremental_updates():
+    rng = np.random.default_rng(3)
+    ts = np.sort(rng.integers(0, 50 * MIN, 400))
+    prices = rng.uniform(1, 2, 400)
+    seeded = CandleSeries(5 * MIN)
+    seeded.seed(ts, prices)
+    incremental = CandleSeries(5 * MIN)
+    for t, p in zip(ts, prices):
+        incremental.update(int(t), float(p))
+    assert _rows(seeded) == _rows(incremental)
+
+
+def test_max_candles_trim_and_frame():
+    series = CandleSeries(MIN, max_candles=3)
+    for i in range(7):
+        series.update(i * MIN, float(i))
+    # corte amortizado: passa do dobro do limite e volta ao limite
+    assert list(series.start) == [4 * MIN, 5 * MIN, 6 * MIN]
+    frame = series.to_frame(last_n=2)
+    assert list(frame["close"]) == [5.0, 6.0] and list(frame.columns) == ["open", "high", "low", "close", "volume"]
+
+
+def test_engine_updates_all_timeframes_of_a_coin():
+    engine = CandleEngine()
+    engine.seed("bitcoin", "1m", [0], [10.0])
+    engine.seed("bitcoin", "1h", [0], [10.0])
+    engine.load("ethereum", "1m", [0], [1.0], [1.0], [1.0], [1.0])
+    engine.update("bitcoin", MIN, 11.0)
+    assert len(engine.get("bitcoin", "1m")) == 2 and len(engine.get("bitcoin", "1h")) == 1
+    assert engine.get("bitcoin", "1h").last()[4] == 11.0
+    assert len(engine.get("ethereum", "1m")) == 1
+    engine.drop("bitcoin")
+    assert engine.get("bitcoin", "1m") is None and engine.get("ethereum", "1m") is not None
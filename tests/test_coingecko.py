@@ -0,0 +1,55 @@
+import pytest
+import requests
+
+from src.services.coingecko import CoinGeckoClient, chunk_ids
+from src.services.rate_limit import RateLimiter, RateLimitError
+
+
+def _response(body: bytes, status: int = 200, headers=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers.update(headers or {})
+    resp.url = "http://stub.invalid"
+    return resp
+
+
+def _client(*responses) -> CoinGeckoClient:
+    client = CoinGeckoClient(base_url="http://stub.invalid", limiter=RateLimiter(per_minute=600, burst=10))
+    queue = list(responses)
+    client.session.get = lambda *args, **kwargs: queue.pop(0)
+    return client
+
+
+def test_invalid_json_raises_friendly_error():
+    client = _client(_response(b"<html>502 Bad Gateway</html>"))
+    with pytest.raises(Exception, match="get_coin_details: Resposta inválida da API"):
+        client.get_coin_details("bitcoin")
+
+
+def test_invalid_json_falls_back_to_expired_entry():
+    client = _client(_response(b'{"id": "bitcoin"}'), _response(b'{"id": "bitc'))
+    assert client.get_coin_details("bitcoin") == {"id": "bitcoin"}
+    for entry in client.cache._entries.values():
+        entry.expires_at = 0  # vence a entrada
+    assert client.get_coin_details("bitcoin") == {"id": "bitcoin"}
+
+
+def test_chunk_ids_respects_budget():
+    ids = [f"coin-{i}" for i in range(50)]
+    chunks = chunk_ids(ids, 40)
+    assert [c for chunk in chunks for c in chunk] == ids
+    assert all(len("%2C".join(chunk)) <= 40 for chunk in chunks)
+    assert chunk_ids(["a" * 100], 10) == [["a" * 100]]
+
+
+def test_fresh_only_prices_never_serve_expired_entry():
+    client = _client(_response(b'{"bitcoin": {"usd": 1.0}}'), _response(b"", 429, {"Retry-After": "30"}),
+                     _response(b'{"bitcoin": {"usd": 1.0}}'))
+    assert client.get_prices(["bitcoin"], ["usd"]) == {"bitcoin": {"usd": 1.0}}
+    for entry in client.cache._entries.values():
+        entry.expires_at = 0
+    with pytest.raises(RateLimitError):
+        client.get_prices(["bitcoin"], ["usd"], allow_stale=False)
+    # o padrão (telas) continua servindo o último valor conhecido com o circuito aberto
+    assert client.get_prices(["bitcoin"], ["usd"]) == {"bitcoin": {"usd": 1.0}}
@@ -0,0 +1,32 @@
+from unittest import mock
+
+from src import collector
+from src.services import coingecko
+from src.services.rate_limit import RateLimitError
+
+
+def _collector(temp_db):
+    writer = mock.Mock()
+    writer.submit_prices.return_value = True
+    return collector.Collector(coins=["bitcoin"], fiats=["usd"], interval=1, snapshot_path=None,
+                               rotate_interval=None, stats_interval=None, health_path=None,
+                               maintenance=False, writer=writer, align=False, out=None)
+
+
+def test_rate_limited_slot_writes_nothing(temp_db, monkeypatch):
+    calls = []
+
+    def fake_prices(coins, fiats, include_24hr_change=True, allow_stale=True):
+        calls.append(allow_stale)
+        if len(calls) == 1:
+            return {"bitcoin": {"usd": 1.0}}
+        raise RateLimitError("get_prices: circuito aberto", 30)
+
+    monkeypatch.setattr(coingecko, "get_prices", fake_prices)
+    c = _collector(temp_db)
+    assert c.tick(1000, 0) is True
+    assert c.tick(2000, 0) is False
+    assert calls == [False, False]  # o coletor sempre pede só preços novos
+    assert c.writer.submit_prices.call_count == 1
+    assert c._stats["ok"] == 1 and c._stats["errors"] == 1
+    assert c._consecutive_errors == 1 and c._last_success == 1000
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from src.ui.details import Details
+
+CACHED = {"data": {"usd": 1.0, "brl": 5.0}, "timestamp": "2024-01-01 00:00:00"}
+
+
+def _screen(coin):
+    labels = ("name_label", "price_usd", "price_brl", "market_cap", "last_update", "desc_area",
+              "img_label", "status_label")
+    return SimpleNamespace(_coin=coin, controller=SimpleNamespace(selected_coin=coin),
+                           **{name: mock.Mock() for name in labels})
+
+
+def test_populate_from_cache_ignores_superseded_coin():
+    screen = _screen("ethereum")
+    Details.populate_from_cache(screen, CACHED, "bitcoin")
+    screen.name_label.configure.assert_not_called()
+    screen.status_label.configure.assert_not_called()
+
+
+def test_populate_from_cache_shows_current_coin():
+    screen = _screen("bitcoin")
+    Details.populate_from_cache(screen, CACHED, "bitcoin")
+    screen.name_label.configure.assert_called_with(text="Bitcoin (cache)")
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.services.downsample import downsample, lttb, minmax
+
+
+def _series(n=10_000, seed=1):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.int64) * 1000
+    y = np.cumsum(rng.normal(size=n))
+    return x, y
+
+
+def test_minmax_keeps_extremes_and_order():
+    x, y = _series()
+    y[1234], y[8765] = 1e6, -1e6  # picos isolados
+    xs, ys = minmax(x, y, 100)
+    assert len(xs) <= 2 * 100 + 2
+    assert np.all(np.diff(xs) > 0)
+    assert ys.max() == 1e6 and ys.min() == -1e6
+    assert xs[0] == x[0] and xs[-1] == x[-1]
+    assert set(zip(xs.tolist(), ys.tolist())) <= set(zip(x.tolist(), y.tolist()))
+
+
+def test_lttb_exact_point_count():
+    x, y = _series()
+    xs, ys = lttb(x, y, 300)
+    assert len(xs) == 300
+    assert np.all(np.diff(xs) > 0)
+    assert (xs[0], ys[0], xs[-1], ys[-1]) == (x[0], y[0], x[-1], y[-1])
+
+
+def test_short_series_untouched():
+    x, y = _series(50)
+    for xs, ys in (minmax(x, y, 100), lttb(x, y, 100), downsample(x, y, 100, "lttb")):
+        assert np.array_equal(xs, x) and np.array_equal(ys, y)
+
+
+def test_unknown_method():
+    x, y = _series(10)
+    with pytest.raises(ValueError):
+        downsample(x, y, 100, "media")
+
+
+def test_sql_buckets_keep_extremes(temp_db):
+    from src.services import persistence
+
+    x, y = _series(20_000, seed=5)
+    y[777], y[15_000] = 1e6, -1e6
+    persistence.save_ticks([("bitcoin", int(t), {"usd": float(p)}) for t, p in zip(x, y)])
+    persistence.save_ticks([("bitcoin", int(x[-1]) + 1000, {"brl": 1.0})])  # sem usd: fora da conta
+    total, ts, prices = persistence.load_price_buckets("bitcoin", 200)
+    assert total == 20_000
+    assert len(ts) <= 2 * 200 + 2 and np.all(np.diff(ts) > 0)
+    assert prices.max() == 1e6 and prices.min() == -1e6
+    assert ts[0] == x[0] and ts[-1] == x[-1]  # primeiro bucket começa no primeiro tick
+    # cada ponto é um tick real
+    lookup = dict(zip(x.tolist(), y.tolist()))
+    assert all(lookup[t] == p for t, p in zip(ts.tolist(), prices.tolist()))
+    assert persistence.load_price_buckets("ethereum", 200)[0] == 0
@@ -0,0 +1,29 @@
+import json
+
+from src.services import history_io, persistence
+
+
+def _write_ndjson(path, ticks):
+    with open(path, "w", encoding="utf-8") as fh:
+        for coin, ts, usd in ticks:
+            fh.write(json.dumps({"coin": coin, "ts": ts, "usd": usd}) + "\n")
+
+
+def test_existing_tick_times_only_returns_requested_keys(temp_db):
+    # muitos ticks no meio do intervalo do lote: nenhum deles deve ser carregado
+    persistence.save_ticks([("bitcoin", ts, {"usd": 1.0}) for ts in range(1000, 2000)])
+    assert persistence.existing_tick_times("bitcoin", [0, 1500, 5000]) == {1500}
+    assert persistence.existing_tick_times("bitcoin", range(0, 3000, 7), chunk=50) == set(range(1001, 2000, 7))
+    assert persistence.existing_tick_times("ethereum", [1500]) == set()
+
+
+def test_import_counts_duplicates_against_db(temp_db, tmp_path):
+    persistence.save_ticks([("bitcoin", 2000, {"usd": 1.0})])
+    path = str(tmp_path / "ticks.ndjson")
+    _write_ndjson(path, [("bitcoin", 1000, 1.0), ("bitcoin", 2000, 9.0), ("bitcoin", 3000, 3.0),
+                         ("bitcoin", 3000, 3.0), ("ethereum", 2000, 2.0)])
+    stats = history_io.import_ticks(path, batch_size=2)
+    assert stats == {"read": 5, "imported": 3, "duplicates": 2, "invalid": 0}
+    assert persistence.count_ticks() == 4
+    # o tick já existente não é sobrescrito pelo import
+    assert [t for t in persistence.iter_ticks(["bitcoin"]) if t[1] == 2000][0][2]["usd"] == 1.0
@@ -0,0 +1,45 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.services.candles import CandleSeries
+from src.ui.live_chart import LiveCandleChart
+
+MIN = 60_000
+
+
+def _chart():
+    fig = Figure(figsize=(6, 4), dpi=50)
+    ax = fig.add_subplot(111)
+    return LiveCandleChart(fig, ax, FigureCanvasAgg(fig))
+
+
+def _series(prices):
+    series = CandleSeries(MIN)
+    for i, price in enumerate(prices):
+        series.update(i * MIN, price)
+    return series
+
+
+def test_render_needs_a_closed_candle():
+    chart = _chart()
+    series = _series([10.0])
+    assert not chart.can_render(series)
+    with pytest.raises(ValueError):
+        chart.render(series, "BTC")
+
+
+def test_update_blits_and_keeps_title_on_full_redraw():
+    chart = _chart()
+    series = _series([10.0, 11.0, 12.0])
+    chart.render(series, "BTC - Candles 1m")
+    series.update(2 * MIN + 1000, 12.05)  # dentro da faixa vertical
+    assert chart.update(series) == "blit"
+    series.update(3 * MIN, 13.0)  # candle novo: o eixo x muda
+    assert chart.update(series, "BTC - Candles 1m") == "full"
+    assert chart.ax.get_title() == "BTC - Candles 1m"
+    assert chart.frame_stats()["blit"]["frames"] == 1
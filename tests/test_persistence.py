@@ -0,0 +1,114 @@
+import json
+import random
+import sqlite3
+
+from src.services import persistence
+from src.services.candles import TIMEFRAME_MS
+
+
+def _legacy_db(path: str, rows) -> None:
+    """Banco da versão antiga: só a tabela `prices` (JSON + timestamp texto)."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE prices (id INTEGER PRIMARY KEY AUTOINCREMENT, coin TEXT NOT NULL, "
+                 "data TEXT NOT NULL, timestamp TEXT NOT NULL)")
+    conn.executemany("INSERT INTO prices (coin, data, timestamp) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _candles(coin: str):
+    with persistence.get_engine().connection() as conn:
+        return conn.execute(
+            "SELECT fiat, tf, start, open, high, low, close, open_ts, close_ts FROM candles "
+            "WHERE coin = ? ORDER BY fiat, tf, start", (coin,),
+        ).fetchall()
+
+
+def test_legacy_prices_migration(temp_db):
+    _legacy_db(temp_db, [
+        ("bitcoin", json.dumps({"usd": 100.0, "brl": 500.0}), "2024-01-01 00:00:00"),
+        ("bitcoin", json.dumps({"usd": 101.0}), "2024-01-01T00:01:00"),
+        ("ethereum", "não é json", "2024-01-01 00:00:00"),
+        ("ethereum", json.dumps({"usd": 1.0}), "data inválida"),
+    ])
+    engine = persistence.get_engine()
+    # o engine também dispara a migração em segundo plano; as duas dividem o mesmo lock
+    engine.migrate_legacy_prices(batch_size=2)
+    with engine.connection() as conn:
+        assert not persistence._table_exists(conn, "prices")
+    rows = list(persistence.iter_ticks(["bitcoin"]))
+    start = persistence.parse_ts("2024-01-01 00:00:00")
+    assert [(ts, data) for _coin, ts, data in rows] == [
+        (start, {"usd": 100.0, "brl": 500.0}),
+        (start + 60_000, {"usd": 101.0}),
+    ]
+    # JSON inválido vira tick sem preço; timestamp inválido é descartado
+    assert persistence.count_ticks(["ethereum"]) == 1
+    assert engine.migrate_legacy_prices() == 0
+
+
+def test_save_prices_bulk_one_transaction_same_ts(temp_db):
+    prices = {"bitcoin": {"usd": 100.0, "brl": 500.0}, "ethereum": {"usd": 10.0}, "ripple": {}}
+    assert persistence.save_prices_bulk(prices, ts=5000) == 3
+    assert persistence.count_ticks() == 3
+    assert {coin: persistence.load_price(coin)["ts"] for coin in prices} == dict.fromkeys(prices, 5000)
+    assert persistence.load_price("bitcoin")["data"] == {"usd": 100.0, "brl": 500.0}
+    assert persistence.save_prices_bulk({}) == 0
+
+
+def test_import_export_keeps_each_fetched_at(temp_db, tmp_path, monkeypatch):
+    persistence.save_ticks([
+        ("bitcoin", persistence.parse_ts("2024-01-01 10:00:00"), {"usd": 100.0}),
+        ("ethereum", persistence.parse_ts("2024-01-02 12:30:00"), {"usd": 10.0, "brl": 50.0}),
+    ])
+    export = tmp_path / "export.json"
+    persistence.export_prices_to_json(str(export), ["bitcoin", "ethereum", "ripple"])
+    payload = json.loads(export.read_text(encoding="utf-8"))
+    # uma entrada sem fetched_at recebe o instante da importação
+    payload["prices"]["solana"] = {"data": {"usd": 1.0}}
+    export.write_text(json.dumps(payload), encoding="utf-8")
+
+    persistence.close_db()
+    monkeypatch.setattr(persistence, "DB_PATH", str(tmp_path / "import.db"))
+    monkeypatch.setattr(persistence, "now_ms", lambda: 1_700_000_000_000)
+    assert persistence.import_prices_from_json(str(export)) == ["bitcoin", "ethereum", "solana"]
+    assert persistence.count_ticks() == 3
+    assert persistence.load_price("bitcoin")["ts"] == persistence.parse_ts("2024-01-01 10:00:00")
+    assert persistence.load_price("ethereum")["ts"] == persistence.parse_ts("2024-01-02 12:30:00")
+    assert persistence.load_price("ethereum")["data"] == {"usd": 10.0, "brl": 50.0}
+    assert persistence.load_price("solana")["ts"] == 1_700_000_000_000
+
+
+def test_incremental_candles_match_rebuild(temp_db):
+    rng = random.Random(7)
+    ticks = [("bitcoin", rng.randrange(0, 3 * 24 * 3600_000), {"usd": rng.uniform(90, 110)}) for _ in range(500)]
+    # lotes fora de ordem, como chegam do writer, do backfill e do import
+    for i in range(0, len(ticks), 37):
+        persistence.save_ticks(ticks[i:i + 37])
+    incremental = _candles("bitcoin")
+    assert persistence.rebuild_candles("bitcoin") == len(incremental)
+    rebuilt = _candles("bitcoin")
+    assert len(rebuilt) == len(incremental)
+    for a, b in zip(incremental, rebuilt):
+        assert a[:3] == b[:3] and a[7:] == b[7:]
+        assert all(abs(x - y) < 1e-9 for x, y in zip(a[3:7], b[3:7]))
+    assert {row[1] for row in rebuilt} == set(TIMEFRAME_MS)
+
+
+def test_coverage_merges_overlapping_and_adjacent(temp_db):
+    persistence.add_coverage("bitcoin", "usd", 300_000, 0, 1000)
+    persistence.add_coverage("bitcoin", "usd", 300_000, 1000, 2000)  # adjacente
+    persistence.add_coverage("bitcoin", "usd", 300_000, 5000, 6000)
+    persistence.add_coverage("bitcoin", "usd", 300_000, 1500, 5500)  # une tudo
+    persistence.add_coverage("bitcoin", "usd", 3_600_000, 9000, 9500)  # outro passo: separado
+    assert persistence.load_coverage("bitcoin", "usd", 300_000, 0, 10_000) == [(0, 6000)]
+    assert persistence.load_coverage("bitcoin", "usd", 3_600_000, 0, 10_000) == [(0, 6000), (9000, 9500)]
+    assert persistence.load_coverage("bitcoin", "usd", 300_000, 7000, 8000) == []
+    assert persistence.load_coverage("ethereum", "usd", 3_600_000, 0, 10_000) == []
+
+
+def test_tick_buckets_one_per_bucket(temp_db):
+    persistence.save_ticks([("bitcoin", ts, {"usd": 1.0}) for ts in (0, 10, 999, 1000, 5500)])
+    persistence.save_ticks([("bitcoin", 7000, {"brl": 1.0})])
+    assert persistence.load_tick_buckets("bitcoin", 1000, 0, 10_000) == [0, 1, 5]
+    assert persistence.load_tick_buckets("bitcoin", 1000, 0, 10_000, fiat="brl") == [7]
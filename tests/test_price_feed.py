@@ -0,0 +1,50 @@
+from unittest import mock
+
+import requests
+
+from src.services import coingecko, price_feed
+from src.services.coingecko import CoinGeckoClient
+from src.services.rate_limit import RateLimiter
+
+
+def _response(body: bytes, status: int = 200, headers=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers.update(headers or {})
+    resp.url = "http://stub.invalid"
+    return resp
+
+
+def test_stale_prices_reach_subscribers_but_not_history(monkeypatch):
+    client = CoinGeckoClient(base_url="http://stub.invalid", limiter=RateLimiter(per_minute=600, burst=10))
+    responses = [_response(b'{"bitcoin": {"usd": 1.0}}'), _response(b"", 429, {"Retry-After": "30"})]
+    client.session.get = lambda *args, **kwargs: responses.pop(0)
+    writer = mock.Mock()
+    monkeypatch.setattr(coingecko, "get_client", lambda: client)
+    monkeypatch.setattr(price_feed, "get_writer", lambda: writer)
+    feed = price_feed.PriceFeed()
+
+    assert feed.fetch(["bitcoin"], ["usd"]) == {"bitcoin": {"usd": 1.0}}
+    assert writer.submit_prices.call_count == 1
+    for entry in client.cache._entries.values():
+        entry.expires_at = 0
+    # 429 e depois circuito aberto: a tela recebe o último preço, o histórico não ganha ticks repetidos
+    for _ in range(2):
+        assert feed.fetch(["bitcoin"], ["usd"]) == {"bitcoin": {"usd": 1.0}}
+    assert writer.submit_prices.call_count == 1
+    assert feed.stats()["stale"] == 2
+
+
+def test_stale_set_marks_only_chunks_served_from_cache(monkeypatch):
+    client = CoinGeckoClient(base_url="http://stub.invalid", limiter=RateLimiter(per_minute=600, burst=10))
+    client.max_url_length = 0  # orçamento mínimo: um id por lote
+    stale = set()
+    fresh_body = b'{"ethereum": {"usd": 2.0}}'
+    client.session.get = lambda url, params=None, **kw: (
+        _response(b"<html>", 200) if "bitcoin" in params["ids"] else _response(fresh_body))
+    client.cache.store(coingecko._cache_key(f"{client.base_url}/simple/price", {
+        "vs_currencies": "usd", "include_24hr_change": "true", "ids": "bitcoin"}), {"bitcoin": {"usd": 1.0}}, -1, 10)
+    data = client.get_prices(["bitcoin", "ethereum"], ["usd"], stale=stale)
+    assert data == {"bitcoin": {"usd": 1.0}, "ethereum": {"usd": 2.0}}
+    assert stale == {"bitcoin"}
@@ -0,0 +1,139 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from src.services import rate_limit
+from src.services.rate_limit import CircuitBreaker, RateLimitError, RateLimiter, TokenBucket
+
+
+def _half_open(breaker: CircuitBreaker) -> None:
+    breaker.record_failure(force=True)
+    breaker._open_until = time.monotonic() - 0.01  # tempo de abertura já vencido
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 1.0
+    assert bucket.acquire(timeout=0) is False
+
+
+def test_breaker_closed_open_half_open_closed():
+    breaker = CircuitBreaker(failure_threshold=2)
+    assert breaker.allow() == 0 and breaker.state == CircuitBreaker.CLOSED
+    assert breaker.record_failure() == 0  # abaixo do limite: continua fechado
+    assert breaker.record_failure() > 0
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() > 0
+    breaker._open_until = time.monotonic() - 0.01
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() == 0  # a tentativa de teste
+    assert breaker.allow() == 1.0  # só uma por vez
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_failed_probe_reopens():
+    breaker = CircuitBreaker()
+    _half_open(breaker)
+    assert breaker.allow() == 0
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_probe_not_sent_then_retry():
+    """Sem token para a tentativa do half-open, a próxima chamada (com token) ainda pode testar."""
+    limiter = RateLimiter(per_minute=60, burst=1)
+    assert limiter.bucket.try_acquire() == 0  # balde vazio
+    _half_open(limiter.breaker)
+    with pytest.raises(RateLimitError, match="limite local"):
+        limiter.before_request("teste", max_wait=0)
+    limiter.bucket._tokens = 1  # balde reabastecido
+    limiter.before_request("teste", max_wait=0)  # não fica preso em "API limitada"
+    limiter.on_success()
+    assert limiter.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_try_request_token_wait_does_not_claim_probe():
+    limiter = RateLimiter(per_minute=60, burst=1)
+    limiter.bucket.try_acquire()
+    _half_open(limiter.breaker)
+    assert limiter.try_request("teste") > 0
+    limiter.bucket._tokens = 1
+    assert limiter.try_request("teste") == 0
+
+
+def test_on_abort_releases_probe():
+    limiter = RateLimiter(per_minute=60, burst=5)
+    _half_open(limiter.breaker)
+    assert limiter.try_request("teste") == 0
+    with pytest.raises(RateLimitError):
+        limiter.try_request("teste")  # tentativa em andamento
+    limiter.on_abort()  # ex.: requisição cancelada antes da resposta
+    assert limiter.try_request("teste") == 0
+
+
+def test_token_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(rate=1000.0, capacity=3)
+    for _ in range(3):
+        bucket.try_acquire()
+    assert bucket.acquire(timeout=1) is True  # espera ~1 ms pelo próximo token
+    time.sleep(0.05)
+    assert bucket.tokens() == 3
+
+
+def test_parse_retry_after():
+    assert rate_limit.parse_retry_after("30") == 30.0
+    assert rate_limit.parse_retry_after("-5") == 0.0
+    assert rate_limit.parse_retry_after(None) is None
+    assert rate_limit.parse_retry_after("amanhã") is None
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    assert 100 < rate_limit.parse_retry_after(when) <= 120
+
+
+def test_backoff_delay_grows_with_jitter_and_cap():
+    for attempt, full in ((1, 1.0), (3, 4.0), (20, 8.0)):
+        delay = rate_limit.backoff_delay(attempt, base=1.0, cap=8.0)
+        assert full / 2 <= delay <= full
+
+
+def test_throttled_opens_for_retry_after():
+    limiter = RateLimiter(per_minute=600, burst=5, failure_threshold=5)
+    wait = limiter.on_throttled(120)
+    assert wait >= 120
+    assert limiter.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(RateLimitError) as info:
+        limiter.try_request("teste")
+    assert info.value.retry_in > 100
+    stats = limiter.stats()
+    assert stats["throttled"] == 1 and stats["rejected"] == 1 and stats["breaker"]["trips"] == 1
+
+
+def test_failure_after_reopen_trips_again_immediately():
+    breaker = CircuitBreaker(failure_threshold=3)
+    _half_open(breaker)
+    breaker.allow()
+    # já tinha aberto antes: uma falha basta para reabrir, com backoff maior
+    assert breaker.record_failure() > 0
+    assert breaker.snapshot()["trips"] == 2
+    breaker.record_success()
+    assert breaker.snapshot() == {"state": "closed", "consecutive_failures": 0, "trips": 0, "open_for": 0.0}
+
+
+def test_background_calls_and_spare_tokens():
+    limiter = RateLimiter(per_minute=600, burst=3)
+    assert limiter.foreground_idle() == float("inf")
+    with rate_limit.background():
+        assert rate_limit.is_background()
+        limiter.before_request("prefetch", max_wait=0)
+    assert not rate_limit.is_background()
+    assert limiter.foreground_idle() == float("inf")  # fundo não conta como uso
+    assert limiter.has_spare(reserve=1)
+    limiter.before_request("tela", max_wait=0)
+    assert limiter.foreground_idle() < 1
+    assert not limiter.has_spare(reserve=1)
+    assert limiter.stats()["background"] == 1 and limiter.stats()["requests"] == 2
@@ -0,0 +1,61 @@
+import sqlite3
+
+from src.services import persistence, retention
+
+
+def _legacy_db(path: str) -> None:
+    """Banco antigo: sem auto_vacuum (modo 0)."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=NONE")
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    conn.close()
+
+
+def test_background_vacuum_never_runs_full_vacuum(temp_db):
+    _legacy_db(temp_db)
+    assert retention.needs_conversion()
+    report = retention.vacuum()
+    assert report["needs_conversion"] is True
+    assert retention.needs_conversion()  # nada mudou em segundo plano
+
+
+def test_convert_to_incremental_once(temp_db):
+    _legacy_db(temp_db)
+    assert retention.convert_to_incremental() is True
+    assert not retention.needs_conversion()
+    assert retention.convert_to_incremental() is False
+    assert retention.vacuum()["needs_conversion"] is False
+
+
+def _ticks(coin, start, count, step_ms):
+    return [(coin, start + i * step_ms, {"usd": float(i)}) for i in range(count)]
+
+
+def test_compaction_keeps_last_tick_per_bucket(temp_db):
+    policy = retention.RetentionPolicy(raw_days=1, compact_minutes=5)
+    now = 10 * retention.DAY_MS
+    persistence.save_ticks(_ticks("bitcoin", 0, 60, 60_000))  # 1h de ticks por minuto, bem antigos
+    deleted = retention.compact_ticks(policy, now)
+    assert deleted == 48 and persistence.count_ticks() == 12
+    assert retention.compact_ticks(policy, now) == 0  # marca já passou
+
+
+def test_backfilled_old_ticks_are_compacted(temp_db):
+    policy = retention.RetentionPolicy(raw_days=1, compact_minutes=5)
+    now = 10 * retention.DAY_MS
+    persistence.save_ticks(_ticks("bitcoin", 5 * retention.DAY_MS, 10, 60_000))
+    retention.compact_ticks(policy, now)
+    before = persistence.count_ticks()
+    # backfill/import grava depois ticks mais antigos que a marca da compactação
+    persistence.save_ticks(_ticks("bitcoin", 0, 60, 60_000))
+    assert retention.compact_ticks(policy, now) == 48
+    assert persistence.count_ticks() == before + 12
+
+
+def test_convert_at_startup_skips_large_db(temp_db):
+    _legacy_db(temp_db)
+    assert retention.convert_at_startup(max_bytes=0) == "pending"
+    assert retention.needs_conversion()
+    assert retention.convert_at_startup(max_bytes=None) == "converted"
+    assert retention.convert_at_startup(max_bytes=0) == "ok"
@@ -0,0 +1,59 @@
+import math
+import os
+
+import pytest
+
+from src.services import snapshot
+
+PRICES = {
+    "bitcoin": {"usd": 100.5, "brl": 500.25, "usd_24h_change": -1.5},
+    "ethereum": {"usd": 10.0},  # colunas ausentes viram NaN e somem na leitura
+    "ripple": {"usd": 0.5, "nota": "texto ignorado", "ativo": True},
+}
+
+
+def test_round_trip():
+    saved_at, data = snapshot.decode(snapshot.encode(PRICES, saved_at=123))
+    assert saved_at == 123
+    assert data == {
+        "bitcoin": PRICES["bitcoin"],
+        "ethereum": {"usd": 10.0},
+        "ripple": {"usd": 0.5},
+    }
+    assert not any(math.isnan(v) for row in data.values() for v in row.values())
+
+
+@pytest.mark.parametrize("corrupt, message", [
+    (lambda b: b[:10], "truncado"),
+    (lambda b: b"XXXX" + b[4:], "não é um snapshot"),
+    (lambda b: b[:4] + b"\x09\x00" + b[6:], "versão"),
+    (lambda b: b[:-1] + bytes([b[-1] ^ 0xFF]), "checksum"),
+    (lambda b: b[:-8], "checksum"),
+])
+def test_corruption_is_rejected(corrupt, message):
+    blob = snapshot.encode(PRICES, saved_at=1)
+    with pytest.raises(snapshot.SnapshotError, match=message):
+        snapshot.decode(corrupt(blob))
+
+
+def test_save_and_load_file(tmp_path):
+    path = str(tmp_path / "prices.snap")
+    assert snapshot.load_snapshot(path) is None
+    assert snapshot.save_snapshot(path, PRICES) is True
+    assert snapshot.save_snapshot(path, PRICES) is False  # mesmo corpo: não reescreve
+    assert snapshot.load_snapshot(path)["prices"]["bitcoin"] == PRICES["bitcoin"]
+    with open(path, "r+b") as fh:
+        fh.seek(-3, os.SEEK_END)
+        fh.write(b"\x00\x01\x02")
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.load_snapshot(path)
+
+
+def test_rotate_keeps_newest_copies(tmp_path):
+    path = str(tmp_path / "prices.snap")
+    for i in range(4):
+        snapshot.save_snapshot(path, {"bitcoin": {"usd": float(i)}})
+        snapshot.rotate_snapshots(path, keep=2)
+    assert sorted(os.listdir(tmp_path)) == ["prices.snap", "prices.snap.1", "prices.snap.2"]
+    assert snapshot.load_snapshot(path + ".1")["prices"]["bitcoin"]["usd"] == 3.0
+    assert snapshot.load_snapshot(path + ".2")["prices"]["bitcoin"]["usd"] == 2.0
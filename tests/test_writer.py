@@ -0,0 +1,52 @@
+import sqlite3
+
+from src.services import persistence
+from src.services.writer import PriceWriter
+
+
+def _flaky_save_ticks(monkeypatch, failures: int):
+    real = persistence.save_ticks
+    calls = {"n": 0}
+
+    def save_ticks(rows):
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            raise sqlite3.OperationalError("database is locked")
+        return real(rows)
+
+    monkeypatch.setattr(persistence, "save_ticks", save_ticks)
+    return calls
+
+
+def test_failed_batch_is_retried_not_dropped(temp_db, monkeypatch):
+    _flaky_save_ticks(monkeypatch, failures=2)
+    writer = PriceWriter(flush_interval=0.01, retry_backoff=0.01)
+    writer.submit_prices({"bitcoin": {"usd": 1.0}}, ts=1000)
+    writer.submit_prices({"bitcoin": {"usd": 2.0}}, ts=2000)
+    assert writer.flush(timeout=5)
+    stats = writer.stats()
+    writer.stop()
+    assert stats["written"] == 2 and stats["retries"] == 2 and stats["lost"] == 0
+    assert stats["failing_since"] is None and stats["pending_ticks"] == 0
+    assert persistence.count_ticks() == 2
+
+
+def test_gives_up_after_bounded_retries(temp_db, monkeypatch):
+    _flaky_save_ticks(monkeypatch, failures=1000)
+    writer = PriceWriter(flush_interval=0.01, retries=2, retry_backoff=0.01)
+    writer.submit_prices({"bitcoin": {"usd": 1.0}}, ts=1000)
+    assert writer.flush(timeout=5)  # desistiu após as novas tentativas
+    stats = writer.stats()
+    writer.stop()
+    assert stats["lost"] == 1 and stats["retries"] == 2
+    assert stats["failing_since"] is not None and "locked" in stats["last_error"]
+    assert writer.pending("bitcoin") == []
+
+
+def test_stop_writes_everything_queued(temp_db):
+    writer = PriceWriter(flush_interval=60)
+    for i in range(1200):
+        writer.submit_prices({"bitcoin": {"usd": float(i)}}, ts=i)
+    writer.stop()
+    assert persistence.count_ticks() == 1200
+    assert writer.stats()["batches"] == 3